@@ -1,19 +1,31 @@
 import os
 import json
 import logging
+import functools
 from io import StringIO
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Set
 import time
 import yaml
 import click
-from gluepy.conf import default_context_manager, default_context
+from gluepy.conf import default_context_manager, default_context, default_settings
+from gluepy.exec.cache import task_cache
+from gluepy.exec.profiling import BaseProfiler, PROFILERS, get_profiler
 from gluepy.files.storages import default_storage
 from gluepy.ops import default_mlops
+from gluepy.utils import tracing
+from gluepy.utils.loading import import_string
 from . import cli
 
 logger = logging.getLogger(__name__)
 
+# Folder in the run folder that hold the completion markers of tasks.
+MARKERS_FOLDER = "_markers"
+# Folder in the run folder that hold trace events recorded by worker processes.
+TRACE_FOLDER = "_trace"
+
 
 @cli.command()
 @click.option("--task", type=str)
@@ -31,6 +43,17 @@ logger = logging.getLogger(__name__)
 @click.option(
     "--compare", type=str, multiple=True, help="Compare metrics across run folders"
 )
+@click.option(
+    "--profile",
+    type=click.Choice(sorted(PROFILERS)),
+    help="Profile each task and write the results to the run folder",
+)
+@click.option(
+    "--trace",
+    is_flag=True,
+    default=False,
+    help="Record a timeline of the run to trace.json in the run folder",
+)
 @click.argument("label")
 def dag(
     label,
@@ -42,6 +65,8 @@ def dag(
     skip_eval: bool = False,
     eval_only: bool = False,
     compare: Optional[tuple] = None,
+    profile: Optional[str] = None,
+    trace: bool = False,
 ):
     """Wrapper around run_dag function to expose to CLI"""
     run_dag(
@@ -54,6 +79,8 @@ def dag(
         skip_eval=skip_eval,
         eval_only=eval_only,
         compare=compare,
+        profile=profile,
+        trace=trace,
     )
 
 
@@ -67,6 +94,8 @@ def run_dag(
     skip_eval: bool = False,
     eval_only: bool = False,
     compare: Optional[tuple] = None,
+    profile: Optional[str] = None,
+    trace: bool = False,
 ):
     """Command to run a DAG by its label.
 
@@ -85,6 +114,12 @@ def run_dag(
         skip_eval (bool): If True, skip evaluation tasks.
         eval_only (bool): If True, run only evaluation tasks (requires retry).
         compare (Optional[tuple]): Run folders to compare metrics across.
+        profile (Optional[str]): Profile each task in ``"cpu"``, ``"memory"`` or
+            ``"wall"`` mode, and write the results to the ``profile`` folder of
+            the run folder. Defaults to None.
+        trace (bool): If True, record a timeline of the tasks, storage operations
+            and data manager reads and writes of the run to ``trace.json`` in the
+            run folder. Also enabled by :setting:`DAG_TRACE`.
 
     """
     DAG = _get_dag_by_label(label)
@@ -112,7 +147,7 @@ def run_dag(
     if retry and default_storage.exists(os.path.join(retry, "context.yaml")):
         default_context_manager.load_context(
             os.path.join(retry, "context.yaml"),
-            patches=list(patch),
+            patches=list(patch) if patch else None,
             local_patches=local_patch_dicts or None,
         )
     elif retry:
@@ -132,32 +167,65 @@ def run_dag(
         )
 
     dag_instance = DAG()
-    tasks = dag_instance.inject_tasks(skip_eval=skip_eval, eval_only=eval_only)
+    graph = dag_instance.inject_graph(skip_eval=skip_eval, eval_only=eval_only)
 
     if task:
-        tasks = [_get_task_by_label(task)]
+        graph = {_get_task_by_label(task): []}
 
     if from_task:
         Task = _get_task_by_label(from_task)
-        for i, t in enumerate(tasks):
-            if t is Task:
-                pos = i
-                break
-        else:
+        tasks = list(graph)
+        if Task not in tasks:
             raise ValueError(f"Task '{from_task}' not found in DAG list of tasks.")
+        # Tasks before the task to retry from are already completed.
+        pos = tasks.index(Task)
         tasks = tasks[pos:]
+        graph = {t: [u for u in graph[t] if u in tasks] for t in tasks}
+
+    if retry and not (task or from_task or eval_only):
+        # Resume the run by skipping the tasks that the previous attempt
+        # completed, the start task is always run.
+        completed = _completed_tasks()
+        start = import_string(default_settings.START_TASK)
+        skipped = [
+            t
+            for t in graph
+            if t is not start and (t.label or t.__name__.lower()) in completed
+        ]
+        if skipped:
+            logger.info(
+                "Skipping tasks completed by previous attempt: "
+                f"{', '.join(t.__name__ for t in skipped)}"
+            )
+        graph = {
+            t: [u for u in upstream if u not in skipped]
+            for t, upstream in graph.items()
+            if t not in skipped
+        }
 
     default_mlops.create_run(dag=label, config=default_context.to_dict())
 
-    for t in tasks:
-        logger.info(f"---------- Started task '{t.__name__}'")
-        time_start = time.time()
-        t().run()
-        time_end = time.time()
-        logger.info(
-            f"---------- Completed task '{t.__name__}' in "
-            f"{'{:f}'.format(time_end-time_start)} seconds"
+    executor = import_string(
+        getattr(
+            default_settings,
+            "DAG_EXECUTOR",
+            "gluepy.exec.executors.SequentialExecutor",
         )
+    )()
+    profiler = get_profiler(profile) if profile else None
+    recorder = (
+        tracing.start_trace()
+        if trace or getattr(default_settings, "DAG_TRACE", False)
+        else None
+    )
+    try:
+        with tracing.span(label, "dag"):
+            executor.run(graph, functools.partial(_run_task, profiler=profiler))
+    finally:
+        if recorder is not None:
+            _save_trace(recorder)
+        if profiler is not None:
+            profiler.write_summary()
 
     if (not skip_eval and dag_instance.eval_tasks) or eval_only:
         metrics = default_mlops.get_metrics()
@@ -172,6 +240,112 @@ def run_dag(
             )
 
 
+def _run_task(Task, profiler: Optional[BaseProfiler] = None) -> None:
+    """Run a single task of a DAG, used by the DAG executor"""
+    logger.info(f"---------- Started task '{Task.__name__}'")
+    time_start = time.time()
+    try:
+        with tracing.span(Task.__name__, "task"):
+            cache = task_cache() if Task.cache else None
+            fingerprint = cache.fingerprint(Task) if cache is not None else None
+            if fingerprint is not None and cache.restore(Task, fingerprint):
+                logger.info(
+                    f"---------- Restored outputs of task '{Task.__name__}' from cache"
+                )
+            else:
+                with profiler.profile(Task) if profiler is not None else nullcontext():
+                    Task().run()
+                if fingerprint is not None:
+                    cache.save(Task, fingerprint)
+            time_end = time.time()
+            _write_marker(Task, time_end - time_start)
+    finally:
+        _write_worker_trace(Task)
+    logger.info(
+        f"---------- Completed task '{Task.__name__}' in "
+        f"{'{:f}'.format(time_end-time_start)} seconds"
+    )
+
+
+def _write_marker(Task, duration: float) -> None:
+    """Write the completion marker of a task to the run folder, which is used
+    to skip the task when the run is retried"""
+    outputs = dict()
+    for path in Task.outputs:
+        full_path = default_storage.runpath(path)
+        if not default_storage.exists(full_path):
+            continue
+        # Size of files in bytes, directories have no size.
+        outputs[path] = (
+            default_storage.size(full_path)
+            if default_storage.isfile(full_path)
+            else None
+        )
+
+    label = Task.label or Task.__name__.lower()
+    default_storage.touch(
+        default_storage.runpath(os.path.join(MARKERS_FOLDER, f"{label}.json")),
+        StringIO(
+            json.dumps(
+                {
+                    "task": Task.__name__,
+                    "duration": duration,
+                    "completed_at": datetime.now(timezone.utc).isoformat(),
+                    "outputs": outputs,
+                },
+                indent=2,
+            )
+        ),
+    )
+
+
+def _write_worker_trace(Task) -> None:
+    """Write the trace events of a task that ran in a worker process to the run
+    folder, to be merged into the trace of the run"""
+    recorder = tracing.get_recorder()
+    if recorder is None or recorder.pid == os.getpid():
+        return
+
+    label = Task.label or Task.__name__.lower()
+    default_storage.touch(
+        default_storage.runpath(os.path.join(TRACE_FOLDER, f"{label}.json")),
+        StringIO(json.dumps(recorder.pop_events())),
+    )
+
+
+def _save_trace(recorder: tracing.TraceRecorder) -> None:
+    """Stop recording the trace of the run, and write it to ``trace.json`` in
+    the run folder together with the events recorded by worker processes"""
+    tracing.stop_trace()
+    try:
+        files, _ = default_storage.ls(default_storage.runpath(TRACE_FOLDER))
+    except FileNotFoundError:
+        files = []
+    for path in files:
+        # Backends list either names or paths, so only the name is relied on.
+        path = default_storage.runpath(
+            os.path.join(TRACE_FOLDER, os.path.basename(path))
+        )
+        recorder.add_events(json.loads(default_storage.open(path)))
+    if files:
+        default_storage.rm(default_storage.runpath(TRACE_FOLDER), recursive=True)
+
+    default_storage.touch(
+        default_storage.runpath("trace.json"), StringIO(recorder.to_json())
+    )
+    logger.info(f"Wrote trace of run to '{default_storage.runpath('trace.json')}'.")
+
+
+def _completed_tasks() -> Set[str]:
+    """Get the labels of tasks with a completion marker in the run folder,
+    using a single listing of the markers folder"""
+    try:
+        files, _ = default_storage.ls(default_storage.runpath(MARKERS_FOLDER))
+    except FileNotFoundError:
+        return set()
+    return {os.path.splitext(os.path.basename(path))[0] for path in files}
+
+
 def _compare_runs(label, run_folders):
     """Compare metrics across multiple run folders."""
     all_metrics = {}
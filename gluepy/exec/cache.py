@@ -0,0 +1,201 @@
+import io
+import os
+import json
+import hashlib
+import inspect
+import logging
+from typing import Any, Optional, Type
+from gluepy.conf import default_context, default_settings
+from gluepy.exec.tasks import Task
+from gluepy.files.storages import default_storage
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCache:
+    """Cache of the outputs of tasks, keyed on a fingerprint of everything
+    that determine what the task produce.
+
+    The fingerprint of a task is computed from the source code of the task,
+    the values of the ``context_keys`` of :ref:`context_configuration` it
+    read, and the versions of the files of its ``inputs`` reported by
+    :meth:`BaseStorage.etag`, so that inputs are never downloaded to compute
+    the fingerprint. The content of inputs is hashed instead on storage
+    backends that do not implement ``etag``. The ``outputs`` of
+    the task are copied to the cache under :setting:`TASK_CACHE_PREFIX`
+    after the task ran, and copied back to the run folder instead of running
+    the task when a later run compute the same fingerprint.
+
+    Each entry is stored at ``<prefix>/<task label>/<fingerprint>/``, with a
+    ``manifest.json`` file that is written once all outputs are copied, so
+    that entries of tasks that failed to be stored are never restored.
+
+    Args:
+        prefix (str): Path relative to storage root to store outputs under.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix.rstrip(default_storage.separator)
+
+    def _join(self, *parts: str) -> str:
+        """Join parts of a storage path"""
+        return default_storage.separator.join(parts)
+
+    def _entry(self, task: Type[Task], fingerprint: str) -> str:
+        """Get the path of the cache entry of a task"""
+        label = task.label or task.__name__.lower()
+        return self._join(self.prefix, label, fingerprint)
+
+    def fingerprint(self, task: Type[Task]) -> Optional[str]:
+        """Compute the fingerprint of a task.
+
+        Args:
+            task (Type[Task]): Task to compute the fingerprint of.
+
+        Returns:
+            Optional[str]: Hex digest of the fingerprint, or None if an input
+              of the task does not exist.
+        """
+        digest = hashlib.sha256()
+        digest.update(self._source(task).encode("utf-8"))
+        digest.update(
+            json.dumps(self._context(task), sort_keys=True, default=str).encode("utf-8")
+        )
+        for path in task.inputs:
+            full_path = default_storage.runpath(path)
+            if not default_storage.exists(full_path):
+                logger.warning(
+                    f"Input '{path}' of task '{task.__name__}' does not exist, "
+                    "the task cache is not used."
+                )
+                return None
+            digest.update(path.encode("utf-8"))
+            digest.update(self._checksum(full_path).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _source(self, task: Type[Task]) -> str:
+        """Get the source code of a task and the classes it inherit from"""
+        sources = []
+        for klass in task.__mro__[:-1]:
+            try:
+                sources.append(inspect.getsource(klass))
+            except (OSError, TypeError):
+                # Source is not available for classes defined dynamically.
+                sources.append(f"{klass.__module__}.{klass.__qualname__}")
+        return "\n".join(sources)
+
+    def _context(self, task: Type[Task]) -> Any:
+        """Get the subset of the context that a task read"""
+        context = default_context.to_dict()
+        if task.context_keys is None:
+            # Meta data of the run, such as run_id, differ between every run.
+            context.pop("gluepy", None)
+            return context
+
+        values = dict()
+        for key in task.context_keys:
+            value = context
+            for part in key.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            values[key] = value
+        return values
+
+    def _checksum(self, path: str) -> str:
+        """Compute a checksum of the versions of a file, or of all files in a
+        directory"""
+        digest = hashlib.sha256()
+        if default_storage.isfile(path):
+            files = [(path, "")]
+        else:
+            files = sorted(
+                (file_path, os.path.relpath(file_path, path))
+                for file_path in default_storage.walk(path)
+            )
+
+        for file_path, name in files:
+            digest.update(name.encode("utf-8"))
+            digest.update(self._version(file_path).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _version(self, path: str) -> str:
+        """Get an identifier of the version of a file, from its etag or from a
+        hash of its content if the storage backend has no etag"""
+        try:
+            return f"etag:{default_storage.etag(path)}"
+        except NotImplementedError:
+            pass
+
+        digest = hashlib.sha256()
+        with default_storage.open_stream(path) as stream:
+            for chunk in iter(lambda: stream.read(default_storage.MAX_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return f"sha256:{digest.hexdigest()}"
+
+    def restore(self, task: Type[Task], fingerprint: str) -> bool:
+        """Copy the cached outputs of a task to the run folder.
+
+        Args:
+            task (Type[Task]): Task to restore the outputs of.
+            fingerprint (str): Fingerprint of the task.
+
+        Returns:
+            bool: True if the outputs were restored, False if not cached.
+        """
+        entry = self._entry(task, fingerprint)
+        manifest_path = self._join(entry, self.MANIFEST_FILE)
+        if not default_storage.exists(manifest_path):
+            return False
+
+        manifest = json.loads(default_storage.open(manifest_path))
+        for path, is_dir in manifest["outputs"].items():
+            logger.debug(f"Restoring output '{path}' of task '{task.__name__}'.")
+            default_storage.cp(
+                self._join(entry, "outputs", path),
+                default_storage.runpath(path),
+                recursive=is_dir,
+                overwrite=True,
+            )
+        return True
+
+    def save(self, task: Type[Task], fingerprint: str) -> None:
+        """Copy the outputs of a task from the run folder to the cache.
+
+        Args:
+            task (Type[Task]): Task that ran.
+            fingerprint (str): Fingerprint of the task, computed before it ran.
+
+        Raises:
+            FileNotFoundError: Raised if an output of the task does not exist.
+        """
+        entry = self._entry(task, fingerprint)
+        outputs = dict()
+        for path in task.outputs:
+            full_path = default_storage.runpath(path)
+            if not default_storage.exists(full_path):
+                raise FileNotFoundError(
+                    f"Output '{path}' of task '{task.__name__}' does not exist."
+                )
+            outputs[path] = default_storage.isdir(full_path)
+            default_storage.cp(
+                full_path,
+                self._join(entry, "outputs", path),
+                recursive=outputs[path],
+                overwrite=True,
+            )
+
+        default_storage.touch(
+            self._join(entry, self.MANIFEST_FILE),
+            io.StringIO(json.dumps({"task": task.__name__, "outputs": outputs})),
+        )
+
+
+def task_cache() -> Optional[TaskCache]:
+    """Get the task cache configured by :setting:`TASK_CACHE_PREFIX`.
+
+    Returns:
+        Optional[TaskCache]: Task cache, or None if task caching is disabled.
+    """
+    prefix = getattr(default_settings, "TASK_CACHE_PREFIX", None)
+    return TaskCache(prefix) if prefix else None
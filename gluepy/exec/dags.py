@@ -1,9 +1,12 @@
-from typing import List
+import logging
+from typing import Dict, List, Type
 
 from gluepy.exec.tasks import Task
 from gluepy.utils.loading import import_string
 from gluepy.conf import default_settings
 
+logger = logging.getLogger(__name__)
+
 
 class DAG:
     """Class that defines a pipeline or a 'directed acyclic graph'.
@@ -42,6 +45,9 @@ class DAG:
         """Inject all tasks including :setting:`START_TASK` to the final
         list of executable tasks of this DAG.
 
+        Tasks are ordered so that each task comes after all of its upstream
+        tasks, see :meth:`inject_graph`.
+
         Args:
             skip_eval (bool): If True, exclude evaluation tasks.
             eval_only (bool): If True, return only the start task and evaluation tasks.
@@ -49,13 +55,105 @@ class DAG:
         Returns:
             List[Task]: Full list of tasks of DAG.
         """
-        start = [import_string(default_settings.START_TASK)]
+        return list(self.inject_graph(skip_eval=skip_eval, eval_only=eval_only))
+
+    def inject_graph(
+        self, skip_eval=False, eval_only=False
+    ) -> Dict[Type[Task], List[Type[Task]]]:
+        """Inject all tasks including :setting:`START_TASK` to the graph of
+        executable tasks of this DAG.
+
+        Upstream tasks of each task are read from its ``depends_on`` attribute,
+        and tasks that do not set ``depends_on`` depend on the task listed
+        before them. The :setting:`START_TASK` is upstream of all other tasks.
+        Dependencies on tasks that are excluded by ``skip_eval`` or
+        ``eval_only`` are left out of the graph. Tasks that are listed more
+        than once are only run once, at their first position.
+
+        Args:
+            skip_eval (bool): If True, exclude evaluation tasks.
+            eval_only (bool): If True, return only the start task and evaluation tasks.
+
+        Raises:
+            ValueError: Raised if a task depends on a task that is not part of
+                the DAG or if the dependencies form a cycle.
+
+        Returns:
+            Dict[Type[Task], List[Type[Task]]]: Upstream tasks of each task,
+              with tasks ordered so that each task comes after its upstream tasks.
+        """
+        start = import_string(default_settings.START_TASK)
+        label = self.label or self.__class__.__name__.lower()
+        listed = [start] + list(self.tasks) + list(self.eval_tasks)
+        if len(set(listed)) != len(listed):
+            logger.warning(
+                f"DAG '{label}' list the same task more than once, "
+                "each task is only run once."
+            )
+        everything = list(dict.fromkeys(listed))
+        by_label = {_task_label(t): t for t in everything}
+
+        work = list(dict.fromkeys([start] + list(self.tasks)))
         if eval_only:
-            return start + list(self.eval_tasks)
-        work = start + list(self.tasks)
-        if skip_eval or not self.eval_tasks:
-            return work
-        return work + list(self.eval_tasks)
+            tasks = list(dict.fromkeys([start] + list(self.eval_tasks)))
+        elif skip_eval:
+            tasks = work
+        else:
+            tasks = everything
+
+        selected = set(tasks)
+        graph = dict()
+        for t in tasks:
+            if t is start:
+                graph[t] = []
+                continue
+
+            if t.depends_on is None:
+                # Tasks depend on the task listed before them in the full
+                # list of tasks, which may not be selected.
+                pos = everything.index(t)
+                upstream = [everything[pos - 1]]
+            else:
+                upstream = []
+                for dependency in t.depends_on:
+                    if isinstance(dependency, str):
+                        dependency = by_label.get(dependency, dependency)
+                    if dependency not in by_label.values():
+                        raise ValueError(
+                            f"Task '{_task_label(t)}' depends on '{dependency}' "
+                            f"which is not part of DAG '{label}'."
+                        )
+                    upstream.append(dependency)
+
+            graph[t] = [start] + [
+                u for u in dict.fromkeys(upstream) if u in selected and u is not start
+            ]
+
+        return _topological_sort(graph)
+
+
+def _task_label(task: Type[Task]) -> str:
+    """Get the label of a task class"""
+    return task.label or task.__name__.lower()
+
+
+def _topological_sort(
+    graph: Dict[Type[Task], List[Type[Task]]],
+) -> Dict[Type[Task], List[Type[Task]]]:
+    """Order a graph of tasks so that each task comes after its upstream tasks,
+    keeping the order of the graph where possible"""
+    ordered = dict()
+    remaining = dict(graph)
+    while remaining:
+        for t, upstream in remaining.items():
+            if all(u in ordered for u in upstream):
+                ordered[t] = upstream
+                del remaining[t]
+                break
+        else:
+            labels = ", ".join(f"'{_task_label(t)}'" for t in remaining)
+            raise ValueError(f"Dependencies of tasks {labels} form a cycle.")
+    return ordered
 
 
 REGISTRY = {}
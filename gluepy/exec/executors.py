@@ -0,0 +1,153 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable, Dict, List, Optional, Type
+from gluepy.conf import default_settings
+from gluepy.exec.tasks import Task
+
+logger = logging.getLogger(__name__)
+
+
+class BaseExecutor:
+    """Base class of a DAG executor, that run the tasks of a graph in an
+    order that respect the dependencies between them.
+
+    Args:
+        max_workers (Optional[int]): Maximum number of tasks to run at the
+            same time. Defaults to :setting:`DAG_MAX_WORKERS`, or the number
+            of CPU cores if not set.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = (
+            max_workers
+            or getattr(default_settings, "DAG_MAX_WORKERS", None)
+            or os.cpu_count()
+        )
+
+    def run(
+        self,
+        graph: Dict[Type[Task], List[Type[Task]]],
+        run_task: Callable[[Type[Task]], None],
+    ) -> None:
+        """Run all tasks of a graph.
+
+        Args:
+            graph (Dict[Type[Task], List[Type[Task]]]): Upstream tasks of each
+                task, as returned by :meth:`DAG.inject_graph`.
+            run_task (Callable[[Type[Task]], None]): Function that run a task.
+
+        Raises:
+            Exception: Raised by the first task that failed, after which no
+                further tasks are started.
+        """
+        raise NotImplementedError()
+
+
+class SequentialExecutor(BaseExecutor):
+    """Executor that run one task at a time in the order of the graph"""
+
+    def run(
+        self,
+        graph: Dict[Type[Task], List[Type[Task]]],
+        run_task: Callable[[Type[Task]], None],
+    ) -> None:
+        for task in graph:
+            run_task(task)
+
+
+class PoolExecutor(BaseExecutor):
+    """Base class of executors that run tasks concurrently on a pool of workers.
+
+    Each task is started as soon as all of its upstream tasks completed, so
+    the total run time is bound by the longest chain of dependent tasks. When
+    a task fails, no further tasks are started, tasks that are already running
+    are waited for, and the error of the failed task is raised.
+    """
+
+    def _pool(self) -> Executor:
+        """Create the pool of workers to run tasks on"""
+        raise NotImplementedError()
+
+    def run(
+        self,
+        graph: Dict[Type[Task], List[Type[Task]]],
+        run_task: Callable[[Type[Task]], None],
+    ) -> None:
+        remaining = {task: set(upstream) for task, upstream in graph.items()}
+        running: Dict[Future, Type[Task]] = dict()
+        error: Optional[BaseException] = None
+        with self._pool() as pool:
+            while remaining or running:
+                for task in [t for t, upstream in remaining.items() if not upstream]:
+                    del remaining[task]
+                    running[pool.submit(run_task, task)] = task
+
+                if not running:
+                    raise ValueError("Tasks of graph depend on tasks that never run.")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    if future.exception() is not None:
+                        logger.error(f"Task '{task.__name__}' failed.")
+                        error = error or future.exception()
+                        continue
+                    for upstream in remaining.values():
+                        upstream.discard(task)
+
+                if error is not None:
+                    # Stop starting tasks, and wait for running tasks to end.
+                    remaining.clear()
+
+        if error is not None:
+            raise error
+
+
+class ThreadExecutor(PoolExecutor):
+    """Executor that run tasks concurrently on a pool of threads.
+
+    Threads share the context, settings and in-memory caches of the process,
+    and suit tasks that spend their time on I/O or in libraries that release
+    the GIL, such as pyarrow, polars or DuckDB.
+    """
+
+    def _pool(self) -> Executor:
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="gluepy-task"
+        )
+
+
+class ProcessExecutor(PoolExecutor):
+    """Executor that run tasks concurrently on a pool of processes.
+
+    Worker processes are forked from the current process, so they inherit the
+    loaded settings and context of the run. Tasks must be defined at module
+    level so that they can be sent to the workers, and any state a task keeps
+    in memory, such as logged metrics, stays in its worker process.
+
+    Raises:
+        ValueError: Raised if processes cannot be forked on this platform.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        super().__init__(max_workers)
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise ValueError(
+                f"'{self.__class__.__name__}' require processes to be forked, "
+                "which is not supported on this platform."
+            )
+
+    def _pool(self) -> Executor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+        )
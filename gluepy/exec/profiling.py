@@ -0,0 +1,226 @@
+import io
+import os
+import json
+import time
+import marshal
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Type
+from gluepy.exec.tasks import Task
+from gluepy.files.storages import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Folder in the run folder that hold the profiles of tasks.
+PROFILE_FOLDER = "profile"
+
+# Held while a profiler that measure the whole process is active, so that
+# tasks running concurrently on threads are profiled one at a time.
+_exclusive_lock = threading.Lock()
+
+
+class BaseProfiler:
+    """Base class of a profiler that measure each task of a DAG, and write
+    the results to the ``profile`` folder of the run folder.
+
+    The wall time and CPU time of the process are measured for every task,
+    and written to ``profile/<task label>.json`` together with any measures
+    of the profiler. :meth:`write_summary` collect the measures of all
+    profiled tasks of the run into ``profile/summary.txt``.
+    """
+
+    mode: str = ""
+    # Profilers that measure the whole process hold a lock while a task run.
+    exclusive: bool = False
+    # Number of entries to keep in reports of functions or allocation sites.
+    top_n: int = 20
+
+    def _start(self) -> None:
+        """Start measuring the task that is about to run"""
+
+    def _stop(self, label: str) -> Dict[str, Any]:
+        """Stop measuring the task that ran, and write any reports of it.
+
+        Args:
+            label (str): Label of the task.
+
+        Returns:
+            Dict[str, Any]: Measures to add to the summary of the task.
+        """
+        return dict()
+
+    def _path(self, name: str) -> str:
+        """Get the path of a file in the profile folder of the run"""
+        return default_storage.runpath(os.path.join(PROFILE_FOLDER, name))
+
+    @contextmanager
+    def profile(self, task: Type[Task]) -> Iterator[None]:
+        """Profile the code run within the context as a task.
+
+        Args:
+            task (Type[Task]): Task that is run within the context.
+        """
+        label = task.label or task.__name__.lower()
+        with _exclusive_lock if self.exclusive else nullcontext():
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            self._start()
+            try:
+                yield
+            finally:
+                summary = {
+                    "task": task.__name__,
+                    "mode": self.mode,
+                    "wall_seconds": time.perf_counter() - wall_start,
+                    "cpu_seconds": time.process_time() - cpu_start,
+                    **self._stop(label),
+                }
+                default_storage.touch(
+                    self._path(f"{label}.json"),
+                    io.StringIO(json.dumps(summary, indent=2)),
+                )
+                logger.debug(f"Wrote profile of task '{task.__name__}'.")
+
+    def write_summary(self) -> str:
+        """Write a table of the measures of all profiled tasks of the run,
+        slowest tasks first, to ``profile/summary.txt``.
+
+        The table is built from the files of the profile folder, so that it
+        include tasks that ran in other processes.
+
+        Returns:
+            str: The summary table.
+        """
+        try:
+            files, _ = default_storage.ls(default_storage.runpath(PROFILE_FOLDER))
+        except FileNotFoundError:
+            files = []
+
+        # Backends list either names or paths, so only the name is relied on.
+        rows: List[Dict[str, Any]] = [
+            json.loads(default_storage.open(self._path(os.path.basename(path))))
+            for path in files
+            if path.endswith(".json")
+        ]
+        rows.sort(key=lambda row: row["wall_seconds"], reverse=True)
+        lines = [
+            f"{'Task':<40} {'Wall (s)':>12} {'CPU (s)':>12} {'Peak memory (MiB)':>18}"
+        ]
+        for row in rows:
+            peak = row.get("peak_bytes")
+            peak = f"{peak / 1024**2:.1f}" if peak is not None else "-"
+            lines.append(
+                f"{row['task']:<40} {row['wall_seconds']:>12.3f} "
+                f"{row['cpu_seconds']:>12.3f} {peak:>18}"
+            )
+        table = "\n".join(lines) + "\n"
+        default_storage.touch(self._path("summary.txt"), io.StringIO(table))
+        logger.info(f"Profile of tasks ({self.mode}):\n{table}")
+        return table
+
+
+class WallProfiler(BaseProfiler):
+    """Profiler that only measure the wall time and CPU time of tasks"""
+
+    mode = "wall"
+
+
+class CpuProfiler(BaseProfiler):
+    """Profiler that record the time spent in each function with ``cProfile``.
+
+    The statistics of each task are written to ``profile/<task label>.prof``,
+    which can be loaded with ``pstats`` or tools such as ``snakeviz``, and the
+    functions with the highest cumulative time to ``profile/<task label>.txt``.
+    """
+
+    mode = "cpu"
+    exclusive = True
+
+    def _start(self) -> None:
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def _stop(self, label: str) -> Dict[str, Any]:
+        self._profiler.disable()
+        report = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        default_storage.touch(
+            self._path(f"{label}.prof"), io.BytesIO(marshal.dumps(stats.stats))
+        )
+        report.seek(0, os.SEEK_SET)
+        default_storage.touch(self._path(f"{label}.txt"), report)
+        return {"calls": stats.total_calls}
+
+
+class MemoryProfiler(BaseProfiler):
+    """Profiler that trace memory allocations with ``tracemalloc``.
+
+    The peak memory allocated while the task ran is added to the summary, and
+    the source lines that hold the most memory at the end of the task are
+    written to ``profile/<task label>.txt``. Tracing memory allocations slow
+    down the code that is traced.
+    """
+
+    mode = "memory"
+    exclusive = True
+
+    def _start(self) -> None:
+        self._tracing = tracemalloc.is_tracing()
+        if not self._tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    def _stop(self, label: str) -> Dict[str, Any]:
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        if not self._tracing:
+            tracemalloc.stop()
+
+        top = snapshot.statistics("lineno")[: self.top_n]
+        default_storage.touch(
+            self._path(f"{label}.txt"),
+            io.StringIO("\n".join(str(stat) for stat in top) + "\n"),
+        )
+        return {
+            "peak_bytes": peak,
+            "top_allocations": [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "bytes": stat.size,
+                    "count": stat.count,
+                }
+                for stat in top
+            ],
+        }
+
+
+PROFILERS: Dict[str, Type[BaseProfiler]] = {
+    profiler.mode: profiler for profiler in (CpuProfiler, MemoryProfiler, WallProfiler)
+}
+
+
+def get_profiler(mode: str) -> BaseProfiler:
+    """Get a profiler by its mode.
+
+    Args:
+        mode (str): One of ``"cpu"``, ``"memory"`` or ``"wall"``.
+
+    Raises:
+        ValueError: Raised if the mode is not supported.
+
+    Returns:
+        BaseProfiler: Profiler of the mode.
+    """
+    if mode not in PROFILERS:
+        raise ValueError(
+            f"Profile mode '{mode}' is not supported, use one of "
+            f"{', '.join(sorted(PROFILERS))}."
+        )
+    return PROFILERS[mode]()
@@ -14,10 +14,29 @@ class Task:
 
     Attributes:
         label (str): Name of the task used when calling the task.
+        depends_on (Optional[list]): Tasks, or labels of tasks, of the
+            :ref:`dags` that must complete before this task can run. Defaults
+            to None, which makes the task depend on the task listed before it.
+            The :setting:`START_TASK` always runs before all other tasks.
+        cache (bool): If the outputs of the task are cached and restored
+            instead of running the task when its code, context and inputs did
+            not change. Requires :setting:`TASK_CACHE_PREFIX` to be set.
+        inputs (list): Paths of files or directories relative to the run
+            folder that the task read.
+        outputs (list): Paths of files or directories relative to the run
+            folder that the task write, which are cached.
+        context_keys (Optional[list]): Dotted keys of the context that the
+            task read, e.g. ``"training.epochs"``. Defaults to None, which
+            use the entire context except the ``gluepy`` run meta data.
 
     """
 
     label = None
+    depends_on = None
+    cache = False
+    inputs = []
+    outputs = []
+    context_keys = None
 
     def __init__(self) -> None:
         self.label == self.label or self.__class__.__name__.lower()
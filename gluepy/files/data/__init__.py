@@ -3,6 +3,7 @@ from gluepy.conf import default_settings
 from gluepy.utils.loading import LazyProxy, import_string
 from .base import BaseDataManager
 from .pandas import PandasDataManager
+from .pyarrow import PyArrowDataManager
 
 
 data_manager: BaseDataManager = LazyProxy(
@@ -1,4 +1,5 @@
-from typing import Any
+from typing import Any, Iterator, List, Optional
+from gluepy.utils import tracing
 
 
 class BaseDataManager:
@@ -6,6 +7,19 @@ class BaseDataManager:
     that define interface.
     """
 
+    # Methods recorded as spans in the trace of a run.
+    TRACED_METHODS = {
+        "read": None,
+        "read_dataset": None,
+        "read_sql": None,
+        "write": None,
+        "write_dataset": None,
+    }
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        tracing.trace_methods(cls, "data", cls.TRACED_METHODS)
+
     def read(self, path: str, root: bool = False, *args, **kwargs) -> Any:
         """Read dataframe from a file.
 
@@ -20,6 +34,45 @@ class BaseDataManager:
         """
         raise NotImplementedError()
 
+    def read_iter(
+        self, path: str, root: bool = False, chunksize: int = 100_000, *args, **kwargs
+    ) -> Iterator[Any]:
+        """Read a file in chunks, without loading the entire file into memory.
+
+        Args:
+            path (str): Path to file located on :setting:`STORAGE_BACKEND`.
+            root (bool, optional): Is path relative to root or run folder.
+                Defaults to False.
+            chunksize (int, optional): Number of rows of each chunk.
+                Defaults to 100_000.
+
+        Yields:
+            Any: Chunks of the file depending on implementation.
+        """
+        raise NotImplementedError()
+
+    def read_dataset(
+        self,
+        path: str,
+        root: bool = False,
+        filters: Optional[List[tuple]] = None,
+        *args,
+        **kwargs,
+    ) -> Any:
+        """Read dataframe from a dataset directory partitioned by column values.
+
+        Args:
+            path (str): Path to dataset directory located on :setting:`STORAGE_BACKEND`.
+            root (bool, optional): Is path relative to root or run folder.
+                Defaults to False.
+            filters (Optional[List[tuple]], optional): Filters on rows to read,
+                used to skip partitions that do not match. Defaults to None.
+
+        Returns:
+            Any: Dataframe depending on implementation.
+        """
+        raise NotImplementedError()
+
     def read_sql(self, sql: str, *args, **kwargs) -> Any:
         """Read dataframe from SQL query
 
@@ -31,6 +84,18 @@ class BaseDataManager:
         """
         raise NotImplementedError()
 
+    def read_sql_iter(self, sql: str, *args, **kwargs) -> Iterator[Any]:
+        """Read the result of a SQL query in batches, without loading the
+        entire result into memory.
+
+        Args:
+            sql (str): SQL query to execute.
+
+        Yields:
+            Any: Batches of the result depending on implementation.
+        """
+        raise NotImplementedError()
+
     def write(self, path: str, df: Any, root: bool = False, *args, **kwargs) -> None:
         """Write dataframe to file.
 
@@ -42,3 +107,24 @@ class BaseDataManager:
 
         """
         raise NotImplementedError()
+
+    def write_dataset(
+        self,
+        path: str,
+        df: Any,
+        partition_cols: List[str],
+        root: bool = False,
+        *args,
+        **kwargs,
+    ) -> None:
+        """Write dataframe to a dataset directory partitioned by column values.
+
+        Args:
+            path (str): Path to dataset directory.
+            df (Any): Dataframe to be written
+            partition_cols (List[str]): Columns to partition the dataset by.
+            root (bool, optional): If path relative to root or run folder.
+                Defaults to False.
+
+        """
+        raise NotImplementedError()
@@ -0,0 +1,167 @@
+import collections
+import logging
+import threading
+from typing import Deque, Iterable, Iterator, Optional
+import pyarrow as pa
+from gluepy.conf import default_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _BatchBuffer:
+    """Buffer of record batches shared by a producer thread and a consumer,
+    that block the producer while the batches in flight exceed a byte budget.
+
+    Batches are in flight from when they are added to the buffer until the
+    consumer asks for the next batch. At least one batch is always allowed in
+    flight, so that batches larger than the budget do not block forever.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.done = False
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self._batches: Deque[pa.RecordBatch] = collections.deque()
+        self._condition = threading.Condition()
+
+    def put(self, batch: pa.RecordBatch) -> bool:
+        """Add a batch, blocking until it fits within the byte budget.
+
+        Returns:
+            bool: False if the consumer stopped reading and the batch was dropped.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed
+                or self.nbytes == 0
+                or self.nbytes + batch.nbytes <= self.max_bytes
+            )
+            if self.closed:
+                return False
+            self._batches.append(batch)
+            self.nbytes += batch.nbytes
+            self._condition.notify_all()
+            return True
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark that no more batches will be added"""
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    def release(self, nbytes: int) -> None:
+        """Release the budget of batches the consumer is done with"""
+        with self._condition:
+            self.nbytes -= nbytes
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Stop the producer, dropping any buffered batches"""
+        with self._condition:
+            self.closed = True
+            self._batches.clear()
+            self._condition.notify_all()
+
+    def get(self) -> Optional[pa.RecordBatch]:
+        """Get the next batch, blocking until one is available.
+
+        Raises:
+            BaseException: Raised if the producer failed.
+
+        Returns:
+            Optional[pa.RecordBatch]: Next batch, or None if all were consumed.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._batches or self.done)
+            if self._batches:
+                return self._batches.popleft()
+            if self.error is not None:
+                raise self.error
+            return None
+
+
+def prefetch_batches(
+    batches: Iterable[pa.RecordBatch], max_bytes: int
+) -> Iterator[pa.RecordBatch]:
+    """Fetch record batches in a background thread ahead of the consumer,
+    keeping at most ``max_bytes`` of batches in flight.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): Batches to fetch.
+        max_bytes (int): Maximum size in bytes of batches that are fetched
+            but not yet consumed.
+
+    Yields:
+        pa.RecordBatch: Batches in the order they were fetched.
+    """
+    buffer = _BatchBuffer(max_bytes)
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if not buffer.put(batch):
+                    break
+        except BaseException as e:
+            buffer.finish(e)
+        else:
+            buffer.finish()
+
+    thread = threading.Thread(target=produce, name="gluepy-prefetch", daemon=True)
+    thread.start()
+    held = 0
+    try:
+        while True:
+            buffer.release(held)
+            batch = buffer.get()
+            if batch is None:
+                return
+            held = batch.nbytes
+            yield batch
+    finally:
+        buffer.close()
+
+
+def read_sql_iter(sql: str, *args, **kwargs) -> Iterator[pa.RecordBatch]:
+    """Execute a SQL query on BigQuery and stream its result as record batches.
+
+    The result is downloaded with the BigQuery Storage Read API in a
+    background thread, which pauses while the batches downloaded but not yet
+    consumed exceed ``DATA_SQL_MAX_BYTES_IN_FLIGHT`` bytes.
+
+    The client library reads each stream of the result in a worker thread,
+    and its queue of downloaded pages is limited to a single page, so that
+    at most one page per stream is held in addition to the budget. The
+    number of streams can be limited with ``DATA_SQL_MAX_STREAMS``.
+
+    Args:
+        sql (str): SQL query to execute.
+
+    Yields:
+        pa.RecordBatch: Batches of rows of the result.
+    """
+    try:
+        from google.cloud import bigquery, bigquery_storage
+    except ImportError:
+        logger.error(
+            "Dependencies 'google-cloud-bigquery' and "
+            "'google-cloud-bigquery-storage' must be installed to stream SQL results"
+        )
+        raise
+
+    client = bigquery.Client(project=default_settings.GCP_PROJECT_ID)
+    rows = client.query(sql, *args, **kwargs).result()
+    # Without a max_queue_size, the library queue grow with the number of
+    # streams, and pages buffered there are not counted by the budget.
+    iter_kwargs = {"max_queue_size": 1}
+    max_streams = getattr(default_settings, "DATA_SQL_MAX_STREAMS", None)
+    if max_streams:
+        iter_kwargs["max_stream_count"] = max_streams
+    batches = rows.to_arrow_iterable(
+        bqstorage_client=bigquery_storage.BigQueryReadClient(), **iter_kwargs
+    )
+    max_bytes = getattr(default_settings, "DATA_SQL_MAX_BYTES_IN_FLIGHT", 256 * 1024**2)
+    logger.info("Streaming SQL query result from BigQuery.")
+    yield from prefetch_batches(batches, max_bytes)
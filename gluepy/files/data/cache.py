@@ -0,0 +1,342 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import pandas as pd
+from gluepy.conf import default_settings
+from gluepy.files.storages import default_storage
+from gluepy.files.storages.base import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+# Locks of the index of each SQL result cache prefix, shared by all instances
+# of the cache in the process.
+_INDEX_LOCKS: Dict[str, threading.Lock] = dict()
+_INDEX_LOCKS_LOCK = threading.Lock()
+
+
+def _index_lock(prefix: str) -> threading.Lock:
+    """Get the lock of the index of a SQL result cache prefix"""
+    with _INDEX_LOCKS_LOCK:
+        return _INDEX_LOCKS.setdefault(prefix, threading.Lock())
+
+
+# String literals and quoted identifiers are kept as is, whitespace elsewhere
+# in the query is insignificant except for line breaks that end comments.
+_SQL_TOKENS = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|\s+""")
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize a SQL query so that formatting does not change its cache key.
+
+    Runs of whitespace outside of quoted strings are collapsed into a single
+    line break if they contain one, or else a single space, and leading and
+    trailing whitespace and semicolons are removed. Line breaks are kept so
+    that the end of ``--`` and ``#`` comments is preserved, and queries that
+    only differ in what is commented out never get the same key.
+
+    Args:
+        sql (str): SQL query to normalize.
+
+    Returns:
+        str: Normalized SQL query.
+    """
+    sql = _SQL_TOKENS.sub(
+        lambda match: match.group(1) or ("\n" if "\n" in match.group(0) else " "),
+        sql,
+    )
+    return sql.strip().rstrip(";").strip()
+
+
+class SqlResultCache:
+    """Cache of SQL query results stored as parquet files on a storage backend.
+
+    Results are keyed on the normalized SQL query and the parameters of the
+    query, and stored under ``prefix`` together with an ``index.json`` file
+    that track when each result was stored and its size. Results older than
+    ``ttl`` are never served, and the oldest results are evicted when the
+    total size of the cache exceeds ``max_bytes``.
+
+    The index is rewritten by each process that store a result, so processes
+    storing results at the same time may drop each others index entries.
+    Dropped entries are cache misses, a stale result is never served.
+
+    Configured with the following settings:
+
+    * ``DATA_SQL_CACHE_PREFIX`` path on the storage backend to store results under.
+    * ``DATA_SQL_CACHE_TTL`` number of seconds a result is valid for.
+    * ``DATA_SQL_CACHE_MAX_BYTES`` maximum size in bytes of all stored results.
+
+    Args:
+        prefix (str): Path relative to storage root to store results under.
+        ttl (Optional[float]): Number of seconds a result is valid for.
+        max_bytes (Optional[int]): Maximum size in bytes of all results.
+        storage (Optional[BaseStorage]): Storage backend to store results on.
+            Defaults to ``default_storage``.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        prefix: str,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        storage: Optional[BaseStorage] = None,
+    ) -> None:
+        self.storage = storage if storage is not None else default_storage
+        self.prefix = prefix.rstrip(self.storage.separator)
+        self.ttl = (
+            ttl
+            if ttl is not None
+            else getattr(default_settings, "DATA_SQL_CACHE_TTL", 24 * 3600)
+        )
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else getattr(default_settings, "DATA_SQL_CACHE_MAX_BYTES", 10 * 1024**3)
+        )
+        self._lock = _index_lock(self.storage.abspath(self.prefix))
+
+    @staticmethod
+    def key(sql: str, *args, **kwargs) -> str:
+        """Get the cache key of a SQL query.
+
+        Args:
+            sql (str): SQL query.
+            *args: Positional parameters of the query.
+            **kwargs: Keyword parameters of the query.
+
+        Returns:
+            str: Hex digest identifying the query and its parameters.
+        """
+        payload = json.dumps(
+            [normalize_sql(sql), args, kwargs], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, name: str) -> str:
+        """Get the storage path of a file in the cache"""
+        return f"{self.prefix}{self.storage.separator}{name}"
+
+    def _read_index(self) -> Dict[str, dict]:
+        """Read the index of stored results"""
+        try:
+            return json.loads(self.storage.open(self._path(self.INDEX_FILE)))
+        except FileNotFoundError:
+            return dict()
+
+    def _write_index(self, index: Dict[str, dict]) -> None:
+        """Write the index of stored results"""
+        self.storage.touch(
+            self._path(self.INDEX_FILE), io.StringIO(json.dumps(index, indent=2))
+        )
+
+    def _delete(self, key: str) -> None:
+        """Delete the stored result of a key, if any"""
+        try:
+            self.storage.rm(self._path(f"{key}.parquet"))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Get a stored result.
+
+        Args:
+            key (str): Cache key of the query, see :meth:`key`.
+
+        Returns:
+            Optional[pd.DataFrame]: Stored result, or None if missing or expired.
+        """
+        entry = self._read_index().get(key)
+        if entry is None or entry["created"] + self.ttl < time.time():
+            return None
+
+        try:
+            content = self.storage.open(self._path(f"{key}.parquet"))
+        except FileNotFoundError:
+            return None
+        logger.info(f"Reading SQL query result '{key}' from cache.")
+        return pd.read_parquet(io.BytesIO(content))
+
+    def set(self, key: str, df: pd.DataFrame) -> None:
+        """Store a result, evicting expired and least recently stored results.
+
+        Args:
+            key (str): Cache key of the query, see :meth:`key`.
+            df (pd.DataFrame): Result of the query.
+        """
+        stream = io.BytesIO()
+        df.to_parquet(stream)
+        nbytes = stream.tell()
+        if nbytes > self.max_bytes:
+            logger.debug(f"SQL query result '{key}' is too large to cache.")
+            return
+
+        stream.seek(0, os.SEEK_SET)
+        self.storage.touch(self._path(f"{key}.parquet"), stream)
+
+        with self._lock:
+            index = self._read_index()
+            index[key] = {"created": time.time(), "bytes": nbytes}
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index: Dict[str, dict]) -> None:
+        """Drop expired results and the oldest results above the size limit
+        from index, and delete their files"""
+        now = time.time()
+        total = 0
+        for key, entry in sorted(
+            index.items(), key=lambda item: item[1]["created"], reverse=True
+        ):
+            expired = entry["created"] + self.ttl < now
+            if expired or total + entry["bytes"] > self.max_bytes:
+                logger.debug(f"Evicting SQL query result '{key}' from cache.")
+                del index[key]
+                self._delete(key)
+            else:
+                total += entry["bytes"]
+
+
+class DataFrameCache:
+    """In-memory cache of dataframes, bounded by their total size in bytes
+    and evicting the least recently used dataframes first.
+
+    Dataframes are stored and returned as copies, so that changes made by the
+    caller to a dataframe are never seen by later reads of the cache. Under
+    pandas copy on write these copies are shallow and cost nothing.
+
+    Each dataframe can be cached with the version of the file it was read
+    from, such as its etag, and is only returned for lookups of the same
+    version, so that files changed outside of the cache are read again.
+
+    Args:
+        max_bytes (int): Maximum total size in bytes of cached dataframes.
+
+    Attributes:
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups not found in the cache.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: (
+            "OrderedDict[Hashable, Tuple[pd.DataFrame, int, Optional[str]]]"
+        ) = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        """Number of cache ``hits`` and ``misses``, and size of the cache"""
+        return {"hits": self.hits, "misses": self.misses, "bytes": self.nbytes}
+
+    @staticmethod
+    def _copy(df: pd.DataFrame) -> pd.DataFrame:
+        """Copy a dataframe so that changes to the copy and the original are
+        not seen by each other"""
+        copy_on_write = int(pd.__version__.split(".")[0]) >= 3 or (
+            pd.options.mode.copy_on_write is True
+        )
+        return df.copy(deep=not copy_on_write)
+
+    def get(
+        self, key: Hashable, version: Optional[str] = None
+    ) -> Optional[pd.DataFrame]:
+        """Get a cached dataframe, marking it as most recently used.
+
+        Args:
+            key (Hashable): Key of the dataframe.
+            version (Optional[str], optional): Current version of the file of
+                the dataframe. Dataframes cached with another version are
+                dropped. Defaults to None.
+
+        Returns:
+            Optional[pd.DataFrame]: Copy of the cached dataframe, or None if
+              missing or of another version.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] != version:
+                logger.debug(f"Dropping outdated dataframe '{key}' from cache.")
+                del self._entries[key]
+                self.nbytes -= entry[1]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._copy(entry[0])
+
+    def set(
+        self, key: Hashable, df: pd.DataFrame, version: Optional[str] = None
+    ) -> None:
+        """Cache a dataframe, evicting the least recently used dataframes
+        until the cache is within its size limit.
+
+        Args:
+            key (Hashable): Key of the dataframe.
+            df (pd.DataFrame): Dataframe to cache.
+            version (Optional[str], optional): Version of the file the
+                dataframe was read from or written to. Defaults to None.
+        """
+        nbytes = int(df.memory_usage(deep=True).sum())
+        self.invalidate(key)
+        if nbytes > self.max_bytes:
+            return
+
+        df = self._copy(df)
+        with self._lock:
+            self._entries[key] = (df, nbytes, version)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached dataframe, if any.
+
+        Args:
+            key (Hashable): Key of the dataframe.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.nbytes -= entry[1]
+
+    def invalidate_prefix(
+        self, key: Tuple[Hashable, ...], separator: str = "/"
+    ) -> None:
+        """Drop the cached dataframes of a path and of all paths under it,
+        given keys that are tuples ending with a path.
+
+        Args:
+            key (Tuple[Hashable, ...]): Key of the directory or file.
+            separator (str): Separator of the paths in keys.
+        """
+        *parts, path = key
+        prefix = path.rstrip(separator) + separator
+        with self._lock:
+            for other in list(self._entries):
+                if (
+                    isinstance(other, tuple)
+                    and list(other[:-1]) == parts
+                    and (other[-1] == path or str(other[-1]).startswith(prefix))
+                ):
+                    self.nbytes -= self._entries.pop(other)[1]
+
+    def clear(self) -> None:
+        """Drop all cached dataframes"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
@@ -0,0 +1,126 @@
+import os
+import logging
+from typing import Any, Dict, Iterator, Optional, Sequence, Union
+import pyarrow as pa
+from gluepy.conf import default_settings
+from gluepy.exceptions import BootstrapError
+
+try:
+    import duckdb
+except ImportError as e:
+    raise BootstrapError("Could not load DuckDB. %s" % e)
+from gluepy.files.storages import default_storage
+from gluepy.files.storages.arrow import DATASET_FORMATS, arrow_dataset
+
+logger = logging.getLogger(__name__)
+
+
+def read_sql(
+    sql: str,
+    tables: Optional[Dict[str, str]] = None,
+    parameters: Optional[Union[Sequence[Any], Dict[str, Any]]] = None,
+    root: bool = False,
+) -> pa.Table:
+    """Run a SQL query with an embedded DuckDB database over files in storage.
+
+    Each of ``tables`` is registered as a view over the file or hive
+    partitioned directory at its path, which DuckDB scans in parallel while
+    pushing down column projections and filters. Files on local disk are
+    scanned with the native readers of DuckDB, and files on remote storage
+    backends through a pyarrow dataset. Use ``DATA_SQL_THREADS`` to limit
+    the number of threads DuckDB use.
+
+    Args:
+        sql (str): SQL query to execute.
+        tables (Optional[Dict[str, str]], optional): Mapping of table names
+            used in the query to paths of files or dataset directories on
+            ``default_storage``. Defaults to None.
+        parameters (Optional[Union[Sequence[Any], Dict[str, Any]]], optional):
+            Parameters of prepared statement placeholders in the query.
+            Defaults to None.
+        root (bool, optional): If paths are relative to root or run folder.
+            Defaults to False.
+
+    Returns:
+        pa.Table: Result of the query.
+    """
+    with _connect(tables, root) as connection:
+        logger.info("Executing SQL query with DuckDB.")
+        return connection.execute(sql, parameters).fetch_arrow_table()
+
+
+def read_sql_iter(
+    sql: str,
+    tables: Optional[Dict[str, str]] = None,
+    parameters: Optional[Union[Sequence[Any], Dict[str, Any]]] = None,
+    root: bool = False,
+    batch_size: int = 1_000_000,
+) -> Iterator[pa.RecordBatch]:
+    """Run a SQL query with an embedded DuckDB database over files in storage,
+    and stream its result as record batches.
+
+    See :func:`read_sql` for details on how ``tables`` are registered.
+
+    Args:
+        sql (str): SQL query to execute.
+        tables (Optional[Dict[str, str]], optional): Mapping of table names
+            used in the query to paths of files or dataset directories on
+            ``default_storage``. Defaults to None.
+        parameters (Optional[Union[Sequence[Any], Dict[str, Any]]], optional):
+            Parameters of prepared statement placeholders in the query.
+            Defaults to None.
+        root (bool, optional): If paths are relative to root or run folder.
+            Defaults to False.
+        batch_size (int, optional): Number of rows of each batch.
+            Defaults to 1_000_000.
+
+    Yields:
+        pa.RecordBatch: Batches of rows of the result.
+    """
+    with _connect(tables, root) as connection:
+        logger.info("Streaming SQL query result with DuckDB.")
+        # Batches are computed as they are read, so only one is held in memory.
+        yield from connection.execute(sql, parameters).fetch_record_batch(batch_size)
+
+
+def _connect(
+    tables: Optional[Dict[str, str]], root: bool
+) -> "duckdb.DuckDBPyConnection":
+    """Open an in-memory DuckDB connection with tables registered"""
+    connection = duckdb.connect()
+    threads = getattr(default_settings, "DATA_SQL_THREADS", None)
+    if threads:
+        connection.execute(f"SET threads TO {int(threads)}")
+
+    for name, path in (tables or {}).items():
+        path = path if root is True else default_storage.runpath(path)
+        logger.debug(f"Registering table '{name}' from path '{path}'.")
+        relation = _scan_local(connection, path)
+        if relation is not None:
+            relation.create_view(name)
+        else:
+            connection.register(name, arrow_dataset(path, default_storage))
+    return connection
+
+
+def _scan_local(
+    connection: "duckdb.DuckDBPyConnection", path: str
+) -> Optional["duckdb.DuckDBPyRelation"]:
+    """Scan a file or dataset directory on local disk with the native
+    multithreaded readers of DuckDB, or return None if the storage backend
+    does not keep files on local disk or DuckDB has no reader of the format"""
+    local_path = default_storage.local_path(path)
+    if local_path is None:
+        return None
+
+    _, ext = os.path.splitext(path)
+    fmt = DATASET_FORMATS.get(ext, "parquet" if not ext else None)
+    if fmt == "parquet":
+        if not ext:
+            local_path = os.path.join(local_path, "**", "*.parquet")
+        return connection.read_parquet(local_path, hive_partitioning=True)
+    elif fmt == "csv":
+        return connection.read_csv(local_path)
+    elif fmt == "json":
+        return connection.read_json(local_path, format="newline_delimited")
+    return None
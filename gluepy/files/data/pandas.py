@@ -1,19 +1,43 @@
 import logging
 from io import BytesIO
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from gluepy.files.data import BaseDataManager
-from gluepy.conf import default_settings
+from gluepy.files.data.cache import DataFrameCache, SqlResultCache
+from gluepy.conf import default_context, default_settings
 from gluepy.files.storages import default_storage
+from gluepy.files.storages.arrow import arrow_filesystem
 
 logger = logging.getLogger(__name__)
 
+# Directory name used by hive partitioning for missing partition values.
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
 
 class PandasDataManager(BaseDataManager):
     """Data Manager that implement read and write actions for
     pandas dataframes on the currently set storage backend.
+
+    Set ``DATA_CACHE_MAX_BYTES`` to keep the dataframes read and written
+    during a run in memory, so that reading a file written or read earlier in
+    the same process does not download and parse it again. Cached dataframes
+    are validated against the etag of their file on each read.
+
+    Attributes:
+        cache (Optional[DataFrameCache]): In-memory cache of dataframes by
+            run and path, or None if disabled.
     """
 
+    def __init__(self) -> None:
+        max_bytes = getattr(default_settings, "DATA_CACHE_MAX_BYTES", None)
+        self.cache = DataFrameCache(max_bytes) if max_bytes else None
+
     def read(self, path: str, root: bool = False, *args, **kwargs) -> pd.DataFrame:
         """Read in a pandas dataframe from path.
 
@@ -30,32 +54,147 @@ class PandasDataManager(BaseDataManager):
         """
         _, ext = os.path.splitext(path)
         if ext in {".csv", ".txt"}:
-            return self._read_csv(path, root, *args, **kwargs)
+            reader = self._read_csv
         elif ext in {".pq", ".parquet"}:
-            return self._read_parquet(path, root, *args, **kwargs)
+            reader = self._read_parquet
         elif ext in {
             ".json",
         }:
-            return self._read_json(path, root, *args, **kwargs)
+            reader = self._read_json
         else:
             raise ValueError(
                 f"'{self.__class__.__name__}' does not support "
                 f"reading files of extension '{ext}'"
             )
 
+        # Reads with arguments may select a subset of the file, and are
+        # neither served from nor added to the cache.
+        if self.cache is None or args or kwargs:
+            return reader(path, root, *args, **kwargs)
+
+        key = self._cache_key(path, root)
+        version = self._version(path, root)
+        df = self.cache.get(key, version)
+        if df is not None:
+            logger.info(f"Reading file from path '{path}' from cache.")
+            return df
+
+        df = reader(path, root)
+        self.cache.set(key, df, version)
+        return df
+
+    def read_iter(
+        self, path: str, root: bool = False, chunksize: int = 100_000, *args, **kwargs
+    ) -> Iterator[Union[pd.DataFrame, pa.RecordBatch]]:
+        """Read a file in chunks, streaming it from the storage backend.
+
+        Csv and JSON Lines files are yielded as pandas dataframes, and parquet
+        files are yielded as pyarrow record batches that can be converted using
+        ``batch.to_pandas()``. Only one chunk is held in memory at a time.
+
+        Args:
+            path (str): Path to file to read in.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+            chunksize (int, optional): Number of rows of each chunk.
+                Defaults to 100_000.
+
+        Raises:
+            ValueError: Raised if file extension is not supported.
+
+        Yields:
+            Union[pd.DataFrame, pa.RecordBatch]: Chunks of the file.
+        """
+        _, ext = os.path.splitext(path)
+        if ext not in {".csv", ".txt", ".jsonl", ".pq", ".parquet"}:
+            raise ValueError(
+                f"'{self.__class__.__name__}' does not support "
+                f"iterating files of extension '{ext}'"
+            )
+        return self._read_iter(path, ext, root, chunksize, *args, **kwargs)
+
+    def _read_iter(
+        self, path: str, ext: str, root: bool, chunksize: int, *args, **kwargs
+    ) -> Iterator[Union[pd.DataFrame, pa.RecordBatch]]:
+        """Implementation of reading a file in chunks"""
+        path = path if root is True else default_storage.runpath(path)
+        logger.info(f"Reading file in chunks of {chunksize} rows from path '{path}'.")
+        if ext in {".pq", ".parquet"}:
+            parquet_file = pq.ParquetFile(
+                path, filesystem=arrow_filesystem(default_storage)
+            )
+            yield from parquet_file.iter_batches(chunksize, *args, **kwargs)
+            return
+
+        with default_storage.open_stream(path) as stream:
+            if ext == ".jsonl":
+                reader = pd.read_json(
+                    stream, *args, lines=True, chunksize=chunksize, **kwargs
+                )
+            else:
+                reader = pd.read_csv(stream, *args, chunksize=chunksize, **kwargs)
+            with reader:
+                yield from reader
+
     def read_sql(self, sql: str, *args, **kwargs) -> pd.DataFrame:
-        try:
-            import pandas_gbq
-        except ImportError:
-            logger.error("Dependency 'pandas_gbq' must be installed to read SQL")
-            raise
-        return pandas_gbq.read_gbq(
-            sql,
-            project_id=default_settings.GCP_PROJECT_ID,
-            use_bqstorage_api=True,
-            *args,
-            **kwargs,
-        )
+        """Read in a pandas dataframe from a SQL query.
+
+        Queries run on BigQuery by default. Set ``DATA_SQL_ENGINE`` to
+        ``"duckdb"`` to run them with an embedded DuckDB database over files
+        in the storage backend, passing the files to query as ``tables``.
+
+        Set ``DATA_SQL_CACHE_PREFIX`` to store the results of BigQuery queries
+        on the storage backend, so that repeated queries with the same
+        parameters are read from storage instead of being executed again.
+
+        Args:
+            sql (str): SQL query to execute.
+
+        Returns:
+            pd.DataFrame: Result of the query.
+        """
+        if getattr(default_settings, "DATA_SQL_ENGINE", "bigquery") == "duckdb":
+            from gluepy.files.data import duckdb
+
+            return duckdb.read_sql(sql, *args, **kwargs).to_pandas()
+
+        prefix = getattr(default_settings, "DATA_SQL_CACHE_PREFIX", None)
+        if not prefix:
+            return self._read_gbq(sql, *args, **kwargs)
+
+        cache = SqlResultCache(prefix, storage=default_storage)
+        key = cache.key(sql, *args, **kwargs)
+        df = cache.get(key)
+        if df is None:
+            df = self._read_gbq(sql, *args, **kwargs)
+            cache.set(key, df)
+        return df
+
+    def read_sql_iter(self, sql: str, *args, **kwargs) -> Iterator[pd.DataFrame]:
+        """Read the result of a SQL query as pandas dataframes, one per batch.
+
+        Results of BigQuery queries are streamed with the BigQuery Storage
+        Read API, keeping at most ``DATA_SQL_MAX_BYTES_IN_FLIGHT`` bytes of
+        downloaded batches ahead of the consumer. Results of DuckDB queries
+        are computed batch by batch as they are read.
+
+        Args:
+            sql (str): SQL query to execute.
+
+        Yields:
+            pd.DataFrame: Batches of rows of the result.
+        """
+        if getattr(default_settings, "DATA_SQL_ENGINE", "bigquery") == "duckdb":
+            from gluepy.files.data import duckdb
+
+            batches = duckdb.read_sql_iter(sql, *args, **kwargs)
+        else:
+            from gluepy.files.data import bigquery
+
+            batches = bigquery.read_sql_iter(sql, *args, **kwargs)
+
+        for batch in batches:
+            yield batch.to_pandas()
 
     def write(
         self, path: str, df: pd.DataFrame, root: bool = False, *args, **kwargs
@@ -73,44 +212,182 @@ class PandasDataManager(BaseDataManager):
         """
         _, ext = os.path.splitext(path)
         if ext in {".csv", ".txt"}:
-            self._write_csv(path, df, root, *args, **kwargs)
+            writer = self._write_csv
         elif ext in {".pq", ".parquet"}:
-            self._write_parquet(path, df, root, *args, **kwargs)
+            writer = self._write_parquet
         else:
             raise ValueError(
                 f"'{self.__class__.__name__}' does not support "
                 f"writing files of extension '{ext}'"
             )
 
-    def _read_csv(self, path: str, root: bool = False, *args, **kwargs):
-        """Implementation of reading csv file"""
-        stream = BytesIO(
-            default_storage.open(
-                path if root is True else default_storage.runpath(path)
+        if self.cache is None:
+            writer(path, df, root, *args, **kwargs)
+            return
+
+        key = self._cache_key(path, root)
+        self.cache.invalidate(key)
+        writer(path, df, root, *args, **kwargs)
+        # Only parquet files written with default arguments read back into
+        # the same dataframe, other files are cached when they are read.
+        if writer == self._write_parquet and not args and not kwargs:
+            self.cache.set(key, df, self._version(path, root))
+
+    def read_dataset(
+        self,
+        path: str,
+        root: bool = False,
+        filters: Optional[List[tuple]] = None,
+        *args,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Read in a pandas dataframe from a hive partitioned parquet dataset.
+
+        Partitions are pruned using ``filters`` on the partition columns
+        before any file is read, and row groups of the remaining files are
+        filtered on their statistics.
+
+        Args:
+            path (str): Path to dataset directory.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+            filters (Optional[List[tuple]], optional): Filters in the format
+                accepted by ``pd.read_parquet``, e.g. ``[("region", "=", "eu")]``.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: Loaded pandas dataframe
+        """
+        path = path if root is True else default_storage.runpath(path)
+        logger.info(f"Reading dataset from path '{path}'.")
+        dataset = ds.dataset(
+            path,
+            filesystem=arrow_filesystem(default_storage),
+            format="parquet",
+            partitioning="hive",
+        )
+        table = dataset.to_table(
+            *args,
+            filter=pq.filters_to_expression(filters) if filters else None,
+            **kwargs,
+        )
+        return table.to_pandas()
+
+    def write_dataset(
+        self,
+        path: str,
+        df: pd.DataFrame,
+        partition_cols: List[str],
+        root: bool = False,
+        *args,
+        **kwargs,
+    ) -> None:
+        """Write pandas dataframe to a hive partitioned parquet dataset.
+
+        The dataframe is split into one parquet file per combination of values
+        of ``partition_cols``, stored at ``<path>/<col>=<value>/part-0.parquet``.
+        Partition files are uploaded concurrently using up to
+        ``DATA_MAX_CONCURRENCY`` threads.
+
+        Args:
+            path (str): Path to dataset directory.
+            df (pd.DataFrame): Dataframe to be written.
+            partition_cols (List[str]): Columns to partition the dataset by.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+        """
+        path = path if root is True else default_storage.runpath(path)
+        logger.info(f"Writing dataset partitioned by {partition_cols} to '{path}'.")
+        if self.cache is not None:
+            self.cache.invalidate_prefix(
+                self._cache_key(path, True), default_storage.separator
             )
+
+        def write_partition(item: tuple) -> None:
+            values, partition = item
+            dirs = [
+                f"{col}={self._partition_value(value)}"
+                for col, value in zip(partition_cols, values)
+            ]
+            self._write_parquet(
+                os.path.join(path, *dirs, "part-0.parquet"),
+                partition.drop(columns=partition_cols),
+                True,
+                *args,
+                **kwargs,
+            )
+
+        groups = df.groupby(partition_cols, dropna=False, observed=True, sort=False)
+        with ThreadPoolExecutor(
+            max_workers=getattr(default_settings, "DATA_MAX_CONCURRENCY", 10)
+        ) as executor:
+            # Consume results to raise the first error of any partition.
+            list(executor.map(write_partition, groups))
+
+    @staticmethod
+    def _partition_value(value: Any) -> str:
+        """Format a partition value as a hive directory name"""
+        if pd.isna(value):
+            return HIVE_NULL_PARTITION
+        return quote(str(value), safe="")
+
+    def _cache_key(self, path: str, root: bool) -> Tuple[str, str]:
+        """Get the key of a file in the dataframe cache"""
+        path = path if root is True else default_storage.runpath(path)
+        return (default_context.gluepy.run_id, default_storage.abspath(path))
+
+    def _version(self, path: str, root: bool) -> Optional[str]:
+        """Get the etag of a file to validate its cached dataframe, or None if
+        the storage backend does not support etags"""
+        path = path if root is True else default_storage.runpath(path)
+        try:
+            return default_storage.etag(path)
+        except (NotImplementedError, OSError):
+            return None
+
+    def _read_gbq(self, sql: str, *args, **kwargs) -> pd.DataFrame:
+        """Implementation of executing SQL query on BigQuery"""
+        try:
+            import pandas_gbq
+        except ImportError:
+            logger.error("Dependency 'pandas_gbq' must be installed to read SQL")
+            raise
+        return pandas_gbq.read_gbq(
+            sql,
+            project_id=default_settings.GCP_PROJECT_ID,
+            use_bqstorage_api=True,
+            *args,
+            **kwargs,
         )
+
+    def _read_csv(self, path: str, root: bool = False, *args, **kwargs):
+        """Implementation of reading csv file"""
         logger.info(f"Reading file from path '{path}'.")
-        return pd.read_csv(stream, *args, **kwargs)
+        with default_storage.open_stream(
+            path if root is True else default_storage.runpath(path)
+        ) as stream:
+            return pd.read_csv(stream, *args, **kwargs)
 
     def _read_parquet(self, path: str, root: bool = False, *args, **kwargs):
-        """Implementation of reading parquet file"""
-        stream = BytesIO(
-            default_storage.open(
-                path if root is True else default_storage.runpath(path)
-            )
-        )
+        """Implementation of reading parquet file
+
+        The file is read through a pyarrow file system over the storage
+        backend, so that ``columns`` and ``filters`` only download the
+        column chunks and row groups that are selected.
+        """
         logger.info(f"Reading file from path '{path}'.")
-        return pd.read_parquet(stream, *args, **kwargs)
+        kwargs.setdefault("filesystem", arrow_filesystem(default_storage))
+        return pd.read_parquet(
+            path if root is True else default_storage.runpath(path), *args, **kwargs
+        )
 
     def _read_json(self, path: str, root: bool = False, *args, **kwargs):
         """Implementation of reading json file"""
-        stream = BytesIO(
-            default_storage.open(
-                path if root is True else default_storage.runpath(path)
-            )
-        )
         logger.info(f"Reading file from path '{path}'.")
-        return pd.read_json(stream, *args, **kwargs)
+        with default_storage.open_stream(
+            path if root is True else default_storage.runpath(path)
+        ) as stream:
+            return pd.read_json(stream, *args, **kwargs)
 
     def _write_csv(
         self, path: str, df: pd.DataFrame, root: bool = False, *args, **kwargs
@@ -0,0 +1,141 @@
+import logging
+from io import BytesIO
+import os
+from typing import Union
+from gluepy.exceptions import BootstrapError
+
+try:
+    import polars as pl
+except ImportError as e:
+    raise BootstrapError("Could not load Polars. %s" % e)
+from gluepy.files.data import BaseDataManager
+from gluepy.files.storages import default_storage
+from gluepy.files.storages.arrow import DATASET_FORMATS, arrow_dataset
+
+logger = logging.getLogger(__name__)
+
+
+class PolarsDataManager(BaseDataManager):
+    """Data Manager that implement read and write actions for
+    polars dataframes on the currently set storage backend.
+
+    Use :meth:`scan` to build lazy queries over files, so that only the
+    columns and rows that the query needs are read.
+    """
+
+    def scan(self, path: str, root: bool = False, *args, **kwargs) -> pl.LazyFrame:
+        """Lazily scan a file or a hive partitioned parquet dataset directory.
+
+        Files on local disk are scanned natively by polars. Files on remote
+        storage backends are scanned as pyarrow datasets using ranged reads,
+        which push column projections and filters down to the file reader.
+
+        Args:
+            path (str): Path to file or dataset directory to scan.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+
+        Raises:
+            ValueError: Raised if file extension is not supported.
+
+        Returns:
+            pl.LazyFrame: Lazy frame over the file.
+        """
+        _, ext = os.path.splitext(path)
+        # Paths without extension are directories of a partitioned dataset.
+        fmt = DATASET_FORMATS.get(ext, "parquet" if not ext else None)
+        if fmt is None:
+            raise ValueError(
+                f"'{self.__class__.__name__}' does not support "
+                f"scanning files of extension '{ext}'"
+            )
+
+        path = path if root is True else default_storage.runpath(path)
+        logger.info(f"Scanning file from path '{path}'.")
+        local_path = default_storage.local_path(path)
+        if local_path is not None:
+            scan = {
+                "csv": pl.scan_csv,
+                "parquet": pl.scan_parquet,
+                "ipc": pl.scan_ipc,
+                "json": pl.scan_ndjson,
+            }[fmt]
+            return scan(local_path, *args, **kwargs)
+
+        return pl.scan_pyarrow_dataset(
+            arrow_dataset(path, default_storage), *args, **kwargs
+        )
+
+    def read(self, path: str, root: bool = False, *args, **kwargs) -> pl.DataFrame:
+        """Read in a polars dataframe from path.
+
+        Args:
+            path (str): Path to file to read in.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+
+        Raises:
+            ValueError: Raised if file extension is not supported.
+
+        Returns:
+            pl.DataFrame: Loaded polars dataframe
+        """
+        return self.scan(path, root, *args, **kwargs).collect(engine="streaming")
+
+    def write(
+        self,
+        path: str,
+        df: Union[pl.DataFrame, pl.LazyFrame],
+        root: bool = False,
+        *args,
+        **kwargs,
+    ) -> None:
+        """Write polars dataframe to path on default storage backend.
+
+        Lazy frames are streamed directly into files on local disk, and
+        collected with the streaming engine before upload otherwise.
+
+        Args:
+            path (str): Path to destination of dataframe.
+            df (Union[pl.DataFrame, pl.LazyFrame]): Dataframe to be written.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+
+        Raises:
+            ValueError: Raised if file extension is not supported.
+        """
+        _, ext = os.path.splitext(path)
+        fmt = DATASET_FORMATS.get(ext)
+        if fmt is None:
+            raise ValueError(
+                f"'{self.__class__.__name__}' does not support "
+                f"writing files of extension '{ext}'"
+            )
+
+        if fmt == "ipc":
+            # Pyarrow, used to scan remote files, lack kernels for some of the
+            # newer Arrow types that polars write by default.
+            kwargs.setdefault("compat_level", pl.CompatLevel.oldest())
+
+        path = path if root is True else default_storage.runpath(path)
+        logger.info(f"Writing file to path '{path}'.")
+        local_path = default_storage.local_path(path)
+        if isinstance(df, pl.LazyFrame):
+            if local_path is not None:
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                getattr(df, f"sink_{self._polars_name(fmt)}")(
+                    local_path, *args, **kwargs
+                )
+                return
+            df = df.collect(engine="streaming")
+
+        stream = BytesIO()
+        getattr(df, f"write_{self._polars_name(fmt)}")(stream, *args, **kwargs)
+        stream.seek(0, os.SEEK_SET)
+
+        default_storage.touch(file_path=path, content=stream)
+
+    @staticmethod
+    def _polars_name(fmt: str) -> str:
+        """Get the polars name of a file format, as used in method names"""
+        return "ndjson" if fmt == "json" else fmt
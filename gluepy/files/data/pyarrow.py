@@ -0,0 +1,180 @@
+import logging
+from io import BytesIO
+import os
+from typing import Iterator
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+from gluepy.files.data import BaseDataManager
+from gluepy.conf import default_settings
+from gluepy.files.storages import default_storage
+from gluepy.files.storages.arrow import arrow_filesystem
+
+logger = logging.getLogger(__name__)
+
+
+class PyArrowDataManager(BaseDataManager):
+    """Data Manager that implement read and write actions for
+    pyarrow tables on the currently set storage backend.
+
+    Tables are read and written without any conversion to pandas. Arrow IPC
+    and Feather files stored on local disk are memory mapped, so that reading
+    a table written by a previous task does not copy or deserialize the data.
+    """
+
+    def read(self, path: str, root: bool = False, *args, **kwargs) -> pa.Table:
+        """Read in a pyarrow table from path.
+
+        Args:
+            path (str): Path to file to read in.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+
+        Raises:
+            ValueError: Raised if file extension is not supported.
+
+        Returns:
+            pa.Table: Loaded pyarrow table
+        """
+        _, ext = os.path.splitext(path)
+        if ext in {".csv", ".txt"}:
+            return self._read_csv(path, root, *args, **kwargs)
+        elif ext in {".pq", ".parquet"}:
+            return self._read_parquet(path, root, *args, **kwargs)
+        elif ext in {".arrow", ".feather", ".ipc"}:
+            return self._read_ipc(path, root, *args, **kwargs)
+        elif ext == ".jsonl":
+            return self._read_json(path, root, *args, **kwargs)
+        else:
+            raise ValueError(
+                f"'{self.__class__.__name__}' does not support "
+                f"reading files of extension '{ext}'"
+            )
+
+    def read_sql(self, sql: str, *args, **kwargs) -> pa.Table:
+        """Read in a pyarrow table from a SQL query.
+
+        Queries run on BigQuery by default. Set ``DATA_SQL_ENGINE`` to
+        ``"duckdb"`` to run them with an embedded DuckDB database over files
+        in the storage backend, passing the files to query as ``tables``.
+
+        Args:
+            sql (str): SQL query to execute.
+
+        Returns:
+            pa.Table: Result of the query.
+        """
+        if getattr(default_settings, "DATA_SQL_ENGINE", "bigquery") == "duckdb":
+            from gluepy.files.data import duckdb
+
+            return duckdb.read_sql(sql, *args, **kwargs)
+
+        try:
+            from google.cloud import bigquery
+        except ImportError:
+            logger.error(
+                "Dependency 'google-cloud-bigquery' must be installed to read SQL"
+            )
+            raise
+        client = bigquery.Client(project=default_settings.GCP_PROJECT_ID)
+        return client.query(sql, *args, **kwargs).to_arrow(create_bqstorage_client=True)
+
+    def read_sql_iter(self, sql: str, *args, **kwargs) -> Iterator[pa.RecordBatch]:
+        """Read the result of a SQL query as pyarrow record batches.
+
+        Results of BigQuery queries are streamed with the BigQuery Storage
+        Read API, keeping at most ``DATA_SQL_MAX_BYTES_IN_FLIGHT`` bytes of
+        downloaded batches ahead of the consumer. Results of DuckDB queries
+        are computed batch by batch as they are read.
+
+        Args:
+            sql (str): SQL query to execute.
+
+        Yields:
+            pa.RecordBatch: Batches of rows of the result.
+        """
+        if getattr(default_settings, "DATA_SQL_ENGINE", "bigquery") == "duckdb":
+            from gluepy.files.data import duckdb
+
+            return duckdb.read_sql_iter(sql, *args, **kwargs)
+
+        from gluepy.files.data import bigquery
+
+        return bigquery.read_sql_iter(sql, *args, **kwargs)
+
+    def write(
+        self, path: str, df: pa.Table, root: bool = False, *args, **kwargs
+    ) -> None:
+        """Write pyarrow table to path on default storage backend.
+
+        Args:
+            path (str): Path to destination of table.
+            df (pa.Table): Table to be written.
+            root (bool, optional): If path is relative to root or run folder.
+                Defaults to False.
+
+        Raises:
+            ValueError: Raised if file extension is not supported.
+        """
+        _, ext = os.path.splitext(path)
+        if ext in {".csv", ".txt"}:
+            self._write(path, df, root, pa_csv.write_csv, *args, **kwargs)
+        elif ext in {".pq", ".parquet"}:
+            self._write(path, df, root, pq.write_table, *args, **kwargs)
+        elif ext in {".arrow", ".feather", ".ipc"}:
+            # Uncompressed files can be memory mapped without copying on read.
+            kwargs.setdefault("compression", "uncompressed")
+            self._write(path, df, root, feather.write_feather, *args, **kwargs)
+        else:
+            raise ValueError(
+                f"'{self.__class__.__name__}' does not support "
+                f"writing files of extension '{ext}'"
+            )
+
+    def _read_csv(self, path: str, root: bool = False, *args, **kwargs):
+        """Implementation of reading csv file"""
+        logger.info(f"Reading file from path '{path}'.")
+        with default_storage.open_stream(
+            path if root is True else default_storage.runpath(path)
+        ) as stream:
+            return pa_csv.read_csv(stream, *args, **kwargs)
+
+    def _read_parquet(self, path: str, root: bool = False, *args, **kwargs):
+        """Implementation of reading parquet file"""
+        logger.info(f"Reading file from path '{path}'.")
+        kwargs.setdefault("filesystem", arrow_filesystem(default_storage))
+        return pq.read_table(
+            path if root is True else default_storage.runpath(path), *args, **kwargs
+        )
+
+    def _read_ipc(self, path: str, root: bool = False, *args, **kwargs):
+        """Implementation of reading Arrow IPC and Feather file"""
+        logger.info(f"Reading file from path '{path}'.")
+        path = path if root is True else default_storage.runpath(path)
+        local_path = default_storage.local_path(path)
+        if local_path is not None:
+            return feather.read_table(local_path, *args, memory_map=True, **kwargs)
+
+        # Tables read from the buffer reference its memory instead of copying.
+        source = pa.BufferReader(pa.py_buffer(default_storage.open(path)))
+        return feather.read_table(source, *args, **kwargs)
+
+    def _read_json(self, path: str, root: bool = False, *args, **kwargs):
+        """Implementation of reading newline delimited json file"""
+        logger.info(f"Reading file from path '{path}'.")
+        with default_storage.open_stream(
+            path if root is True else default_storage.runpath(path)
+        ) as stream:
+            return pa_json.read_json(stream, *args, **kwargs)
+
+    def _write(self, path: str, df: pa.Table, root: bool, writer, *args, **kwargs):
+        """Implementation of writing file using a pyarrow writer function"""
+        path = path if root is True else default_storage.runpath(path)
+        logger.info(f"Writing file to path '{path}'.")
+        stream = BytesIO()
+        writer(df, stream, *args, **kwargs)
+        stream.seek(0, os.SEEK_SET)
+
+        default_storage.touch(file_path=path, content=stream)
@@ -0,0 +1,206 @@
+import io
+import os
+import logging
+from typing import List, Optional
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs as pafs
+from gluepy.files.storages import default_storage
+from gluepy.files.storages.base import BaseStorage, RangedReader
+
+logger = logging.getLogger(__name__)
+
+# Format of files by extension, as named by ``pyarrow.dataset``.
+DATASET_FORMATS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".pq": "parquet",
+    ".parquet": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".ipc": "ipc",
+    ".jsonl": "json",
+    ".ndjson": "json",
+}
+
+
+class _UploadStream(io.BytesIO):
+    """Writable file object that upload its content to storage when closed"""
+
+    def __init__(self, storage: BaseStorage, path: str) -> None:
+        super().__init__()
+        self._storage = storage
+        self._path = path
+
+    def close(self) -> None:
+        if not self.closed:
+            self.seek(0, os.SEEK_SET)
+            self._storage.touch(self._path, self)
+        super().close()
+
+
+class StorageFileSystemHandler(pafs.FileSystemHandler):
+    """PyArrow file system handler over a storage backend.
+
+    Allow pyarrow readers such as ``pyarrow.parquet`` and ``pyarrow.dataset``
+    to access files of any storage backend. Files are opened as seekable file
+    objects that fetch byte ranges on demand using :meth:`BaseStorage.read_range`,
+    so readers only download the parts of a file they need, such as the
+    footer and selected columns of a parquet file.
+
+    Args:
+        storage (BaseStorage): Storage backend to access files on.
+    """
+
+    def __init__(self, storage: BaseStorage) -> None:
+        self.storage = storage
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, StorageFileSystemHandler):
+            return self.storage is other.storage
+        return NotImplemented
+
+    def __ne__(self, other) -> bool:
+        if isinstance(other, StorageFileSystemHandler):
+            return self.storage is not other.storage
+        return NotImplemented
+
+    def get_type_name(self) -> str:
+        return f"gluepy+{self.storage.__class__.__name__}"
+
+    def normalize_path(self, path: str) -> str:
+        return path
+
+    def _file_info(self, path: str) -> pafs.FileInfo:
+        if not self.storage.exists(path):
+            return pafs.FileInfo(path, pafs.FileType.NotFound)
+        if self.storage.isfile(path):
+            return pafs.FileInfo(path, pafs.FileType.File, size=self.storage.size(path))
+        return pafs.FileInfo(path, pafs.FileType.Directory)
+
+    def get_file_info(self, paths: List[str]) -> List[pafs.FileInfo]:
+        return [self._file_info(path) for path in paths]
+
+    def get_file_info_selector(self, selector: pafs.FileSelector) -> List:
+        base_dir = selector.base_dir.rstrip(self.storage.separator)
+        if not self.storage.exists(base_dir):
+            if selector.allow_not_found:
+                return []
+            raise FileNotFoundError(f"Directory '{base_dir}' does not exist.")
+
+        # Sizes are left out of listings to avoid one request per file, they
+        # are only fetched for the files that readers end up opening.
+        if selector.recursive:
+            return [
+                pafs.FileInfo(path, pafs.FileType.File)
+                for path in self.storage.walk(base_dir)
+            ]
+
+        files, dirs = self.storage.ls(base_dir)
+        infos = []
+        for name in files:
+            infos.append(pafs.FileInfo(self._join(base_dir, name), pafs.FileType.File))
+        for name in dirs:
+            infos.append(
+                pafs.FileInfo(self._join(base_dir, name), pafs.FileType.Directory)
+            )
+        return infos
+
+    def _join(self, base_dir: str, name: str) -> str:
+        """Join the basename of an entry returned by ``ls`` to base_dir, as
+        storage backends return entries either as names or as paths"""
+        name = name.rstrip(self.storage.separator).split(self.storage.separator)[-1]
+        return f"{base_dir}{self.storage.separator}{name}" if base_dir else name
+
+    def create_dir(self, path: str, recursive: bool) -> None:
+        self.storage.mkdir(path, make_parents=recursive)
+
+    def delete_dir(self, path: str) -> None:
+        self.storage.rm(path, recursive=True)
+
+    def delete_dir_contents(self, path: str, missing_dir_ok: bool = False) -> None:
+        if not self.storage.exists(path):
+            if missing_dir_ok:
+                return
+            raise FileNotFoundError(f"Directory '{path}' does not exist.")
+        for file_path in list(self.storage.walk(path)):
+            self.storage.rm(file_path)
+
+    def delete_root_dir_contents(self) -> None:
+        raise NotImplementedError("Deleting the root directory is not supported.")
+
+    def delete_file(self, path: str) -> None:
+        self.storage.rm(path)
+
+    def move(self, src: str, dest: str) -> None:
+        self.storage.cp(src, dest, recursive=self.storage.isdir(src), overwrite=True)
+        self.storage.rm(src, recursive=True)
+
+    def copy_file(self, src: str, dest: str) -> None:
+        self.storage.cp(src, dest, overwrite=True)
+
+    def open_input_stream(self, path: str) -> pa.PythonFile:
+        return self.open_input_file(path)
+
+    def open_input_file(self, path: str) -> pa.PythonFile:
+        logger.debug(f"Opening '{path}' for ranged reads.")
+
+        def fetch(start: int, end: int) -> bytes:
+            return self.storage.read_range(path, start, end - start)
+
+        return pa.PythonFile(RangedReader(self.storage.size(path), fetch), mode="r")
+
+    def open_output_stream(
+        self, path: str, metadata: Optional[dict] = None
+    ) -> pa.PythonFile:
+        return pa.PythonFile(_UploadStream(self.storage, path), mode="w")
+
+    def open_append_stream(
+        self, path: str, metadata: Optional[dict] = None
+    ) -> pa.PythonFile:
+        raise NotImplementedError("Appending to files is not supported.")
+
+
+def arrow_filesystem(storage: Optional[BaseStorage] = None) -> pafs.PyFileSystem:
+    """Get a pyarrow file system over a storage backend.
+
+    Args:
+        storage (Optional[BaseStorage]): Storage backend to access files on.
+            Defaults to ``default_storage``.
+
+    Returns:
+        pafs.PyFileSystem: File system that can be passed to pyarrow readers
+          and writers, e.g. ``pd.read_parquet(path, filesystem=fs)``.
+    """
+    return pafs.PyFileSystem(
+        StorageFileSystemHandler(storage if storage is not None else default_storage)
+    )
+
+
+def arrow_dataset(path: str, storage: Optional[BaseStorage] = None) -> ds.Dataset:
+    """Get a pyarrow dataset over a file or a hive partitioned directory.
+
+    The format is inferred from the file extension, and paths without an
+    extension are read as directories of parquet files.
+
+    Args:
+        path (str): Path to file or dataset directory.
+        storage (Optional[BaseStorage]): Storage backend to access files on.
+            Defaults to ``default_storage``.
+
+    Raises:
+        ValueError: Raised if file extension is not supported.
+
+    Returns:
+        ds.Dataset: Dataset that read files using ranged reads.
+    """
+    _, ext = os.path.splitext(path)
+    fmt = DATASET_FORMATS.get(ext, "parquet" if not ext else None)
+    if fmt is None:
+        raise ValueError(f"Datasets of files of extension '{ext}' are not supported")
+    return ds.dataset(
+        path,
+        filesystem=arrow_filesystem(storage),
+        format=fmt,
+        partitioning="hive",
+    )
@@ -1,8 +1,115 @@
+import io
 import os
-from typing import List, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 from io import StringIO, BytesIO
 from gluepy.conf import default_settings, default_context
+from gluepy.utils import tracing
+
+
+class RangedReader(io.RawIOBase):
+    """Read-only, seekable file object that fetch byte ranges on demand.
+
+    Used by storage backends to expose remote blobs as file objects without
+    downloading the entire blob into memory up front.
+
+    Args:
+        size (int): Total size of the blob in bytes.
+        fetch (Callable[[int, int], bytes]): Callable that return the bytes
+            between ``start`` (inclusive) and ``end`` (exclusive).
+    """
+
+    def __init__(self, size: int, fetch: Callable[[int, int], bytes]) -> None:
+        super().__init__()
+        self._size = size
+        self._fetch = fetch
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence '{whence}'")
+
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self._size:
+            return 0
+
+        end = min(self._pos + len(buffer), self._size)
+        data = self._fetch(self._pos, end)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def readall(self) -> bytes:
+        # Fetch the remainder in a single request instead of the default
+        # behavior of looping over small buffers.
+        if self._pos >= self._size:
+            return b""
+
+        data = self._fetch(self._pos, self._size)
+        self._pos += len(data)
+        return data
+
+
+class TextEncodingReader(io.RawIOBase):
+    """Read-only file object that encode a text stream to bytes while reading.
+
+    Allow a ``StringIO`` to be passed to APIs that expect binary file objects
+    without first copying the full content into a second buffer.
+
+    Args:
+        stream (StringIO): Text stream to read from.
+        chunk_size (int): Number of characters to read from stream at a time.
+        encoding (str, optional): Encoding to use. Defaults to "utf-8".
+    """
+
+    def __init__(
+        self, stream: StringIO, chunk_size: int, encoding: str = "utf-8"
+    ) -> None:
+        super().__init__()
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._encoding = encoding
+        self._buffer = b""
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._buffer):
+            chunk = self._stream.read(self._chunk_size)
+            if not chunk:
+                return 0
+            self._buffer = chunk.encode(self._encoding)
+            self._offset = 0
+
+        start = self._offset
+        end = min(start + len(buffer), len(self._buffer))
+        buffer[: end - start] = self._buffer[start:end]
+        self._offset = end
+        return end - start
 
 
 class BaseStorage:
@@ -10,6 +117,28 @@ class BaseStorage:
 
     MAX_CHUNK_SIZE = 1_000_000
     separator = os.sep
+    # Methods recorded as spans in the trace of a run, with the function that
+    # measure the bytes transferred by each call.
+    TRACED_METHODS = {
+        "touch": tracing.written_bytes,
+        "open": tracing.read_bytes,
+        "open_stream": tracing.streamed_bytes,
+        "read_range": tracing.read_bytes,
+        "cp": tracing.copied_bytes,
+        "size": None,
+        "rm": None,
+        "ls": None,
+        "walk": None,
+        "mkdir": None,
+        "isdir": None,
+        "isfile": None,
+        "exists": None,
+        "etag": None,
+    }
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        tracing.trace_methods(cls, "storage", cls.TRACED_METHODS)
 
     def abspath(self, path: str) -> str:
         """Get absolute path to file including STORAGE_ROOT"""
@@ -36,6 +165,77 @@ class BaseStorage:
         io.seek(0, os.SEEK_SET)
         return io
 
+    def _to_bytes_stream(self, content: Union[StringIO, BytesIO]) -> io.IOBase:
+        """Get a binary file object of content, encoding text streams lazily"""
+        if isinstance(content, io.TextIOBase):
+            return io.BufferedReader(
+                TextEncodingReader(content, self.MAX_CHUNK_SIZE),
+                buffer_size=self.MAX_CHUNK_SIZE,
+            )
+        return content
+
+    def _download_parts(
+        self,
+        size: int,
+        fetch: Callable[[int, int], bytes],
+        part_size: int,
+        max_workers: int,
+        head: bytes = b"",
+    ) -> bytearray:
+        """Download a blob in byte ranges concurrently into a preallocated buffer.
+
+        Args:
+            size (int): Total size of the blob in bytes.
+            fetch (Callable[[int, int], bytes]): Callable that return the bytes
+                between ``start`` (inclusive) and ``end`` (exclusive).
+            part_size (int): Size in bytes of each range to fetch.
+            max_workers (int): Number of ranges to fetch concurrently.
+            head (bytes, optional): Already downloaded bytes from start of blob.
+
+        Returns:
+            bytearray: Full content of the blob.
+        """
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        view[: len(head)] = head
+
+        def download(start: int) -> None:
+            end = min(start + part_size, size)
+            view[start:end] = fetch(start, end)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Consume the iterator to propagate any raised exception.
+            list(executor.map(download, range(len(head), size, part_size)))
+        return buffer
+
+    def _run_concurrently(
+        self, func: Callable[[Any], Any], items: Iterable[Any], max_workers: int
+    ) -> List[Any]:
+        """Call func on each item using a thread pool.
+
+        Items are consumed lazily and at most ``max_workers`` calls are pending
+        at a time, so that large listings are never fully loaded in memory.
+
+        Args:
+            func (Callable[[Any], Any]): Function to call with each item.
+            items (Iterable[Any]): Items to call function with.
+            max_workers (int): Number of concurrent calls.
+
+        Returns:
+            List[Any]: Return values of all calls, in order of completion.
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for item in items:
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results += [future.result() for future in done]
+                pending.add(executor.submit(func, item))
+
+            results += [future.result() for future in pending]
+        return results
+
     def touch(self, file_path: str, content: Union[StringIO, BytesIO]) -> None:
         """Create a new blob at file path.
 
@@ -56,6 +256,77 @@ class BaseStorage:
         """
         raise NotImplementedError()
 
+    @contextmanager
+    def open_stream(
+        self, file_path: str, mode: str = "rb"
+    ) -> Iterator[Union[io.BufferedIOBase, io.TextIOBase]]:
+        """Opens a blob at file_path as a readable and seekable file object.
+
+        Unlike :meth:`open`, the content is not necessarily loaded into memory
+        at once, which allow large files to be read in chunks. Storage backends
+        that cannot stream fall back to wrap the content of :meth:`open`.
+
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Yields:
+            Union[io.BufferedIOBase, io.TextIOBase]: File object of the blob.
+        """
+        content = self.open(file_path)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+
+        stream = self._wrap_stream(BytesIO(content), mode)
+        try:
+            yield stream
+        finally:
+            stream.close()
+
+    def _wrap_stream(
+        self, stream: io.IOBase, mode: str
+    ) -> Union[io.BufferedIOBase, io.TextIOBase]:
+        """Wrap a binary stream to return string or bytes depending on mode"""
+        if isinstance(stream, io.RawIOBase):
+            stream = io.BufferedReader(stream, buffer_size=self.MAX_CHUNK_SIZE)
+        if "b" not in mode:
+            return io.TextIOWrapper(stream, encoding="utf-8")
+        return stream
+
+    def read_range(self, file_path: str, start: int, length: int) -> bytes:
+        """Read a range of bytes of a file without reading the entire file.
+
+        Allow columnar readers to only fetch the parts of a file they need,
+        such as the footer of a parquet file.
+
+        Args:
+            file_path (str): File path of blob we want to read from.
+            start (int): Offset in bytes of the first byte to read.
+            length (int): Number of bytes to read.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            bytes: Bytes of the range, shorter than length if the range extend
+              beyond the end of the file.
+        """
+        raise NotImplementedError()
+
+    def size(self, file_path: str) -> int:
+        """Get the size of a file in bytes.
+
+        Args:
+            file_path (str): File path of blob we want the size of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            int: Size of the file in bytes.
+        """
+        raise NotImplementedError()
+
     def rm(self, path: str, recursive: bool = False) -> None:
         """Delete a file
 
@@ -71,7 +342,7 @@ class BaseStorage:
         dest_path: str,
         recursive: bool = False,
         overwrite: bool = False,
-    ) -> None:
+    ) -> dict:
         """Copy a file from source to destination
 
         Args:
@@ -79,6 +350,10 @@ class BaseStorage:
             dest_path (str): Path to file or directory to copy to.
             recursive (bool): If should copy sub directories as well.
             overwrite (bool): If should copy to destination that already exists.
+
+        Returns:
+            dict: Summary of the copy with the number of ``files`` and ``bytes``
+              copied.
         """
         raise NotImplementedError()
 
@@ -94,6 +369,20 @@ class BaseStorage:
         """
         raise NotImplementedError()
 
+    def walk(self, path: str) -> Iterator[str]:
+        """Recursively list all files under given path.
+
+        Files are yielded lazily as they are listed, so that directories with
+        a large number of files are never fully loaded in memory.
+
+        Args:
+            path (str): Path of directory we want to list files of.
+
+        Yields:
+            str: Path of each file, that can be passed to other storage methods.
+        """
+        raise NotImplementedError()
+
     def mkdir(self, path: str, make_parents: bool = False) -> None:
         """Make a new directory at location
 
@@ -136,3 +425,35 @@ class BaseStorage:
             bool: True/False if path is file or not.
         """
         raise NotImplementedError()
+
+    def etag(self, path: str) -> str:
+        """Get an identifier of the current version of a file.
+
+        The identifier change whenever the content of the file change, which
+        allow callers to validate cached copies without downloading the file.
+
+        Args:
+            path (str): Path of file we want to get the version of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            str: Identifier of the file version.
+        """
+        raise NotImplementedError()
+
+    def local_path(self, path: str) -> Optional[str]:
+        """Get the path of a file on the local file system, if the storage
+        backend keeps its files on local disk.
+
+        Allow readers to memory map files instead of reading them.
+
+        Args:
+            path (str): Path of file we want the local path of.
+
+        Returns:
+            Optional[str]: Local file system path, or None if the file is not
+              stored on local disk.
+        """
+        return None
@@ -0,0 +1,409 @@
+import io
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+from io import StringIO, BytesIO
+from gluepy.conf import default_settings
+from gluepy.utils.loading import import_string
+from gluepy.files.storages.base import BaseStorage
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # File locks are not available on Windows, eviction is then not
+    # synchronized across processes.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class CachingStorage(BaseStorage):
+    """Storage that wraps another storage backend and keep a read-through
+    cache of file contents on local disk.
+
+    Cached files are keyed by path and by the version of the file reported by
+    :meth:`BaseStorage.etag`, so a file that is changed on the wrapped storage
+    is never served from a stale copy. The least recently used files are
+    evicted when the cache exceeds its size limit.
+
+    The cache directory can be shared by multiple processes on the same host,
+    files are written atomically and eviction is guarded by a file lock.
+
+    Configured with the following settings:
+
+    * ``CACHING_STORAGE_BACKEND`` dotted path to the wrapped storage backend.
+    * ``CACHING_STORAGE_DIR`` local directory of the cache.
+    * ``CACHING_STORAGE_MAX_BYTES`` maximum size in bytes of the cache.
+
+    Attributes:
+        storage (BaseStorage): The wrapped storage backend.
+        hits (int): Number of reads served from the cache by this instance.
+        misses (int): Number of reads that downloaded the file to the cache.
+    """
+
+    # Seconds after their last write that partial downloads are considered
+    # abandoned by a process that died, and removed on eviction.
+    STALE_DOWNLOAD_SECONDS = 3600
+
+    def __init__(
+        self,
+        storage: Optional[BaseStorage] = None,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.storage = (
+            storage or import_string(default_settings.CACHING_STORAGE_BACKEND)()
+        )
+        self.separator = self.storage.separator
+        self.cache_dir = cache_dir or getattr(
+            default_settings,
+            "CACHING_STORAGE_DIR",
+            os.path.join(tempfile.gettempdir(), "gluepy-cache"),
+        )
+        self.max_bytes = max_bytes or getattr(
+            default_settings, "CACHING_STORAGE_MAX_BYTES", 10 * 1024**3
+        )
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def stats(self) -> dict:
+        """Number of cache ``hits`` and ``misses`` of this instance"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _cache_path(self, file_path: str, etag: Optional[str] = None) -> str:
+        """Get the local path of the cached copy of a version of a file,
+        by default the current version"""
+        if etag is None:
+            etag = self.storage.etag(file_path)
+        key = f"{self.storage.abspath(file_path)}\0{etag}"
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest()
+        )
+
+    def _open_cached(self, file_path: str) -> BinaryIO:
+        """Open the cached copy of a file, downloading it on a cache miss.
+
+        The file is opened before returning, so that it remain readable even
+        if it is evicted by another process while in use. Files that are
+        overwritten while downloaded are returned without being cached, since
+        the content downloaded may not be the version of the etag read before.
+        """
+        etag = self.storage.etag(file_path)
+        cache_path = self._cache_path(file_path, etag)
+        try:
+            stream = open(cache_path, mode="rb")
+        except FileNotFoundError:
+            pass
+        else:
+            # Update modification time to track least recently used files.
+            try:
+                os.utime(cache_path)
+            except FileNotFoundError:
+                # Evicted by another process since opened, the opened stream
+                # remain readable.
+                pass
+            except BaseException:
+                stream.close()
+                raise
+            with self._lock:
+                self.hits += 1
+            logger.debug(f"Cache hit for '{file_path}'.")
+            return stream
+
+        with self._lock:
+            self.misses += 1
+        logger.debug(f"Cache miss for '{file_path}'.")
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, mode="wb") as tmp, self.storage.open_stream(
+                file_path
+            ) as source:
+                shutil.copyfileobj(source, tmp, self.MAX_CHUNK_SIZE)
+            if self.storage.etag(file_path) != etag:
+                logger.debug(f"'{file_path}' changed while downloaded, not caching.")
+                stream = open(tmp_path, mode="rb")
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    # Files in use cannot be deleted on some platforms, they
+                    # are removed by eviction once abandoned.
+                    pass
+                return stream
+            # Rename is atomic, concurrent downloads of the same file simply
+            # replace each other with identical content.
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        stream = open(cache_path, mode="rb")
+        self._evict()
+        return stream
+
+    def _evict(self) -> None:
+        """Delete least recently used files until cache is within size limit,
+        and partial downloads abandoned by processes that died"""
+        with open(os.path.join(self.cache_dir, ".lock"), mode="wb") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            entries = []
+            downloading = 0
+            stale = time.time() - self.STALE_DOWNLOAD_SECONDS
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.startswith(".") and not entry.name.startswith(
+                        ".tmp-"
+                    ):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if not entry.name.startswith(".tmp-"):
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    elif stat.st_mtime < stale:
+                        logger.debug(f"Removing abandoned download '{entry.path}'.")
+                        try:
+                            os.unlink(entry.path)
+                        except FileNotFoundError:
+                            pass
+                    else:
+                        # Downloads in progress use space but cannot be evicted.
+                        downloading += stat.st_size
+
+            total = downloading + sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                logger.debug(f"Evicting '{path}' from cache.")
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def abspath(self, path: str) -> str:
+        """Get absolute path to file including STORAGE_ROOT"""
+        return self.storage.abspath(path)
+
+    def relpath(self, path: str) -> str:
+        """Get relative path to file, relative to STORAGE_ROOT"""
+        return self.storage.relpath(path)
+
+    def touch(self, file_path: str, content: Union[StringIO, BytesIO]) -> None:
+        """Create a new blob at file path on the wrapped storage.
+
+        Args:
+            file_path (str): Path to file we want to create
+            content (Union[StringIO, BytesIO]): Content of file we want to generate
+        """
+        return self.storage.touch(file_path, content)
+
+    def open(self, file_path: str, mode: str = "rb") -> Union[str, bytes]:
+        """Opens a blob at file_path, served from the cache when possible.
+
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Returns:
+            Union[str, bytes]: Returns the string or byte content of the file.
+        """
+        with self._open_cached(file_path) as stream:
+            data = stream.read()
+        return data if "b" in mode else data.decode("utf-8")
+
+    @contextmanager
+    def open_stream(
+        self, file_path: str, mode: str = "rb"
+    ) -> Iterator[Union[io.BufferedIOBase, io.TextIOBase]]:
+        """Opens the cached copy of a blob at file_path as a file object.
+
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Yields:
+            Union[io.BufferedIOBase, io.TextIOBase]: File object of the blob.
+        """
+        stream = self._wrap_stream(self._open_cached(file_path), mode)
+        try:
+            yield stream
+        finally:
+            stream.close()
+
+    def read_range(self, file_path: str, start: int, length: int) -> bytes:
+        """Read a range of bytes of a file without reading the entire file.
+
+        Ranges are read from the cached copy of the file if there is one, and
+        from the wrapped storage otherwise without caching the file.
+
+        Args:
+            file_path (str): File path of blob we want to read from.
+            start (int): Offset in bytes of the first byte to read.
+            length (int): Number of bytes to read.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            bytes: Bytes of the range, shorter than length if the range extend
+              beyond the end of the file.
+        """
+        try:
+            with open(self._cache_path(file_path), mode="rb") as stream:
+                stream.seek(start)
+                data = stream.read(length)
+        except FileNotFoundError:
+            return self.storage.read_range(file_path, start, length)
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def size(self, file_path: str) -> int:
+        """Get the size of a file in bytes.
+
+        Args:
+            file_path (str): File path of blob we want the size of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            int: Size of the file in bytes.
+        """
+        return self.storage.size(file_path)
+
+    def rm(self, path: str, recursive: bool = False) -> None:
+        """Delete a file on the wrapped storage.
+
+        Args:
+            path (str): Path to file to delete
+            recursive (bool): If allowed to delete recursive directories or not.
+        """
+        return self.storage.rm(path, recursive=recursive)
+
+    def cp(
+        self,
+        src_path: str,
+        dest_path: str,
+        recursive: bool = False,
+        overwrite: bool = False,
+    ) -> dict:
+        """Copy a file from source to destination on the wrapped storage.
+
+        Args:
+            src_path (str): Path to file or directory to copy.
+            dest_path (str): Path to file or directory to copy to.
+            recursive (bool): If should copy sub directories as well.
+            overwrite (bool): If should copy to destination that already exists.
+
+        Returns:
+            dict: Summary of the copy with the number of ``files`` and ``bytes``
+              copied.
+        """
+        return self.storage.cp(
+            src_path, dest_path, recursive=recursive, overwrite=overwrite
+        )
+
+    def ls(self, path: str) -> Tuple[List[str], List[str]]:
+        """List all files and directories at given path on the wrapped storage.
+
+        Args:
+            path (str): Path where we want to list contents of
+
+        Returns:
+            Tuple[List[str], List[str]]:
+              First list is files, second list is directories.
+        """
+        return self.storage.ls(path)
+
+    def walk(self, path: str) -> Iterator[str]:
+        """Recursively list all files under given path on the wrapped storage.
+
+        Args:
+            path (str): Path of directory we want to list files of.
+
+        Yields:
+            str: Path of each file, that can be passed to other storage methods.
+        """
+        return self.storage.walk(path)
+
+    def mkdir(self, path: str, make_parents: bool = False) -> None:
+        """Make a new directory at location on the wrapped storage.
+
+        Args:
+            path (str): Path of directory we want to create
+            make_parents (bool, optional): If we should generate parents
+            folders as well. Defaults to False.
+        """
+        return self.storage.mkdir(path, make_parents=make_parents)
+
+    def isdir(self, path: str) -> bool:
+        """Check if path is directory or not on the wrapped storage.
+
+        Args:
+            path (str): Path we want to check
+
+        Returns:
+            bool: True/False if path is directory or not
+        """
+        return self.storage.isdir(path)
+
+    def isfile(self, path: str) -> bool:
+        """Check if path is a file or not on the wrapped storage.
+
+        Args:
+            path (str): Path we want to check
+
+        Returns:
+            bool: True/False if path is file or not.
+        """
+        return self.storage.isfile(path)
+
+    def exists(self, path: str) -> bool:
+        """Check if path exists or not on the wrapped storage.
+
+        Args:
+            path (str): Path we want to check
+
+        Returns:
+            bool: True/False if path is file or not.
+        """
+        return self.storage.exists(path)
+
+    def etag(self, path: str) -> str:
+        """Get an identifier of the current version of a file on the wrapped storage.
+
+        Args:
+            path (str): Path of file we want to get the version of.
+
+        Returns:
+            str: Identifier of the file version.
+        """
+        return self.storage.etag(path)
+
+    def local_path(self, path: str) -> Optional[str]:
+        """Get the path of a file on the local file system of the wrapped storage.
+
+        Args:
+            path (str): Path of file we want the local path of.
+
+        Returns:
+            Optional[str]: Local file system path, or None if the file is not
+              stored on local disk.
+        """
+        return self.storage.local_path(path)
@@ -1,7 +1,8 @@
+import io
 import os
 import logging
-from pathlib import Path
-from typing import Union
+from contextlib import contextmanager
+from typing import Iterator, Union
 from io import StringIO, BytesIO
 import requests
 import requests.exceptions as requests_exceptions
@@ -19,6 +20,7 @@ except ImportError:
         "See https://github.com/GoogleCloudPlatform/gcloud-python"
     )
 from .base import BaseStorage
+from .metadata import MetadataCache, cached_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +57,8 @@ class GoogleStorage(BaseStorage):
     """
 
     separator = "/"
+    # Maximum number of calls the Cloud Storage API accept in one batch request.
+    MAX_BATCH_SIZE = 100
 
     def __init__(self) -> None:
         super().__init__()
@@ -63,6 +67,24 @@ class GoogleStorage(BaseStorage):
         assert self.bucket_name, "GOOGLE_GCS_BUCKET setting must be set."
         self.bucket = self.client.bucket(self.bucket_name)
         self.storage_root = default_settings.STORAGE_ROOT.lstrip(self.separator)
+        self.download_chunksize = getattr(
+            default_settings, "GOOGLE_GCS_DOWNLOAD_CHUNKSIZE", 32 * 1024 * 1024
+        )
+        self.max_concurrency = getattr(
+            default_settings, "GOOGLE_GCS_MAX_CONCURRENCY", 10
+        )
+        ttl = getattr(default_settings, "STORAGE_METADATA_CACHE_TTL", None)
+        self.metadata_cache = (
+            MetadataCache(
+                ttl,
+                self.separator,
+                getattr(
+                    default_settings, "STORAGE_METADATA_CACHE_MAX_ENTRIES", 100_000
+                ),
+            )
+            if ttl
+            else None
+        )
 
     def touch(self, file_path: str, content: Union[StringIO, BytesIO]) -> None:
         """Create a new blob at file path.
@@ -85,61 +107,201 @@ class GoogleStorage(BaseStorage):
             retry=retry.Retry(predicate=_should_retry),
             size=len(content.read()),
         )
+        if self.metadata_cache is not None:
+            self.metadata_cache.add_file(file_path)
 
     def open(self, file_path: str, mode: str = "rb") -> Union[str, bytes]:
         """Opens a blob at file_path
 
+        Blobs larger than ``GOOGLE_GCS_DOWNLOAD_CHUNKSIZE`` are downloaded in
+        ranges of that size using up to ``GOOGLE_GCS_MAX_CONCURRENCY`` threads.
+
         Args:
             file_path (str): File path of blob we want to open
 
+        Raises:
+            FileNotFoundError: Raised if the blob does not exist.
+
         """
         if mode != "rb":
             logger.warning(f"`mode` is not used for {self.__class__.__name__}")
 
-        stream = BytesIO()
+        blob = self.bucket.blob(self.abspath(file_path))
+        part_size = self.download_chunksize
+        try:
+            content = blob.download_as_bytes(
+                start=0, end=part_size - 1, retry=retry.Retry(predicate=_should_retry)
+            )
+            if len(content) < part_size:
+                return content
+
+            # The first range was filled, fetch the size of the same generation
+            # to identify if there are more ranges to download.
+            generation = blob.generation
+            blob.reload(if_generation_match=generation)
+            if blob.size <= len(content):
+                return content
+
+            return self._download_parts(
+                blob.size,
+                lambda start, end: blob.download_as_bytes(
+                    start=start,
+                    end=end - 1,
+                    if_generation_match=generation,
+                    retry=retry.Retry(predicate=_should_retry),
+                ),
+                part_size=part_size,
+                max_workers=self.max_concurrency,
+                head=content,
+            )
+        except api_exceptions.RequestRangeNotSatisfiable:
+            # Ranged requests of empty blobs are not satisfiable.
+            return b""
+        except api_exceptions.NotFound as exc:
+            raise FileNotFoundError(
+                f"File '{self.abspath(file_path)}' does not exist."
+            ) from exc
+
+    @contextmanager
+    def open_stream(
+        self, file_path: str, mode: str = "rb"
+    ) -> Iterator[Union[io.BufferedIOBase, io.TextIOBase]]:
+        """Opens a blob at file_path as a file object that fetch byte ranges
+        of the blob on demand.
+
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Raises:
+            FileNotFoundError: Raised if the blob does not exist.
+
+        Yields:
+            Union[io.BufferedIOBase, io.TextIOBase]: File object of the blob.
+        """
+        blob = self.bucket.get_blob(self.abspath(file_path))
+        if blob is None:
+            raise FileNotFoundError(f"File '{self.abspath(file_path)}' does not exist.")
+
+        stream = self._wrap_stream(
+            blob.open("rb", retry=retry.Retry(predicate=_should_retry)), mode
+        )
         try:
-            self.bucket.blob(self.abspath(file_path)).download_to_file(stream)
+            yield stream
+        finally:
+            stream.close()
+
+    def read_range(self, file_path: str, start: int, length: int) -> bytes:
+        """Read a range of bytes of a file using a ranged download request.
+
+        Args:
+            file_path (str): File path of blob we want to read from.
+            start (int): Offset in bytes of the first byte to read.
+            length (int): Number of bytes to read.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            bytes: Bytes of the range, shorter than length if the range extend
+              beyond the end of the file.
+        """
+        if length <= 0:
+            return b""
+        blob = self.bucket.blob(self.abspath(file_path))
+        try:
+            return blob.download_as_bytes(
+                start=start,
+                end=start + length - 1,
+                retry=retry.Retry(predicate=_should_retry),
+            )
+        except api_exceptions.RequestRangeNotSatisfiable:
+            # Ranges starting after the end of the blob are not satisfiable.
+            return b""
         except api_exceptions.NotFound as exc:
             raise FileNotFoundError(
                 f"File '{self.abspath(file_path)}' does not exist."
             ) from exc
-        stream.seek(0)
-        return stream.read()
+
+    def size(self, file_path: str) -> int:
+        """Get the size of a file in bytes.
+
+        Args:
+            file_path (str): File path of blob we want the size of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            int: Size of the file in bytes.
+        """
+        blob = self.bucket.get_blob(self.abspath(file_path))
+        if blob is None:
+            raise FileNotFoundError(f"File '{self.abspath(file_path)}' does not exist.")
+        return blob.size
 
     def rm(self, path: str, recursive: bool = False) -> None:
         """Delete a file
 
+        Directories are deleted using batch requests of up to
+        ``MAX_BATCH_SIZE`` blobs each.
+
         Args:
             path (str): Path to file to delete
             recursive (bool): If allowed to delete recursive directories or not.
 
         """
         if self.isdir(path):
-            files, dirs = self.ls(path)
-            if (files or dirs) and not recursive:
+            prefix = self.abspath(path).rstrip(self.separator) + self.separator
+            blobs = self.client.list_blobs(self.bucket, prefix=prefix, max_results=2)
+            if not recursive and any(blob.name != prefix for blob in blobs):
                 raise FileExistsError(
                     "Option `recursive` must be set to delete directories that "
                     "contain other directories or files."
                 )
-            for item in files + dirs:
-                self.rm(item, recursive=recursive)
+
+            batch = []
+            for blob in self.client.list_blobs(self.bucket, prefix=prefix):
+                batch.append(blob)
+                if len(batch) >= self.MAX_BATCH_SIZE:
+                    self._delete_blobs(batch)
+                    batch = []
+            if batch:
+                self._delete_blobs(batch)
         else:
             self.bucket.blob(self.abspath(path=path)).delete()
 
+        if self.metadata_cache is not None:
+            self.metadata_cache.remove(path)
+
+    def _delete_blobs(self, blobs: list) -> None:
+        """Delete blobs in a single batch request"""
+        logger.debug(f"Deleting {len(blobs)} blobs.")
+        with self.client.batch(raise_exception=True):
+            for blob in blobs:
+                blob.delete()
+
     def cp(
         self,
         src_path: str,
         dest_path: str,
         recursive: bool = False,
         overwrite: bool = False,
-    ) -> None:
+    ) -> dict:
         """Copy a file from source to destination
 
+        Blobs are copied server side using rewrite requests, directories copy
+        up to ``GOOGLE_GCS_MAX_CONCURRENCY`` blobs concurrently.
+
         Args:
             src_path (str): Path to file or directory to copy.
             dest_path (str): Path to file or directory to copy to.
             recursive (bool): If should copy sub directories as well.
             overwrite (bool): If should copy to destination that already exists.
+
+        Returns:
+            dict: Summary of the copy with the number of ``files`` and ``bytes``
+              copied.
         """
         if not self.exists(src_path):
             raise FileNotFoundError(f"File at '{src_path}' not found.")
@@ -147,35 +309,70 @@ class GoogleStorage(BaseStorage):
             raise FileExistsError(f"File at '{dest_path}' already exist.")
 
         if self.isfile(src_path):
-            self.touch(dest_path, StringIO(self.open(src_path)))
-        elif self.isdir():
-            files, dirs = self.ls(src_path)
-            if dirs and not recursive:
+            size = self._rewrite(
+                (self.bucket.blob(self.abspath(src_path)), self.abspath(dest_path))
+            )
+            if self.metadata_cache is not None:
+                self.metadata_cache.add_file(dest_path)
+            return {"files": 1, "bytes": size}
+        elif self.isdir(src_path):
+            src_prefix = self.abspath(src_path).rstrip(self.separator) + self.separator
+            dest_prefix = (
+                self.abspath(dest_path).rstrip(self.separator) + self.separator
+            )
+            # Listings are paged lazily, so that copies start with the first
+            # page and large directories are never fully loaded in memory.
+            if not recursive and any(
+                self.separator
+                in blob.name.removeprefix(src_prefix).rstrip(self.separator)
+                for blob in self.client.list_blobs(self.bucket, prefix=src_prefix)
+            ):
                 raise FileExistsError(
                     "Option `recursive` must be set to copy directories that "
                     "contain other directories."
                 )
-            paths = files + dirs
-            for path in paths:
-                self.cp(
-                    path,
-                    str(
-                        Path(dest_path.lstrip(self.separator))
-                        / str(Path(path))
-                        .relative_to(src_path.lstrip(self.separator))
-                        .lstrip(self.separator)
-                    ),
-                    recursive=recursive,
-                    overwrite=overwrite,
-                )
+            sizes = self._run_concurrently(
+                self._rewrite,
+                (
+                    (blob, dest_prefix + blob.name.removeprefix(src_prefix))
+                    for blob in self.client.list_blobs(self.bucket, prefix=src_prefix)
+                ),
+                max_workers=self.max_concurrency,
+            )
+            if self.metadata_cache is not None:
+                self.metadata_cache.invalidate(dest_path)
+            stats = {"files": len(sizes), "bytes": sum(sizes)}
+            logger.info(
+                f"Copied {stats['files']} files ({stats['bytes']} bytes) "
+                f"from '{src_path}' to '{dest_path}'."
+            )
+            return stats
         else:
             raise ValueError(
                 f"Cannot identify if path '{src_path}' is a file or directory."
             )
 
+    def _rewrite(self, item: tuple) -> int:
+        """Copy a blob server side given a tuple of source blob and
+        destination blob name"""
+        blob, dest_name = item
+        logger.debug(f"Copying '{blob.name}' to '{dest_name}'.")
+        dest = self.bucket.blob(dest_name)
+        token, _, size = dest.rewrite(blob, retry=retry.Retry(predicate=_should_retry))
+        # Large blobs and blobs copied across locations need multiple calls.
+        while token is not None:
+            token, _, size = dest.rewrite(
+                blob, token=token, retry=retry.Retry(predicate=_should_retry)
+            )
+        return size
+
     def ls(self, path: str) -> tuple[list[str], list[str]]:
         """List all files and directories at given path.
 
+        Only the direct children of path are listed, using one request per page
+        of up to 1000 entries regardless of how many blobs exist further down
+        the tree.
+
         Args:
             path (str): Path where we want to list contents of
 
@@ -186,34 +383,40 @@ class GoogleStorage(BaseStorage):
         files: list[str] = []
         dirs: list[str] = []
 
-        for blob in self.client.list_blobs(self.bucket, prefix=self.abspath(path)):
-            if self.isdir(blob.name):
-                dirs += (
-                    [
-                        f"{self.relpath(blob.name).rstrip(self.separator)}{self.separator}"  # noqa
-                    ]
-                    if self._is_in_root(blob.name, path)
-                    else []
-                )
-            else:
-                if self._is_in_root(os.path.dirname(blob.name), path) and (
-                    os.path.dirname(blob.name) != os.path.dirname(self.abspath(path))
-                ):
-                    dirs += [
-                        f"{self.relpath(os.path.dirname(blob.name)).rstrip(self.separator)}{self.separator}"  # noqa
-                    ]
-
-                files += (
-                    [self.relpath(blob.name)]
-                    if self._is_in_root(blob.name, path)
-                    else []
-                )
+        prefix = self.abspath(path).rstrip(self.separator) + self.separator
+        iterator = self.client.list_blobs(
+            self.bucket, prefix=prefix, delimiter=self.separator
+        )
+        for page in iterator.pages:
+            # The directory placeholder blob itself is listed under its own prefix.
+            files += [self.relpath(blob.name) for blob in page if blob.name != prefix]
+            dirs += [
+                f"{self.relpath(dir_prefix).rstrip(self.separator)}{self.separator}"
+                for dir_prefix in page.prefixes
+            ]
 
         return (
             files,
             dirs,
         )
 
+    def walk(self, path: str) -> Iterator[str]:
+        """Recursively list all files under given path.
+
+        Blobs are listed lazily one page at a time.
+
+        Args:
+            path (str): Path of directory we want to list files of.
+
+        Yields:
+            str: Path of each file, relative to :setting:`STORAGE_ROOT`.
+        """
+        prefix = self.abspath(path).rstrip(self.separator) + self.separator
+        for blob in self.client.list_blobs(self.bucket, prefix=prefix):
+            # Skip the placeholder blobs that represent directories.
+            if not blob.name.endswith(self.separator):
+                yield self.relpath(blob.name)
+
     def mkdir(self, path: str, make_parents: bool = False) -> None:
         """Make a new directory at location
 
@@ -222,18 +425,21 @@ class GoogleStorage(BaseStorage):
             make_parents (bool, optional): If we should generate parents
               folders as well. Defaults to False.
         """
-        path = path.rstrip(self.separator) + self.separator
-        if self.exists(path):
-            logger.warning("Directory '%s' already exists.", path)
+        dir_path = path.rstrip(self.separator) + self.separator
+        if self.exists(dir_path):
+            logger.warning("Directory '%s' already exists.", dir_path)
             return
-        parent = os.path.dirname(path)
+        parent = os.path.dirname(dir_path)
         if not self.exists(parent) and not make_parents:
             raise FileNotFoundError(
                 f"Parent directory '{parent}' does not exist. "
                 "Use option `make_parents` to automatically create parent directories."
             )
-        self.bucket.blob(self.abspath(path)).upload_from_file(BytesIO())
+        self.bucket.blob(self.abspath(dir_path)).upload_from_file(BytesIO())
+        if self.metadata_cache is not None:
+            self.metadata_cache.add_dir(path)
 
+    @cached_metadata
     def isdir(self, path: str) -> bool:
         """Check if path is directory or not.
 
@@ -248,6 +454,7 @@ class GoogleStorage(BaseStorage):
         files = list(self.client.list_blobs(self.bucket, prefix=path, max_results=1))
         return self.bucket.blob(path).exists() or bool(files)
 
+    @cached_metadata
     def isfile(self, path: str) -> bool:
         """Check if path is a file or not.
 
@@ -261,6 +468,7 @@ class GoogleStorage(BaseStorage):
             self.separator
         )
 
+    @cached_metadata
     def exists(self, path: str) -> bool:
         """Check if path exists or not.
 
@@ -272,7 +480,19 @@ class GoogleStorage(BaseStorage):
         """
         return self.isfile(path) or self.isdir(path)
 
-    def _is_in_root(self, blob_name: str, dir_path: str) -> bool:
-        return os.path.dirname(blob_name.strip(self.separator)) == self.abspath(
-            dir_path
-        ).strip(self.separator)
+    def etag(self, path: str) -> str:
+        """Get an identifier of the current version of a file.
+
+        Args:
+            path (str): Path of file we want to get the version of.
+
+        Raises:
+            FileNotFoundError: Raised if the blob does not exist.
+
+        Returns:
+            str: Generation of the blob.
+        """
+        blob = self.bucket.get_blob(self.abspath(path))
+        if blob is None:
+            raise FileNotFoundError(f"File '{self.abspath(path)}' does not exist.")
+        return str(blob.generation)
@@ -1,7 +1,10 @@
+import io
 import os
+import uuid
 import shutil
 import logging
-from typing import List, Tuple, Union
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
 from io import StringIO, BytesIO
 from gluepy.files.storages.base import BaseStorage
 
@@ -28,19 +31,33 @@ class LocalStorage(BaseStorage):
         if not self.exists(os.path.dirname(file_path)):
             self.mkdir(os.path.dirname(file_path))
 
-        logger.debug(f"Writing file to path '{self.abspath(file_path)}'.")
-        with open(self.abspath(file_path), mode="wb") as stream:
-            while True:
-                chunk = content.read(self.MAX_CHUNK_SIZE)
-                if not chunk:
-                    break
-
-                if isinstance(chunk, str):
-                    chunk = chunk.encode("utf-8")
-                elif not isinstance(chunk, bytes):
-                    raise TypeError("Chunk is neither bytes or string")
-
-                stream.write(chunk)
+        abspath = self.abspath(file_path)
+        logger.debug(f"Writing file to path '{abspath}'.")
+        # Content is written to a temporary file that replace the file once
+        # complete, so that readers that memory mapped the previous version of
+        # the file keep reading its inode instead of a truncated file.
+        tmp_path = os.path.join(
+            os.path.dirname(abspath),
+            f".tmp-{os.path.basename(abspath)}-{uuid.uuid4().hex}",
+        )
+        try:
+            with open(tmp_path, mode="xb") as stream:
+                while True:
+                    chunk = content.read(self.MAX_CHUNK_SIZE)
+                    if not chunk:
+                        break
+
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+                    elif not isinstance(chunk, bytes):
+                        raise TypeError("Chunk is neither bytes or string")
+
+                    stream.write(chunk)
+            os.replace(tmp_path, abspath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
     def cp(
         self,
@@ -48,7 +65,7 @@ class LocalStorage(BaseStorage):
         dest_path: str,
         recursive: bool = False,
         overwrite: bool = False,
-    ) -> None:
+    ) -> dict:
         """Copy a file from source to destination
 
         Args:
@@ -56,8 +73,13 @@ class LocalStorage(BaseStorage):
             dest_path (str): Path to file or directory to copy to.
             recursive (bool): If should copy sub directories as well.
             overwrite (bool): If should copy to destination that already exists.
+
+        Returns:
+            dict: Summary of the copy with the number of ``files`` and ``bytes``
+              copied.
         """
-        if self.isdir(src_path) and not recursive:
+        is_dir = self.isdir(src_path)
+        if is_dir and not recursive:
             raise ValueError(f"recursive must be True if '{src_path}' is a directory")
         if self.exists(dest_path) and not overwrite:
             raise FileExistsError(
@@ -65,9 +87,24 @@ class LocalStorage(BaseStorage):
             )
         if not self.exists(os.path.dirname(dest_path)):
             self.mkdir(os.path.dirname(dest_path))
-        shutil.copy2(
-            self.abspath(src_path), self.abspath(dest_path), follow_symlinks=True
-        )
+
+        stats = {"files": 0, "bytes": 0}
+
+        def copy(src: str, dest: str, follow_symlinks: bool = True) -> str:
+            stats["files"] += 1
+            stats["bytes"] += os.path.getsize(src)
+            return shutil.copy2(src, dest, follow_symlinks=follow_symlinks)
+
+        if is_dir:
+            shutil.copytree(
+                self.abspath(src_path),
+                self.abspath(dest_path),
+                copy_function=copy,
+                dirs_exist_ok=overwrite,
+            )
+        else:
+            copy(self.abspath(src_path), self.abspath(dest_path))
+        return stats
 
     def open(self, file_path: str, mode: str = "rb") -> Union[str, bytes]:
         """Opens a blob at file_path
@@ -84,6 +121,80 @@ class LocalStorage(BaseStorage):
             f = stream.read()
         return f
 
+    @contextmanager
+    def open_stream(
+        self, file_path: str, mode: str = "rb"
+    ) -> Iterator[Union[io.BufferedIOBase, io.TextIOBase]]:
+        """Opens a blob at file_path as a file object backed by the file on disk.
+
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Yields:
+            Union[io.BufferedIOBase, io.TextIOBase]: File object of the file.
+        """
+        logger.debug(f"Streaming file from path '{self.abspath(file_path)}'.")
+        with open(self.abspath(file_path), mode=mode) as stream:
+            yield stream
+
+    def read_range(self, file_path: str, start: int, length: int) -> bytes:
+        """Read a range of bytes of a file without reading the entire file.
+
+        Args:
+            file_path (str): File path of blob we want to read from.
+            start (int): Offset in bytes of the first byte to read.
+            length (int): Number of bytes to read.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            bytes: Bytes of the range, shorter than length if the range extend
+              beyond the end of the file.
+        """
+        with open(self.abspath(file_path), mode="rb") as stream:
+            if hasattr(os, "pread"):
+                return os.pread(stream.fileno(), length, start)
+            stream.seek(start)
+            return stream.read(length)
+
+    def size(self, file_path: str) -> int:
+        """Get the size of a file in bytes.
+
+        Args:
+            file_path (str): File path of blob we want the size of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            int: Size of the file in bytes.
+        """
+        return os.path.getsize(self.abspath(file_path))
+
+    def rm(self, path: str, recursive: bool = False) -> None:
+        """Delete a file
+
+        Args:
+            path (str): Path to file to delete
+            recursive (bool): If allowed to delete recursive directories or not.
+
+        Raises:
+            FileNotFoundError: Raised if the path does not exist.
+            ValueError: Raised if path is a non empty directory and not recursive.
+        """
+        abspath = self.abspath(path)
+        logger.debug(f"Deleting path '{abspath}'.")
+        if not os.path.isdir(abspath):
+            os.remove(abspath)
+        elif recursive:
+            shutil.rmtree(abspath)
+        elif os.listdir(abspath):
+            raise ValueError("Trying to delete directory without recursive")
+        else:
+            os.rmdir(abspath)
+
     def ls(self, path: str) -> Tuple[List[str], List[str]]:
         """List all files and directories at given path.
 
@@ -91,8 +202,7 @@ class LocalStorage(BaseStorage):
             path (str): Path where we want to list contents of
 
         Raises:
-            ValueError: Raises a ValueError if the isdir and isfile functions cannot
-                identify if a blob is a file or a dir.
+            ValueError: Raises a ValueError if a blob is neither a file or a dir.
 
         Returns:
             Tuple[List[str], List[str]]:
@@ -100,21 +210,39 @@ class LocalStorage(BaseStorage):
         """
         files = []
         dirs = []
-        blobs = [
-            self.abspath(os.path.join(path, fpath))
-            for fpath in os.listdir(self.abspath(path))
-        ]
-
-        for b in blobs:
-            if self.isdir(b):
-                dirs.append(self.relpath(b))
-            elif self.isfile(b):
-                files.append(self.relpath(b))
-            else:
-                raise ValueError(f"File '{b}' is neither a file or directory.")
+        # Entries of scandir cache the file type from the directory listing,
+        # which avoid a separate stat call for each entry.
+        with os.scandir(self.abspath(path)) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    dirs.append(self.relpath(entry.path))
+                elif entry.is_file():
+                    files.append(self.relpath(entry.path))
+                else:
+                    raise ValueError(
+                        f"File '{entry.path}' is neither a file or directory."
+                    )
 
         return files, dirs
 
+    def walk(self, path: str) -> Iterator[str]:
+        """Recursively list all files under given path.
+
+        Args:
+            path (str): Path of directory we want to list files of.
+
+        Yields:
+            str: Path of each file, relative to :setting:`STORAGE_ROOT`.
+        """
+        stack = [self.abspath(path)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    else:
+                        yield self.relpath(entry.path)
+
     def mkdir(self, path: str, make_parents: bool = False) -> None:
         """Make a new directory at location
 
@@ -168,3 +296,29 @@ class LocalStorage(BaseStorage):
             bool: True/False if path is file or not.
         """
         return os.path.exists(self.abspath(path))
+
+    def etag(self, path: str) -> str:
+        """Get an identifier of the current version of a file.
+
+        Args:
+            path (str): Path of file we want to get the version of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            str: Modification time in nanoseconds and size of the file.
+        """
+        stat = os.stat(self.abspath(path))
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def local_path(self, path: str) -> Optional[str]:
+        """Get the path of a file on the local file system.
+
+        Args:
+            path (str): Path of file we want the local path of.
+
+        Returns:
+            Optional[str]: Absolute path of the file.
+        """
+        return self.abspath(path)
@@ -1,20 +1,47 @@
+import hashlib
+import io
 import logging
 import os
-from typing import List, Tuple, Union
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 from io import StringIO, BytesIO
+from gluepy.conf import default_settings
 from gluepy.files.storages.base import BaseStorage
 
 logger = logging.getLogger(__name__)
 
 
 class MemoryStorage(BaseStorage):
-    """In memory file storage, used for test suite
-    and other non production workloads.
+    """In memory file storage, used for test suite and as a fast
+    scratch storage for workloads that fit in memory.
+
+    Files are kept as immutable ``bytes`` in a flat index of absolute paths,
+    together with an index of the children of each directory, so that lookups
+    do not need to walk a tree. Use the ``MEMORY_STORAGE_MAX_BYTES`` setting
+    to cap the total size of stored files.
     """
 
     def __init__(self) -> None:
-        self.FILE_SYSTEM = dict()
         super().__init__()
+        self.FILES: Dict[str, bytes] = dict()
+        self.DIRECTORIES: Dict[str, Set[str]] = dict()
+        self.nbytes = 0
+        self.max_bytes: Optional[int] = getattr(
+            default_settings, "MEMORY_STORAGE_MAX_BYTES", None
+        )
+        self._lock = threading.RLock()
+
+    def _key(self, path: str) -> str:
+        """Get the normalized absolute path used to index files and directories"""
+        return os.path.normpath(self.abspath(path))
+
+    def _add_parents(self, key: str) -> None:
+        """Register key and all its parent directories in the directory index"""
+        parent = os.path.dirname(key)
+        while key != parent:
+            self.DIRECTORIES.setdefault(parent, set()).add(os.path.basename(key))
+            key, parent = parent, os.path.dirname(parent)
 
     def touch(self, file_path: str, content: Union[StringIO, BytesIO]) -> None:
         """Create a new blob at file path.
@@ -22,40 +49,102 @@ class MemoryStorage(BaseStorage):
         Args:
             file_path (str): Path to file we want to create
             content (Union[StringIO, BytesIO]): Content of file we want to generate
+
+        Raises:
+            MemoryError: Raised if the file would exceed ``MEMORY_STORAGE_MAX_BYTES``.
         """
-        if not self.exists(os.path.dirname(file_path)):
-            self.mkdir(os.path.dirname(file_path))
+        data = content.read()
+        data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
 
-        paths = self.abspath(file_path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for idx, path in enumerate(paths):
-            if path not in directory and idx < len(paths) - 1:
-                directory[path] = dict()
+        key = self._key(file_path)
+        with self._lock:
+            if key in self.DIRECTORIES:
+                raise IsADirectoryError(f"Path '{file_path}' is a directory.")
 
-            if idx == len(paths) - 1:
-                directory[path] = content
-            else:
-                directory = directory[path]
+            nbytes = self.nbytes - len(self.FILES.get(key, b"")) + len(data)
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                raise MemoryError(
+                    f"Writing '{file_path}' would exceed the memory storage limit "
+                    f"of {self.max_bytes} bytes."
+                )
+
+            self.FILES[key] = data
+            self.nbytes = nbytes
+            self._add_parents(key)
 
     def open(self, file_path: str, mode: str = "rb") -> Union[str, bytes]:
         """Opens a blob at file_path
 
+        The stored bytes are immutable and returned without being copied.
+
         Args:
             file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
 
         Raises:
-            NotImplementedError: Base class raise NotImplementedError
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            Union[str, bytes]: Returns the string or byte content of the file.
         """
-        paths = self.abspath(file_path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for idx, path in enumerate(paths):
-            if path not in directory:
-                raise FileNotFoundError
+        try:
+            data = self.FILES[self._key(file_path)]
+        except KeyError:
+            raise FileNotFoundError(f"File '{file_path}' does not exist.")
+
+        return data if "b" in mode else data.decode("utf-8")
+
+    @contextmanager
+    def open_stream(
+        self, file_path: str, mode: str = "rb"
+    ) -> Iterator[Union[io.BufferedIOBase, io.TextIOBase]]:
+        """Opens a blob at file_path as a file object over the stored bytes.
 
-            if idx == len(paths) - 1:
-                return directory[path].read()
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Yields:
+            Union[io.BufferedIOBase, io.TextIOBase]: File object of the blob.
+        """
+        # BytesIO initialized with bytes share the buffer until written to.
+        stream = self._wrap_stream(BytesIO(self.open(file_path)), mode)
+        try:
+            yield stream
+        finally:
+            stream.close()
 
-            directory = directory[path]
+    def read_range(self, file_path: str, start: int, length: int) -> bytes:
+        """Read a range of bytes of a file without reading the entire file.
+
+        Args:
+            file_path (str): File path of blob we want to read from.
+            start (int): Offset in bytes of the first byte to read.
+            length (int): Number of bytes to read.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            bytes: Bytes of the range, shorter than length if the range extend
+              beyond the end of the file.
+        """
+        stop = start + length
+        return self.open(file_path)[start:stop]
+
+    def size(self, file_path: str) -> int:
+        """Get the size of a file in bytes.
+
+        Args:
+            file_path (str): File path of blob we want the size of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            int: Size of the file in bytes.
+        """
+        return len(self.open(file_path))
 
     def rm(self, path: str, recursive: bool = False) -> None:
         """Delete a file
@@ -63,24 +152,37 @@ class MemoryStorage(BaseStorage):
         Args:
             path (str): Path to file to delete
             recursive (bool): If allowed to delete recursive directories or not.
+
+        Raises:
+            FileNotFoundError: Raised if the path does not exist.
+            ValueError: Raised if path is a non empty directory and not recursive.
         """
-        paths = self.abspath(path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for idx, path in enumerate(paths):
-            if path not in directory:
-                raise FileNotFoundError
-
-            if idx == len(paths) - 1:
-                if (
-                    isinstance(directory[path], dict)
-                    and not recursive
-                    and directory[path]
-                ):
+        key = self._key(path)
+        with self._lock:
+            if key in self.FILES:
+                self.nbytes -= len(self.FILES.pop(key))
+            elif key in self.DIRECTORIES:
+                if self.DIRECTORIES[key] and not recursive:
                     raise ValueError("Trying to delete directory without recursive")
-                del directory[path]
-                return
-
-            directory = directory[path]
+                self._rm_directory(key)
+            else:
+                raise FileNotFoundError(f"Path '{path}' does not exist.")
+
+            parent = os.path.dirname(key)
+            if parent in self.DIRECTORIES:
+                self.DIRECTORIES[parent].discard(os.path.basename(key))
+
+    def _rm_directory(self, key: str) -> None:
+        """Remove a directory and all its children from the indexes"""
+        stack = [key]
+        while stack:
+            dir_key = stack.pop()
+            for name in self.DIRECTORIES.pop(dir_key):
+                child = os.path.join(dir_key, name)
+                if child in self.FILES:
+                    self.nbytes -= len(self.FILES.pop(child))
+                else:
+                    stack.append(child)
 
     def cp(
         self,
@@ -88,14 +190,20 @@ class MemoryStorage(BaseStorage):
         dest_path: str,
         recursive: bool = False,
         overwrite: bool = False,
-    ) -> None:
+    ) -> dict:
         """Copy a file from source to destination
 
+        The immutable bytes are shared between source and destination.
+
         Args:
             src_path (str): Path to file or directory to copy.
             dest_path (str): Path to file or directory to copy to.
             recursive (bool): If should copy sub directories as well.
             overwrite (bool): If should copy to destination that already exists.
+
+        Returns:
+            dict: Summary of the copy with the number of ``files`` and ``bytes``
+              copied.
         """
         if self.isdir(src_path) and not recursive:
             raise ValueError(f"recursive must be True if '{src_path}' is a directory")
@@ -103,16 +211,32 @@ class MemoryStorage(BaseStorage):
             raise FileExistsError(
                 f"'{dest_path}' already exists and overwrite is False"
             )
-        if not self.exists(os.path.dirname(dest_path)):
-            self.mkdir(os.path.dirname(dest_path))
-
-        contents = self.open(src_path)
-        contents = (
-            StringIO(contents.decode("utf-8"))
-            if isinstance(contents, bytes)
-            else StringIO(contents)
-        )
-        self.touch(dest_path, contents)
+
+        src_key, dest_key = self._key(src_path), self._key(dest_path)
+        if src_key in self.FILES:
+            pairs = [(src_key, dest_key)]
+        else:
+            pairs = [
+                (key, os.path.join(dest_key, os.path.relpath(key, src_key)))
+                for key in map(self._key, self.walk(src_path))
+            ]
+
+        stats = {"files": 0, "bytes": 0}
+        with self._lock:
+            for src, dest in pairs:
+                data = self.FILES[src]
+                nbytes = self.nbytes - len(self.FILES.get(dest, b"")) + len(data)
+                if self.max_bytes is not None and nbytes > self.max_bytes:
+                    raise MemoryError(
+                        f"Copying '{src_path}' would exceed the memory storage limit "
+                        f"of {self.max_bytes} bytes."
+                    )
+                self.FILES[dest] = data
+                self.nbytes = nbytes
+                self._add_parents(dest)
+                stats["files"] += 1
+                stats["bytes"] += len(data)
+        return stats
 
     def ls(self, path: str) -> Tuple[List[str], List[str]]:
         """List all files and directories at given path.
@@ -120,36 +244,49 @@ class MemoryStorage(BaseStorage):
         Args:
             path (str): Path where we want to list contents of
 
+        Raises:
+            FileNotFoundError: Raised if the path does not exist.
+
         Returns:
             Tuple[List[str], List[str]]:
               First list is files, second list is directories.
         """
-        paths = self.abspath(path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for idx, path in enumerate(paths):
-            if path not in directory:
-                raise FileNotFoundError
+        key = self._key(path)
+        if key in self.FILES:
+            return ([os.path.basename(key)], [])
+        if key not in self.DIRECTORIES:
+            raise FileNotFoundError(f"Path '{path}' does not exist.")
+
+        files, dirs = [], []
+        for name in self.DIRECTORIES[key]:
+            if os.path.join(key, name) in self.FILES:
+                files.append(name)
+            else:
+                dirs.append(name)
+        return sorted(files), sorted(dirs)
 
-            if idx == len(paths) - 1:
-                # Its a file, ls return nothing
-                if not isinstance(directory[path], dict):
-                    return ([path], [])
+    def walk(self, path: str) -> Iterator[str]:
+        """Recursively list all files under given path.
 
-                else:
-                    return (
-                        [
-                            child
-                            for child in directory[path]
-                            if self.isfile(os.path.join(path, child))
-                        ],
-                        [
-                            child
-                            for child in directory[path]
-                            if self.isdir(os.path.join(path, child))
-                        ],
-                    )
+        Args:
+            path (str): Path of directory we want to list files of.
 
-            directory = directory[path]
+        Yields:
+            str: Path of each file, relative to :setting:`STORAGE_ROOT`.
+        """
+        key = self._key(path)
+        if key not in self.DIRECTORIES:
+            raise FileNotFoundError(f"Directory '{path}' does not exist.")
+
+        stack = [key]
+        while stack:
+            dir_key = stack.pop()
+            for name in sorted(self.DIRECTORIES.get(dir_key, ())):
+                child = os.path.join(dir_key, name)
+                if child in self.FILES:
+                    yield self.relpath(child)
+                else:
+                    stack.append(child)
 
     def mkdir(self, path: str, make_parents: bool = False) -> None:
         """Make a new directory at location
@@ -159,13 +296,12 @@ class MemoryStorage(BaseStorage):
             make_parents (bool, optional): If we should generate parents
             folders as well. Defaults to False.
         """
-        paths = self.abspath(path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for path in paths:
-            if path not in directory:
-                directory[path] = dict()
-
-            directory = directory[path]
+        key = self._key(path)
+        with self._lock:
+            if key in self.FILES:
+                raise FileExistsError(f"Path '{path}' is a file.")
+            self.DIRECTORIES.setdefault(key, set())
+            self._add_parents(key)
 
     def isdir(self, path: str) -> bool:
         """Check if path is directory or not.
@@ -173,19 +309,15 @@ class MemoryStorage(BaseStorage):
         Args:
             path (str): Path we want to check
 
+        Raises:
+            FileNotFoundError: Raised if the path does not exist.
+
         Returns:
             bool: True/False if path is directory or not
         """
-        paths = self.abspath(path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for idx, path in enumerate(paths):
-            if path not in directory:
-                raise FileNotFoundError
-
-            if idx == len(paths) - 1:
-                return isinstance(directory[path], dict)
-
-            directory = directory[path]
+        if not self.exists(path):
+            raise FileNotFoundError(f"Path '{path}' does not exist.")
+        return self._key(path) in self.DIRECTORIES
 
     def isfile(self, path: str) -> bool:
         """Check if path is a file or not.
@@ -193,19 +325,15 @@ class MemoryStorage(BaseStorage):
         Args:
             path (str): Path we want to check
 
+        Raises:
+            FileNotFoundError: Raised if the path does not exist.
+
         Returns:
             bool: True/False if path is file or not.
         """
-        paths = self.abspath(path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for idx, path in enumerate(paths):
-            if path not in directory:
-                raise FileNotFoundError
-
-            if idx == len(paths) - 1:
-                return not isinstance(directory[path], dict)
-
-            directory = directory[path]
+        if not self.exists(path):
+            raise FileNotFoundError(f"Path '{path}' does not exist.")
+        return self._key(path) in self.FILES
 
     def exists(self, path: str) -> bool:
         """Check if path exists or not.
@@ -216,12 +344,19 @@ class MemoryStorage(BaseStorage):
         Returns:
             bool: True/False if path is file or not.
         """
-        paths = self.abspath(path).split(self.separator)
-        directory = self.FILE_SYSTEM
-        for path in paths:
-            if path not in directory:
-                return False
+        key = self._key(path)
+        return key in self.FILES or key in self.DIRECTORIES
+
+    def etag(self, path: str) -> str:
+        """Get an identifier of the current version of a file.
+
+        Args:
+            path (str): Path of file we want to get the version of.
 
-            directory = directory[path]
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
 
-        return True
+        Returns:
+            str: MD5 checksum of the file content.
+        """
+        return hashlib.md5(self.open(path)).hexdigest()
@@ -0,0 +1,165 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+
+class MetadataCache:
+    """Per-process cache of path metadata lookups such as ``exists()``,
+    ``isdir()`` and ``isfile()``, with a time to live.
+
+    Both positive and negative lookups are cached. Storage backends keep the
+    cache up to date when they modify paths themselves, while changes made by
+    other processes are picked up once entries expire.
+
+    Entries are indexed by path and by each of the parent directories of the
+    path, so that invalidating a path only visit the entries it affect. Once
+    more than ``max_entries`` paths are cached, the least recently used paths
+    are dropped.
+
+    Args:
+        ttl (float): Number of seconds an entry is valid for.
+        separator (str): Separator used by the paths of the storage backend.
+        max_entries (int): Maximum number of paths to cache.
+    """
+
+    def __init__(
+        self, ttl: float, separator: str = "/", max_entries: int = 100_000
+    ) -> None:
+        self.ttl = ttl
+        self.separator = separator
+        self.max_entries = max_entries
+        # Lookup results of each path, least recently used first.
+        self._entries: "OrderedDict[str, Dict[str, Tuple[float, bool]]]" = OrderedDict()
+        # Cached paths by path without trailing separator, e.g. "a" and "a/".
+        self._aliases: Dict[str, Set[str]] = dict()
+        # Cached paths by each of their parent directories.
+        self._children: Dict[str, Set[str]] = dict()
+        self._lock = threading.Lock()
+
+    def _parents(self, key: str) -> Iterator[str]:
+        """Iterate the parent directories of a path without trailing separator"""
+        pos = key.rfind(self.separator)
+        while pos >= 0:
+            key = key[:pos]
+            yield key
+            pos = key.rfind(self.separator)
+
+    def _drop(self, path: str) -> None:
+        """Drop all entries of a cached path, the lock must be held"""
+        if self._entries.pop(path, None) is None:
+            return
+        key = path.rstrip(self.separator)
+        for index, parent in [(self._aliases, key)] + [
+            (self._children, parent) for parent in self._parents(key)
+        ]:
+            paths = index.get(parent)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del index[parent]
+
+    def get(self, name: str, path: str) -> Optional[bool]:
+        """Get a cached lookup result.
+
+        Args:
+            name (str): Name of the lookup, e.g. ``"exists"``.
+            path (str): Path the lookup was made for.
+
+        Returns:
+            Optional[bool]: Cached result, or None if missing or expired.
+        """
+        with self._lock:
+            lookups = self._entries.get(path)
+            entry = lookups.get(name) if lookups is not None else None
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def set(self, name: str, path: str, value: bool) -> None:
+        """Cache the result of a lookup.
+
+        Args:
+            name (str): Name of the lookup, e.g. ``"exists"``.
+            path (str): Path the lookup was made for.
+            value (bool): Result of the lookup.
+        """
+        with self._lock:
+            lookups = self._entries.get(path)
+            if lookups is None:
+                lookups = self._entries[path] = dict()
+                key = path.rstrip(self.separator)
+                self._aliases.setdefault(key, set()).add(path)
+                for parent in self._parents(key):
+                    self._children.setdefault(parent, set()).add(path)
+            else:
+                self._entries.move_to_end(path)
+            lookups[name] = (time.monotonic() + self.ttl, value)
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, path: str) -> None:
+        """Drop all entries of a path, its parent directories and its children.
+
+        Args:
+            path (str): Path that was modified.
+        """
+        target = path.rstrip(self.separator)
+        with self._lock:
+            paths = set(self._aliases.get(target, ()))
+            paths.update(self._children.get(target, ()))
+            for parent in self._parents(target):
+                paths.update(self._aliases.get(parent, ()))
+            for other in paths:
+                self._drop(other)
+
+    def add_file(self, path: str) -> None:
+        """Update the cache after a file was written at path"""
+        self.invalidate(path)
+        self.set("exists", path, True)
+        self.set("isfile", path, True)
+        self.set("isdir", path, False)
+
+    def add_dir(self, path: str) -> None:
+        """Update the cache after a directory was created at path"""
+        self.invalidate(path)
+        self.set("exists", path, True)
+        self.set("isfile", path, False)
+        self.set("isdir", path, True)
+
+    def remove(self, path: str) -> None:
+        """Update the cache after the file or directory at path was deleted"""
+        self.invalidate(path)
+        self.set("exists", path, False)
+        self.set("isfile", path, False)
+        self.set("isdir", path, False)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self._children.clear()
+
+
+def cached_metadata(func: Callable[..., bool]) -> Callable[..., bool]:
+    """Decorate a storage method that take a path and return a boolean, to
+    cache its result in the ``metadata_cache`` of the storage if enabled.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, path: str) -> bool:
+        cache: Optional[MetadataCache] = getattr(self, "metadata_cache", None)
+        if cache is None:
+            return func(self, path)
+
+        value = cache.get(func.__name__, path)
+        if value is None:
+            value = func(self, path)
+            cache.set(func.__name__, path, value)
+        return value
+
+    return wrapper
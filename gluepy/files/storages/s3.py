@@ -1,6 +1,8 @@
+import io
 import os
 import logging
-from typing import List, Tuple, Union
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple, Union
 from pathlib import Path
 from io import StringIO, BytesIO
 from gluepy.conf import default_settings
@@ -8,11 +10,13 @@ from gluepy.exceptions import BootstrapError
 
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.client import Config
     from botocore.exceptions import ClientError
 except ImportError as e:
     raise BootstrapError("Could not load Boto3's S3 bindings. %s" % e)
-from gluepy.files.storages.base import BaseStorage
+from gluepy.files.storages.base import BaseStorage, RangedReader
+from gluepy.files.storages.metadata import MetadataCache, cached_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,7 @@ class S3Storage(BaseStorage):
     AWS S3 or DigitalOcean Spaces.
     """
 
+    separator = "/"
     MAX_CHUNK_SIZE = 32_000_000
 
     def __init__(self, *args, **kwargs):
@@ -38,10 +43,32 @@ class S3Storage(BaseStorage):
             proxies=None,
         )
         self.verify = True
+        self.transfer_config = TransferConfig(
+            multipart_threshold=getattr(
+                default_settings, "AWS_S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024
+            ),
+            multipart_chunksize=getattr(
+                default_settings, "AWS_S3_MULTIPART_CHUNKSIZE", self.MAX_CHUNK_SIZE
+            ),
+            max_concurrency=getattr(default_settings, "AWS_S3_MAX_CONCURRENCY", 10),
+            use_threads=True,
+        )
         self.access_key, self.secret_key = (
             default_settings.AWS_ACCESS_KEY_ID,
             default_settings.AWS_SECRET_ACCESS_KEY,
         )
+        ttl = getattr(default_settings, "STORAGE_METADATA_CACHE_TTL", None)
+        self.metadata_cache = (
+            MetadataCache(
+                ttl,
+                self.separator,
+                getattr(
+                    default_settings, "STORAGE_METADATA_CACHE_MAX_ENTRIES", 100_000
+                ),
+            )
+            if ttl
+            else None
+        )
 
     @property
     def connection(self):
@@ -72,40 +99,158 @@ class S3Storage(BaseStorage):
     def touch(self, file_path: str, content: Union[StringIO, BytesIO]) -> None:
         """Create a new blob at file path.
 
+        Content larger than ``AWS_S3_MULTIPART_THRESHOLD`` is uploaded in parts
+        of ``AWS_S3_MULTIPART_CHUNKSIZE`` bytes using up to
+        ``AWS_S3_MAX_CONCURRENCY`` threads.
+
         Args:
             file_path (str): Path to file we want to create
             content (Union[StringIO, BytesIO]): Content of file we want to generate
-
-        Raises:
-            NotImplementedError: Base class raise NotImplementedError
         """
-        if isinstance(content, StringIO):
-            content = self._to_bytes(content)
+        if content.seekable():
+            content.seek(0, os.SEEK_SET)
         obj = self.bucket.Object(file_path)
-        content.seek(0, os.SEEK_SET)
-        obj.upload_fileobj(content)
+        obj.upload_fileobj(self._to_bytes_stream(content), Config=self.transfer_config)
+        if self.metadata_cache is not None:
+            self.metadata_cache.add_file(file_path)
         return file_path
 
     def open(self, file_path: str, mode: str = "rb") -> Union[str, bytes]:
         """Opens a blob at file_path
 
+        Objects larger than ``AWS_S3_MULTIPART_CHUNKSIZE`` are downloaded in
+        ranges of that size using up to ``AWS_S3_MAX_CONCURRENCY`` threads.
+
         Args:
             file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
 
         Raises:
-            NotImplementedError: Base class raise NotImplementedError
+            FileNotFoundError: Raised if the object does not exist.
+
+        Returns:
+            Union[str, bytes]: Returns the string or byte content of the file.
         """
         logger.debug(f"Reading file from path '{file_path}'")
-        obj = self.bucket.Object(file_path)
-        handler = BytesIO()
-        obj.download_fileobj(handler)
-        handler.seek(0, os.SEEK_SET)
-        return (
-            handler.read()
-            if "b" in mode
-            else handler.read().decode("utf-8", errors="ignore")
+        part_size = self.transfer_config.multipart_chunksize
+        try:
+            response = self._get_range(file_path, 0, part_size)
+        except ClientError as exc:
+            code = exc.response.get("Error", {}).get("Code")
+            if code == "InvalidRange":
+                # Ranged requests of empty objects are not satisfiable.
+                return b"" if "b" in mode else ""
+            if code in {"NoSuchKey", "404"}:
+                raise FileNotFoundError(f"File '{file_path}' does not exist.") from exc
+            raise
+
+        content = response["Body"].read()
+        content_range = response.get("ContentRange")
+        size = int(content_range.split("/")[-1]) if content_range else len(content)
+        if size > len(content):
+            content = self._download_parts(
+                size,
+                lambda start, end: self._get_range(
+                    file_path, start, end, IfMatch=response["ETag"]
+                )["Body"].read(),
+                part_size=part_size,
+                max_workers=self.transfer_config.max_concurrency,
+                head=content,
+            )
+
+        return content if "b" in mode else content.decode("utf-8", errors="ignore")
+
+    def _get_range(self, file_path: str, start: int, end: int, **kwargs) -> dict:
+        """Get the bytes between ``start`` (inclusive) and ``end`` (exclusive)"""
+        return self.connection.meta.client.get_object(
+            Bucket=default_settings.AWS_STORAGE_BUCKET_NAME,
+            Key=file_path,
+            Range=f"bytes={start}-{end - 1}",
+            **kwargs,
         )
 
+    @contextmanager
+    def open_stream(
+        self, file_path: str, mode: str = "rb"
+    ) -> Iterator[Union[io.BufferedIOBase, io.TextIOBase]]:
+        """Opens a blob at file_path as a file object that fetch byte ranges
+        of the object on demand.
+
+        Args:
+            file_path (str): File path of blob we want to open
+            mode (str): The read mode of the file, if should return string or bytes.
+
+        Raises:
+            FileNotFoundError: Raised if the object does not exist.
+
+        Yields:
+            Union[io.BufferedIOBase, io.TextIOBase]: File object of the blob.
+        """
+        logger.debug(f"Streaming file from path '{file_path}'")
+        obj = self.bucket.Object(file_path)
+        try:
+            size = obj.content_length
+        except ClientError as exc:
+            raise FileNotFoundError(f"File '{file_path}' does not exist.") from exc
+
+        def fetch(start: int, end: int) -> bytes:
+            return obj.get(Range=f"bytes={start}-{end - 1}")["Body"].read()
+
+        stream = self._wrap_stream(RangedReader(size, fetch), mode)
+        try:
+            yield stream
+        finally:
+            stream.close()
+
+    def read_range(self, file_path: str, start: int, length: int) -> bytes:
+        """Read a range of bytes of a file using a ranged ``GetObject`` request.
+
+        Args:
+            file_path (str): File path of blob we want to read from.
+            start (int): Offset in bytes of the first byte to read.
+            length (int): Number of bytes to read.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            bytes: Bytes of the range, shorter than length if the range extend
+              beyond the end of the file.
+        """
+        if length <= 0:
+            return b""
+        try:
+            response = self._get_range(file_path, start, start + length)
+        except ClientError as exc:
+            code = exc.response.get("Error", {}).get("Code")
+            if code == "InvalidRange":
+                # Ranges starting after the end of the object are not satisfiable.
+                return b""
+            if code in {"NoSuchKey", "404"}:
+                raise FileNotFoundError(f"File '{file_path}' does not exist.") from exc
+            raise
+        return response["Body"].read()
+
+    def size(self, file_path: str) -> int:
+        """Get the size of a file in bytes.
+
+        Args:
+            file_path (str): File path of blob we want the size of.
+
+        Raises:
+            FileNotFoundError: Raised if the file does not exist.
+
+        Returns:
+            int: Size of the file in bytes.
+        """
+        try:
+            response = self.connection.meta.client.head_object(
+                Bucket=default_settings.AWS_STORAGE_BUCKET_NAME, Key=file_path
+            )
+        except ClientError as exc:
+            raise FileNotFoundError(f"File '{file_path}' does not exist.") from exc
+        return response["ContentLength"]
+
     def ls(self, path: str) -> Tuple[List[str], List[str]]:
         """List all files and directories at given path.
 
@@ -140,7 +285,23 @@ class S3Storage(BaseStorage):
                 key = entry["Key"]
                 if key != path:
                     files.append(self.relpath(key))
-        return directories, files
+        return files, directories
+
+    def walk(self, path: str) -> Iterator[str]:
+        """Recursively list all files under given path.
+
+        Objects are listed lazily one page of 1000 keys at a time.
+
+        Args:
+            path (str): Path of directory we want to list files of.
+
+        Yields:
+            str: Key of each object.
+        """
+        for page in self._list_pages(path.rstrip("/") + "/"):
+            for entry in page.get("Contents", ()):
+                if not entry["Key"].endswith("/"):
+                    yield entry["Key"]
 
     def mkdir(self, path: str, make_parents: bool = False) -> None:
         """Make a new directory at location
@@ -154,18 +315,62 @@ class S3Storage(BaseStorage):
             NotImplementedError: Base class raise NotImplementedError
         """
         self.touch(str(Path(path) / ".empty"))
+        if self.metadata_cache is not None:
+            self.metadata_cache.add_dir(path)
 
     def rm(self, path: str, recursive: bool = False) -> None:
         """Delete a file
 
+        Recursive deletes list the directory in pages of 1000 keys and delete
+        each page with a single ``DeleteObjects`` request, running up to
+        ``AWS_S3_MAX_CONCURRENCY`` requests concurrently.
+
         Args:
             path (str): Path to file to delete
             recursive (bool): If allowed to delete recursive directories or not.
 
         """
-        if recursive:
-            raise NotImplementedError("`recursive` not supported")
-        self.bucket.Object(path).delete()
+        if not recursive:
+            self.bucket.Object(path).delete()
+        else:
+            pages = self._list_pages(path.rstrip("/") + "/")
+            self._run_concurrently(
+                self._delete_keys,
+                (
+                    [entry["Key"] for entry in page["Contents"]]
+                    for page in pages
+                    if page.get("Contents")
+                ),
+                max_workers=self.transfer_config.max_concurrency,
+            )
+
+        if self.metadata_cache is not None:
+            self.metadata_cache.remove(path)
+
+    def _list_pages(self, prefix: str) -> Iterator[dict]:
+        """Lazily list all objects under prefix in pages of up to 1000 keys"""
+        paginator = self.connection.meta.client.get_paginator("list_objects_v2")
+        return iter(
+            paginator.paginate(
+                Bucket=default_settings.AWS_STORAGE_BUCKET_NAME,
+                Prefix=prefix,
+                PaginationConfig={"PageSize": 1000},
+            )
+        )
+
+    def _delete_keys(self, keys: List[str]) -> None:
+        """Delete up to 1000 keys in a single request"""
+        logger.debug(f"Deleting {len(keys)} objects.")
+        response = self.connection.meta.client.delete_objects(
+            Bucket=default_settings.AWS_STORAGE_BUCKET_NAME,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+        errors = response.get("Errors", [])
+        if errors:
+            raise OSError(
+                f"Failed to delete {len(errors)} objects, first error on "
+                f"'{errors[0]['Key']}': {errors[0].get('Message')}"
+            )
 
     def cp(
         self,
@@ -173,64 +378,162 @@ class S3Storage(BaseStorage):
         dest_path: str,
         recursive: bool = False,
         overwrite: bool = False,
-    ) -> None:
+    ) -> dict:
         """Copy a file from source to destination
 
+        Objects are copied server side without passing through this machine.
+        Recursive copies list the source directory and copy up to
+        ``AWS_S3_MAX_CONCURRENCY`` objects concurrently, and objects larger than
+        ``AWS_S3_MULTIPART_THRESHOLD`` are copied in parts.
+
         Args:
             src_path (str): Path to file or directory to copy.
             dest_path (str): Path to file or directory to copy to.
             recursive (bool): If should copy sub directories as well.
             overwrite (bool): If should copy to destination that already exists.
+
+        Raises:
+            FileNotFoundError: Raised if the source object does not exist.
+            FileExistsError: Raised if the destination exist and overwrite is False.
+
+        Returns:
+            dict: Summary of the copy with the number of ``files`` and ``bytes``
+              copied.
         """
-        if recursive or overwrite:
-            raise NotImplementedError("`recursive` and `overwrite` not supported.")
+        client = self.connection.meta.client
+        bucket = default_settings.AWS_STORAGE_BUCKET_NAME
+        if not recursive:
+            if not overwrite and self.exists(dest_path):
+                raise FileExistsError(
+                    f"'{dest_path}' already exists and overwrite is False"
+                )
+            try:
+                size = client.head_object(Bucket=bucket, Key=src_path)["ContentLength"]
+            except ClientError as exc:
+                raise FileNotFoundError(f"File '{src_path}' does not exist.") from exc
+            self._copy_key((src_path, dest_path, size))
+            if self.metadata_cache is not None:
+                self.metadata_cache.add_file(dest_path)
+            return {"files": 1, "bytes": size}
+
+        src_prefix = src_path.rstrip("/") + "/"
+        dest_prefix = dest_path.rstrip("/") + "/"
+        if not overwrite and client.list_objects_v2(
+            Bucket=bucket, Prefix=dest_prefix, MaxKeys=1
+        ).get("Contents"):
+            raise FileExistsError(
+                f"'{dest_path}' already exists and overwrite is False"
+            )
 
-        self.touch(dest_path, self.open(src_path))
+        sizes = self._run_concurrently(
+            self._copy_key,
+            (
+                (
+                    entry["Key"],
+                    dest_prefix + entry["Key"].removeprefix(src_prefix),
+                    entry["Size"],
+                )
+                for page in self._list_pages(src_prefix)
+                for entry in page.get("Contents", ())
+            ),
+            max_workers=self.transfer_config.max_concurrency,
+        )
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(dest_path)
+        stats = {"files": len(sizes), "bytes": sum(sizes)}
+        logger.info(
+            f"Copied {stats['files']} files ({stats['bytes']} bytes) "
+            f"from '{src_path}' to '{dest_path}'."
+        )
+        return stats
+
+    def _copy_key(self, item: Tuple[str, str, int]) -> int:
+        """Copy an object server side given a tuple of source key,
+        destination key and size of object"""
+        src_key, dest_key, size = item
+        client = self.connection.meta.client
+        bucket = default_settings.AWS_STORAGE_BUCKET_NAME
+        logger.debug(f"Copying '{src_key}' to '{dest_key}'.")
+        if size > self.transfer_config.multipart_threshold:
+            client.copy(
+                {"Bucket": bucket, "Key": src_key},
+                bucket,
+                dest_key,
+                Config=self.transfer_config,
+            )
+        else:
+            client.copy_object(
+                CopySource={"Bucket": bucket, "Key": src_key},
+                Bucket=bucket,
+                Key=dest_key,
+            )
+        return size
 
+    @cached_metadata
     def isdir(self, path: str) -> bool:
         """Check if path is directory or not.
 
         Args:
             path (str): Path we want to check
 
-        Raises:
-            NotImplementedError: Base class raise NotImplementedError
-
         Returns:
             bool: True/False if path is directory or not
         """
-        raise NotImplementedError()
+        response = self.connection.meta.client.list_objects_v2(
+            Bucket=default_settings.AWS_STORAGE_BUCKET_NAME,
+            Prefix=path.rstrip("/") + "/",
+            MaxKeys=1,
+        )
+        return bool(response.get("Contents"))
 
+    @cached_metadata
     def isfile(self, path: str) -> bool:
         """Check if path is a file or not.
 
         Args:
             path (str): Path we want to check
 
-        Raises:
-            NotImplementedError: Base class raise NotImplementedError
-
         Returns:
             bool: True/False if path is file or not.
         """
-        raise NotImplementedError()
+        if path.endswith("/"):
+            return False
+        try:
+            self.connection.meta.client.head_object(
+                Bucket=default_settings.AWS_STORAGE_BUCKET_NAME, Key=path
+            )
+            return True
+        except ClientError:
+            return False
 
+    @cached_metadata
     def exists(self, path: str) -> bool:
         """Check if path exists or not.
 
         Args:
             path (str): Path we want to check
 
+        Returns:
+            bool: True/False if path is file or not.
+        """
+        return self.isfile(path) or self.isdir(path)
+
+    def etag(self, path: str) -> str:
+        """Get an identifier of the current version of a file.
+
+        Args:
+            path (str): Path of file we want to get the version of.
+
         Raises:
-            NotImplementedError: Base class raise NotImplementedError
+            FileNotFoundError: Raised if the object does not exist.
 
         Returns:
-            bool: True/False if path is file or not.
+            str: ETag of the object.
         """
         try:
-            self.connection.meta.client.head_object(
+            response = self.connection.meta.client.head_object(
                 Bucket=default_settings.AWS_STORAGE_BUCKET_NAME, Key=path
             )
-            return True
-        except ClientError:
-            return False
+        except ClientError as exc:
+            raise FileNotFoundError(f"File '{path}' does not exist.") from exc
+        return response["ETag"].strip('"')
@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+# Function that measure the number of bytes transferred by a call, given the
+# return value and the arguments of the call.
+Measure = Callable[..., Optional[int]]
+
+
+class TraceRecorder:
+    """Recorder of spans of time, exported in the Chrome Trace Event format
+    that can be opened in https://ui.perfetto.dev or ``chrome://tracing``.
+
+    Spans are recorded as complete events of the thread and process that ran
+    them, so that tasks and storage calls that run concurrently are shown on
+    separate tracks, and spans that run within other spans are nested.
+
+    Attributes:
+        pid (int): ID of the process that started the recorder.
+    """
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._events: List[Dict[str, Any]] = []
+        self._threads = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[Dict[str, Any]]:
+        """Record the code run within the context as a span.
+
+        Args:
+            name (str): Name of the span.
+            category (str): Category of the span, such as ``"task"``.
+            **args: Arguments of the span, shown when the span is selected.
+
+        Yields:
+            Dict[str, Any]: Arguments of the span, that can be added to until
+              the context exits.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter_ns()
+            self._add(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start - self._origin) / 1000,
+                    "dur": (end - start) / 1000,
+                    "args": args,
+                }
+            )
+
+    def _add(self, event: Dict[str, Any]) -> None:
+        """Add an event of the current thread"""
+        pid, tid = os.getpid(), threading.get_native_id()
+        event.update(pid=pid, tid=tid)
+        with self._lock:
+            if (pid, tid) not in self._threads:
+                # Metadata events name the track of each thread.
+                self._threads.add((pid, tid))
+                self._events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": threading.current_thread().name},
+                    }
+                )
+            self._events.append(event)
+
+    def add_events(self, events: List[Dict[str, Any]]) -> None:
+        """Add events recorded by another recorder, such as the recorder of a
+        worker process.
+
+        Args:
+            events (List[Dict[str, Any]]): Events to add.
+        """
+        with self._lock:
+            self._events.extend(events)
+
+    def pop_events(self) -> List[Dict[str, Any]]:
+        """Remove and return the events recorded by the current process.
+
+        Processes forked from the process that started the recorder inherit
+        its events, which are not returned.
+
+        Returns:
+            List[Dict[str, Any]]: Events recorded by the current process.
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = [e for e in self._events if e["pid"] == pid]
+            self._events = [e for e in self._events if e["pid"] != pid]
+            self._threads = {t for t in self._threads if t[0] != pid}
+        return events
+
+    def to_json(self) -> str:
+        """Export the recorded events as a Chrome Trace Event JSON document.
+
+        Returns:
+            str: JSON document of all recorded events.
+        """
+        with self._lock:
+            events = list(self._events)
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+_recorder: Optional[TraceRecorder] = None
+
+
+def start_trace() -> TraceRecorder:
+    """Start recording spans of the current process.
+
+    Returns:
+        TraceRecorder: The active recorder.
+    """
+    global _recorder
+    _recorder = TraceRecorder()
+    return _recorder
+
+
+def stop_trace() -> Optional[TraceRecorder]:
+    """Stop recording spans.
+
+    Returns:
+        Optional[TraceRecorder]: The recorder that was active, if any.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def get_recorder() -> Optional[TraceRecorder]:
+    """Get the active recorder, or None if spans are not recorded"""
+    return _recorder
+
+
+@contextmanager
+def span(name: str, category: str, **args) -> Iterator[Dict[str, Any]]:
+    """Record the code run within the context as a span, if a recorder is active.
+
+    Args:
+        name (str): Name of the span.
+        category (str): Category of the span, such as ``"task"``.
+        **args: Arguments of the span.
+
+    Yields:
+        Dict[str, Any]: Arguments of the span.
+    """
+    recorder = _recorder
+    if recorder is None:
+        yield args
+        return
+
+    with recorder.span(name, category, **args) as span_args:
+        yield span_args
+
+
+@contextmanager
+def _traced_context(
+    recorder: TraceRecorder,
+    name: str,
+    category: str,
+    context: ContextManager,
+    measure: Optional[Measure],
+    span_args: Dict[str, Any],
+    *args,
+    **kwargs,
+) -> Iterator[Any]:
+    """Record a span from entering to exiting a context, measured with the
+    value of the context just before it exits"""
+    with recorder.span(name, category, **span_args) as span_args:
+        with context as value:
+            try:
+                yield value
+            finally:
+                nbytes = measure(value, *args, **kwargs) if measure else None
+                if nbytes is not None:
+                    span_args["bytes"] = nbytes
+
+
+def _traced_iter(
+    recorder: TraceRecorder,
+    name: str,
+    category: str,
+    iterator: Iterator[Any],
+    span_args: Dict[str, Any],
+) -> Iterator[Any]:
+    """Record a span from the first to the last item of an iterator"""
+    with recorder.span(name, category, **span_args):
+        yield from iterator
+
+
+def traced(category: str, measure: Optional[Measure] = None) -> Callable:
+    """Decorate a method to record each call as a span named after the method,
+    with the first argument of the call and the number of bytes transferred.
+
+    Spans of generator methods last until the generator is exhausted or
+    closed, and spans of context manager methods such as ``open_stream`` last
+    until the context exits, with the bytes measured on the value of the
+    context just before it exits.
+
+    Args:
+        category (str): Category of the spans, such as ``"storage"``.
+        measure (Optional[Measure]): Function that return the number of bytes
+            transferred by a call, given its return value and arguments.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        params = list(inspect.signature(func).parameters)
+        arg_name = params[1] if len(params) > 1 else None
+        name = f"{category}.{func.__name__}"
+        is_generator = inspect.isgeneratorfunction(func)
+        # Functions decorated with ``contextmanager`` wrap a generator function.
+        is_context = inspect.isgeneratorfunction(getattr(func, "__wrapped__", None))
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return func(self, *args, **kwargs)
+
+            span_args = {}
+            value = args[0] if args else kwargs.get(arg_name)
+            if arg_name and value is not None:
+                span_args[arg_name] = str(value)
+            if is_generator:
+                return _traced_iter(
+                    recorder, name, category, func(self, *args, **kwargs), span_args
+                )
+            if is_context:
+                return _traced_context(
+                    recorder,
+                    name,
+                    category,
+                    func(self, *args, **kwargs),
+                    measure,
+                    span_args,
+                    *args,
+                    **kwargs,
+                )
+            with recorder.span(name, category, **span_args) as span_args:
+                result = func(self, *args, **kwargs)
+                nbytes = measure(result, *args, **kwargs) if measure else None
+                if nbytes is not None:
+                    span_args["bytes"] = nbytes
+            return result
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(
+    cls: type, category: str, methods: Dict[str, Optional[Measure]]
+) -> None:
+    """Decorate the methods that a class define with :func:`traced`.
+
+    Methods inherited by the class are left as is, they are decorated on the
+    class that define them.
+
+    Args:
+        cls (type): Class to decorate the methods of.
+        category (str): Category of the spans.
+        methods (Dict[str, Optional[Measure]]): Names of the methods to
+            decorate, and the function that measure bytes transferred by each.
+    """
+    for method, measure in methods.items():
+        func = cls.__dict__.get(method)
+        if callable(func) and not getattr(func, "__traced__", False):
+            setattr(cls, method, traced(category, measure)(func))
+
+
+def read_bytes(result: Any, *args, **kwargs) -> Optional[int]:
+    """Measure the bytes read by a call that return the content it read"""
+    return len(result) if isinstance(result, (bytes, bytearray, str)) else None
+
+
+def written_bytes(result: Any, *args, **kwargs) -> Optional[int]:
+    """Measure the bytes written by a call that read a content stream to its end"""
+    content = args[1] if len(args) > 1 else kwargs.get("content")
+    try:
+        return content.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def streamed_bytes(result: Any, *args, **kwargs) -> Optional[int]:
+    """Measure the bytes read from a stream by the position of the stream"""
+    try:
+        # Text streams only have an opaque position, unlike their buffer.
+        return getattr(result, "buffer", result).tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def copied_bytes(result: Any, *args, **kwargs) -> Optional[int]:
+    """Measure the bytes copied by a call that return a summary of the copy"""
+    return result.get("bytes") if isinstance(result, dict) else None
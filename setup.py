@@ -18,6 +18,8 @@ requirements_dev = read_requirements("dev.txt")
 requirements_digitalocean = read_requirements("digitalocean.txt")
 requirements_gcp = read_requirements("gcp.txt")
 requirements_celery = read_requirements("celery.txt")
+requirements_polars = read_requirements("polars.txt")
+requirements_duckdb = read_requirements("duckdb.txt")
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
@@ -48,10 +50,14 @@ setuptools.setup(
         + requirements_dev
         + requirements_digitalocean
         + requirements_gcp
-        + requirements_celery,
+        + requirements_celery
+        + requirements_polars
+        + requirements_duckdb,
         "digitalocean": requirements_base + requirements_digitalocean,
         "gcp": requirements_base + requirements_gcp,
         "celery": requirements_base + requirements_celery,
+        "polars": requirements_base + requirements_polars,
+        "duckdb": requirements_base + requirements_duckdb,
     },
     entry_points="""
         [console_scripts]
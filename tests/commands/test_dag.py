@@ -1,10 +1,12 @@
 import os
+import json
 import tempfile
+import uuid
 import yaml
 from io import StringIO
-from unittest import TestCase
+from unittest import TestCase, mock
 from gluepy.exec import Task, DAG, DAG_REGISTRY, TASK_REGISTRY
-from gluepy.commands.dag import run_dag
+from gluepy.commands.dag import TRACE_FOLDER, run_dag
 from gluepy.files.storages import default_storage
 
 
@@ -83,3 +85,148 @@ class DagCommandTestCase(TestCase):
             self.assertEqual(default_context.foo, 42)
         finally:
             os.unlink(local_path)
+
+
+class DagRetryTestCase(TestCase):
+    def setUp(self) -> None:
+        for k in list(DAG_REGISTRY.keys()):
+            del DAG_REGISTRY[k]
+        for k in list(TASK_REGISTRY.keys()):
+            del TASK_REGISTRY[k]
+
+        self.ran = []
+        self.should_fail = True
+        test = self
+
+        class FirstTask(Task):
+            label = "first"
+            outputs = ["first.txt"]
+
+            def run(self):
+                test.ran.append("first")
+                default_storage.touch(
+                    default_storage.runpath("first.txt"), StringIO("done")
+                )
+
+        class SecondTask(Task):
+            label = "second"
+
+            def run(self):
+                test.ran.append("second")
+                if test.should_fail:
+                    raise RuntimeError("task exploded")
+
+        class TestDAG(DAG):
+            label = "test_retry"
+            tasks = [FirstTask, SecondTask]
+
+        # Retry of a run folder that does not exist start a new run in it.
+        self.run_folder = os.path.join("runs", uuid.uuid4().hex)
+        return super().setUp()
+
+    def test_completion_marker(self):
+        self.should_fail = False
+        run_dag("test_retry", retry=self.run_folder)
+
+        marker = json.loads(
+            default_storage.open(
+                os.path.join(self.run_folder, "_markers", "first.json")
+            )
+        )
+        self.assertEqual(marker["task"], "FirstTask")
+        self.assertEqual(marker["outputs"], {"first.txt": 4})
+        self.assertGreaterEqual(marker["duration"], 0)
+        self.assertTrue(
+            default_storage.exists(
+                os.path.join(self.run_folder, "_markers", "second.json")
+            )
+        )
+
+    def test_retry_skips_completed_tasks(self):
+        with self.assertRaises(RuntimeError):
+            run_dag("test_retry", retry=self.run_folder)
+        self.should_fail = False
+        with mock.patch.object(
+            default_storage, "ls", wraps=default_storage.ls
+        ) as mock_ls:
+            run_dag("test_retry", retry=self.run_folder)
+
+        self.assertEqual(self.ran, ["first", "second", "second"])
+        mock_ls.assert_called_once()
+
+    def test_retry_from_task_ignores_markers(self):
+        self.should_fail = False
+        run_dag("test_retry", retry=self.run_folder)
+        run_dag("test_retry", retry=self.run_folder, from_task="first")
+        self.assertEqual(self.ran, ["first", "second", "first", "second"])
+
+
+class DagTraceTestCase(TestCase):
+    def setUp(self) -> None:
+        for k in list(DAG_REGISTRY.keys()):
+            del DAG_REGISTRY[k]
+        for k in list(TASK_REGISTRY.keys()):
+            del TASK_REGISTRY[k]
+
+        class WriteTask(Task):
+            label = "write"
+
+            def run(self):
+                default_storage.touch(
+                    default_storage.runpath("out.txt"), StringIO("done")
+                )
+
+        class TestDAG(DAG):
+            label = "test_trace"
+            tasks = [WriteTask]
+
+        # Retry of a run folder that does not exist start a new run in it.
+        self.run_folder = os.path.join("runs", uuid.uuid4().hex)
+        return super().setUp()
+
+    def read_trace(self) -> list:
+        return json.loads(
+            default_storage.open(os.path.join(self.run_folder, "trace.json"))
+        )["traceEvents"]
+
+    def test_trace(self):
+        run_dag("test_trace", retry=self.run_folder, trace=True)
+        events = [e for e in self.read_trace() if e["ph"] == "X"]
+        dag = next(e for e in events if e["cat"] == "dag")
+        task = next(e for e in events if e["name"] == "WriteTask")
+        touch = next(
+            e
+            for e in events
+            if e["name"] == "storage.touch"
+            and e["args"]["file_path"].endswith("out.txt")
+        )
+        self.assertEqual(dag["name"], "test_trace")
+        self.assertEqual(task["cat"], "task")
+        self.assertEqual(touch["args"]["bytes"], 4)
+        self.assertTrue(task["ts"] <= touch["ts"] <= task["ts"] + task["dur"])
+
+    def test_trace_merges_worker_traces(self):
+        event = {"name": "worker", "ph": "X", "cat": "task", "pid": 1, "tid": 1}
+        default_storage.touch(
+            os.path.join(self.run_folder, TRACE_FOLDER, "1.json"),
+            StringIO(json.dumps([event])),
+        )
+        run_dag("test_trace", retry=self.run_folder, trace=True)
+
+        self.assertIn(event, self.read_trace())
+        self.assertFalse(
+            default_storage.exists(os.path.join(self.run_folder, TRACE_FOLDER))
+        )
+
+    def test_trace_setting(self):
+        from gluepy.conf import default_settings
+
+        with mock.patch.object(default_settings, "DAG_TRACE", True, create=True):
+            run_dag("test_trace", retry=self.run_folder)
+        self.assertIn("WriteTask", [e["name"] for e in self.read_trace()])
+
+    def test_trace_disabled(self):
+        run_dag("test_trace", retry=self.run_folder)
+        self.assertFalse(
+            default_storage.exists(os.path.join(self.run_folder, "trace.json"))
+        )
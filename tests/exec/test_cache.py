@@ -0,0 +1,136 @@
+import uuid
+from io import StringIO
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.exec import Task, DAG, DAG_REGISTRY, TASK_REGISTRY
+from gluepy.exec.cache import TaskCache
+from gluepy.commands.dag import run_dag
+from gluepy.files.storages import default_storage
+
+
+class TaskCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        for k in list(DAG_REGISTRY.keys()):
+            del DAG_REGISTRY[k]
+        for k in list(TASK_REGISTRY.keys()):
+            del TASK_REGISTRY[k]
+        self.prefix = f"cache/{uuid.uuid4().hex}"
+        self.cache = TaskCache(self.prefix)
+        self.ran = []
+        ran = self.ran
+
+        class ProduceTask(Task):
+            cache = True
+            inputs = ["input.txt"]
+            outputs = ["output.txt", "output"]
+
+            def run(self):
+                ran.append(self.__class__)
+                content = default_storage.open(default_storage.runpath("input.txt"))
+                default_storage.touch(
+                    default_storage.runpath("output.txt"), StringIO(content.decode())
+                )
+                default_storage.touch(
+                    default_storage.runpath("output/part-0.txt"), StringIO("part")
+                )
+
+        class TestDAG(DAG):
+            label = "test"
+            tasks = [ProduceTask]
+
+        self.ProduceTask = ProduceTask
+        self.write_input("foo")
+        patcher = mock.patch.object(
+            default_settings, "TASK_CACHE_PREFIX", self.prefix, create=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return super().setUp()
+
+    def write_input(self, content: str) -> None:
+        default_storage.touch(default_storage.runpath("input.txt"), StringIO(content))
+
+    def remove_outputs(self) -> None:
+        default_storage.rm(default_storage.runpath("output.txt"))
+        default_storage.rm(default_storage.runpath("output"), recursive=True)
+
+    def test_run_dag_restores_outputs(self):
+        run_dag(label="test")
+        self.remove_outputs()
+        run_dag(label="test")
+
+        self.assertEqual(self.ran, [self.ProduceTask])
+        self.assertEqual(
+            default_storage.open(default_storage.runpath("output.txt")), b"foo"
+        )
+        self.assertTrue(
+            default_storage.exists(default_storage.runpath("output/part-0.txt"))
+        )
+
+    def test_run_dag_input_changed(self):
+        run_dag(label="test")
+        self.write_input("bar")
+        run_dag(label="test")
+
+        self.assertEqual(self.ran, [self.ProduceTask, self.ProduceTask])
+        self.assertEqual(
+            default_storage.open(default_storage.runpath("output.txt")), b"bar"
+        )
+
+    def test_run_dag_cache_disabled(self):
+        self.ProduceTask.cache = False
+        run_dag(label="test")
+        run_dag(label="test")
+        self.assertEqual(self.ran, [self.ProduceTask, self.ProduceTask])
+
+    def test_fingerprint_context_keys(self):
+        self.ProduceTask.context_keys = ["model.epochs"]
+        with mock.patch("gluepy.exec.cache.default_context") as mock_context:
+            mock_context.to_dict.return_value = {
+                "gluepy": {"run_id": "a"},
+                "model": {"epochs": 1, "name": "a"},
+            }
+            fingerprint = self.cache.fingerprint(self.ProduceTask)
+            mock_context.to_dict.return_value = {
+                "gluepy": {"run_id": "b"},
+                "model": {"epochs": 1, "name": "b"},
+            }
+            self.assertEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
+            mock_context.to_dict.return_value = {"model": {"epochs": 2}}
+            self.assertNotEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
+
+    def test_fingerprint_ignores_run_meta_data(self):
+        with mock.patch("gluepy.exec.cache.default_context") as mock_context:
+            mock_context.to_dict.return_value = {"gluepy": {"run_id": "a"}, "foo": 1}
+            fingerprint = self.cache.fingerprint(self.ProduceTask)
+            mock_context.to_dict.return_value = {"gluepy": {"run_id": "b"}, "foo": 1}
+            self.assertEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
+            mock_context.to_dict.return_value = {"gluepy": {"run_id": "b"}, "foo": 2}
+            self.assertNotEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
+
+    def test_fingerprint_missing_input(self):
+        self.ProduceTask.inputs = ["missing.txt"]
+        self.assertIsNone(self.cache.fingerprint(self.ProduceTask))
+
+    def test_save_missing_output(self):
+        self.ProduceTask.outputs = ["missing.txt"]
+        with self.assertRaises(FileNotFoundError):
+            self.cache.save(self.ProduceTask, "fingerprint")
+        self.assertFalse(self.cache.restore(self.ProduceTask, "fingerprint"))
+
+    def test_fingerprint_uses_etag(self):
+        with mock.patch.object(
+            default_storage, "open_stream", side_effect=AssertionError
+        ), mock.patch.object(default_storage, "etag", return_value="v1"):
+            fingerprint = self.cache.fingerprint(self.ProduceTask)
+        with mock.patch.object(default_storage, "etag", return_value="v2"):
+            self.assertNotEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
+
+    def test_fingerprint_without_etag(self):
+        with mock.patch.object(
+            default_storage, "etag", side_effect=NotImplementedError
+        ):
+            fingerprint = self.cache.fingerprint(self.ProduceTask)
+            self.assertEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
+            self.write_input("bar")
+            self.assertNotEqual(self.cache.fingerprint(self.ProduceTask), fingerprint)
@@ -1,6 +1,8 @@
 from io import StringIO
-from unittest import TestCase
-from gluepy.exec import Task, DAG, DAG_REGISTRY
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.exec import Task, DAG, DAG_REGISTRY, TASK_REGISTRY
+from gluepy.exec.tasks import BootstrapTask
 from gluepy.commands.dag import run_dag
 from gluepy.files.storages import default_storage
 
@@ -9,6 +11,8 @@ class DAGTestCase(TestCase):
     def setUp(self) -> None:
         for k in list(DAG_REGISTRY.keys()):
             del DAG_REGISTRY[k]
+        for k in list(TASK_REGISTRY.keys()):
+            del TASK_REGISTRY[k]
         return super().setUp()
 
     def test_dag_execution(self):
@@ -41,3 +45,146 @@ class DAGTestCase(TestCase):
             class TestDuplicateDAG(DAG):
                 label = "test"
                 tasks = []
+
+    def test_inject_graph_default_dependencies(self):
+        class TaskA(Task):
+            pass
+
+        class TaskB(Task):
+            pass
+
+        class EvalTask(Task):
+            pass
+
+        class TestDAG(DAG):
+            label = "test"
+            tasks = [TaskA, TaskB]
+            eval_tasks = [EvalTask]
+
+        graph = TestDAG().inject_graph()
+        self.assertEqual(list(graph), [BootstrapTask, TaskA, TaskB, EvalTask])
+        self.assertEqual(graph[BootstrapTask], [])
+        self.assertEqual(graph[TaskA], [BootstrapTask])
+        self.assertEqual(graph[TaskB], [BootstrapTask, TaskA])
+        self.assertEqual(graph[EvalTask], [BootstrapTask, TaskB])
+
+        # Dependencies on tasks that are not selected are left out.
+        graph = TestDAG().inject_graph(eval_only=True)
+        self.assertEqual(graph, {BootstrapTask: [], EvalTask: [BootstrapTask]})
+
+    def test_inject_graph_depends_on(self):
+        class TaskA(Task):
+            label = "a"
+            depends_on = []
+
+        class TaskC(Task):
+            depends_on = ["a", "taskb"]
+
+        class TaskB(Task):
+            depends_on = []
+
+        class TestDAG(DAG):
+            label = "test"
+            tasks = [TaskA, TaskC, TaskB]
+
+        graph = TestDAG().inject_graph()
+        # Tasks are ordered after their upstream tasks.
+        self.assertEqual(list(graph), [BootstrapTask, TaskA, TaskB, TaskC])
+        self.assertEqual(TestDAG().inject_tasks(), list(graph))
+        self.assertEqual(graph[TaskB], [BootstrapTask])
+        self.assertEqual(graph[TaskC], [BootstrapTask, TaskA, TaskB])
+
+    def test_inject_graph_duplicate(self):
+        class TaskA(Task):
+            pass
+
+        class TaskB(Task):
+            pass
+
+        class DuplicateDAG(DAG):
+            tasks = [TaskA, TaskB, TaskA]
+            eval_tasks = [TaskB]
+
+        with self.assertLogs("gluepy.exec.dags", level="WARNING"):
+            graph = DuplicateDAG().inject_graph()
+        self.assertEqual(list(graph), [BootstrapTask, TaskA, TaskB])
+        self.assertEqual(graph[TaskB], [BootstrapTask, TaskA])
+        with self.assertLogs("gluepy.exec.dags", level="WARNING"):
+            graph = DuplicateDAG().inject_graph(eval_only=True)
+        self.assertEqual(list(graph), [BootstrapTask, TaskB])
+
+    def test_inject_graph_invalid(self):
+        class TaskA(Task):
+            depends_on = ["missing"]
+
+        class TaskB(Task):
+            depends_on = ["taskc"]
+
+        class TaskC(Task):
+            depends_on = ["taskb"]
+
+        class MissingDAG(DAG):
+            tasks = [TaskA]
+
+        class CycleDAG(DAG):
+            tasks = [TaskB, TaskC]
+
+        for Dag in (MissingDAG, CycleDAG):
+            with self.assertRaises(ValueError):
+                Dag().inject_graph()
+
+    def test_dag_execution_thread_executor(self):
+        class TaskA(Task):
+            def run(self):
+                default_storage.touch("taska.txt", StringIO("foo"))
+
+        class TaskB(Task):
+            depends_on = []
+
+            def run(self):
+                default_storage.touch("taskb.txt", StringIO("bar"))
+
+        class TaskC(Task):
+            depends_on = [TaskA, TaskB]
+
+            def run(self):
+                assert default_storage.exists("taska.txt")
+                assert default_storage.exists("taskb.txt")
+                default_storage.touch("taskc.txt", StringIO("baz"))
+
+        class TestDAG(DAG):
+            label = "test"
+            tasks = [TaskA, TaskB, TaskC]
+
+        with mock.patch.object(
+            default_settings,
+            "DAG_EXECUTOR",
+            "gluepy.exec.executors.ThreadExecutor",
+            create=True,
+        ):
+            run_dag(label="test")
+        self.assertTrue(default_storage.exists("taskc.txt"))
+
+    def test_dag_execution_from_task(self):
+        ran = []
+
+        class TaskA(Task):
+            def run(self):
+                ran.append("taska")
+
+        class TaskB(Task):
+            def run(self):
+                ran.append("taskb")
+
+        class TaskC(Task):
+            depends_on = [TaskA]
+
+            def run(self):
+                ran.append("taskc")
+
+        class TestDAG(DAG):
+            label = "test"
+            tasks = [TaskA, TaskB, TaskC]
+
+        run_dag(label="test", from_task="taskb")
+        self.assertEqual(ran, ["taskb", "taskc"])
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import threading
+from functools import partial
+from unittest import TestCase
+from gluepy.exec.executors import ProcessExecutor, SequentialExecutor, ThreadExecutor
+
+
+class TaskA:
+    pass
+
+
+class TaskB:
+    pass
+
+
+class TaskC:
+    pass
+
+
+GRAPH = {TaskA: [], TaskB: [TaskA], TaskC: [TaskA]}
+
+
+def touch_task(folder, Task):
+    open(os.path.join(folder, Task.__name__), "w").close()
+
+
+class SequentialExecutorTestCase(TestCase):
+    def test_run(self):
+        ran = []
+        SequentialExecutor().run(GRAPH, ran.append)
+        self.assertEqual(ran, [TaskA, TaskB, TaskC])
+
+
+class ThreadExecutorTestCase(TestCase):
+    def test_run_concurrently(self):
+        # TaskB and TaskC only complete if they run at the same time.
+        barrier = threading.Barrier(2, timeout=5)
+        ran = []
+
+        def run_task(Task):
+            if Task is not TaskA:
+                barrier.wait()
+            ran.append(Task)
+
+        ThreadExecutor(max_workers=2).run(GRAPH, run_task)
+        self.assertEqual(ran[0], TaskA)
+        self.assertEqual(set(ran), {TaskA, TaskB, TaskC})
+
+    def test_run_respects_dependencies(self):
+        ran = []
+        graph = {TaskA: [], TaskB: [TaskA], TaskC: [TaskB]}
+        ThreadExecutor(max_workers=4).run(graph, ran.append)
+        self.assertEqual(ran, [TaskA, TaskB, TaskC])
+
+    def test_run_stops_on_failure(self):
+        ran = []
+
+        def run_task(Task):
+            if Task is TaskA:
+                raise RuntimeError("task exploded")
+            ran.append(Task)
+
+        with self.assertRaises(RuntimeError):
+            ThreadExecutor(max_workers=2).run(GRAPH, run_task)
+        self.assertEqual(ran, [])
+
+    def test_max_workers(self):
+        self.assertEqual(ThreadExecutor(max_workers=3).max_workers, 3)
+        self.assertEqual(ThreadExecutor().max_workers, os.cpu_count())
+
+
+class ProcessExecutorTestCase(TestCase):
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as folder:
+            ProcessExecutor(max_workers=2).run(GRAPH, partial(touch_task, folder))
+            self.assertEqual(sorted(os.listdir(folder)), ["TaskA", "TaskB", "TaskC"])
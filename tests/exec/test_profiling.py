@@ -0,0 +1,94 @@
+import os
+import json
+import uuid
+import marshal
+from unittest import TestCase
+from gluepy.exec import Task, DAG, DAG_REGISTRY, TASK_REGISTRY
+from gluepy.exec.profiling import PROFILE_FOLDER, get_profiler
+from gluepy.commands.dag import run_dag
+from gluepy.files.storages import default_storage
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self) -> None:
+        for k in list(DAG_REGISTRY.keys()):
+            del DAG_REGISTRY[k]
+        for k in list(TASK_REGISTRY.keys()):
+            del TASK_REGISTRY[k]
+
+        class AllocateTask(Task):
+            label = "allocate"
+
+            def run(self):
+                self.data = [str(i) for i in range(10_000)]
+
+        class SleepTask(Task):
+            label = "sleep"
+
+            def run(self):
+                sum(range(1000))
+
+        class TestDAG(DAG):
+            label = "test_profile"
+            tasks = [AllocateTask, SleepTask]
+
+        # Retry of a run folder that does not exist start a new run in it.
+        self.run_folder = os.path.join("runs", uuid.uuid4().hex)
+        return super().setUp()
+
+    def read(self, name: str) -> bytes:
+        return default_storage.open(os.path.join(self.run_folder, PROFILE_FOLDER, name))
+
+    def test_cpu(self):
+        run_dag("test_profile", retry=self.run_folder, profile="cpu")
+        stats = marshal.loads(self.read("allocate.prof"))
+        self.assertTrue(any(func[2] == "run" for func in stats))
+        self.assertIn(b"cumulative", self.read("allocate.txt"))
+        summary = json.loads(self.read("allocate.json"))
+        self.assertEqual(summary["mode"], "cpu")
+        self.assertGreater(summary["calls"], 0)
+
+    def test_memory(self):
+        run_dag("test_profile", retry=self.run_folder, profile="memory")
+        summary = json.loads(self.read("allocate.json"))
+        self.assertGreater(summary["peak_bytes"], 10_000)
+        self.assertTrue(summary["top_allocations"])
+        self.assertFalse(
+            default_storage.exists(
+                os.path.join(self.run_folder, PROFILE_FOLDER, "allocate.prof")
+            )
+        )
+
+    def test_wall_summary(self):
+        run_dag("test_profile", retry=self.run_folder, profile="wall")
+        summary = json.loads(self.read("sleep.json"))
+        self.assertGreaterEqual(summary["wall_seconds"], 0)
+        self.assertNotIn("peak_bytes", summary)
+
+        table = self.read("summary.txt").decode().splitlines()
+        self.assertEqual(len(table), 4)
+        self.assertTrue(table[0].startswith("Task"))
+        self.assertEqual(
+            sorted(line.split()[0] for line in table[1:]),
+            ["AllocateTask", "BootstrapTask", "SleepTask"],
+        )
+
+    def test_failed_task_is_profiled(self):
+        class FailTask(Task):
+            label = "fail"
+
+            def run(self):
+                raise RuntimeError("task exploded")
+
+        class FailDAG(DAG):
+            label = "test_profile_fail"
+            tasks = [FailTask]
+
+        with self.assertRaises(RuntimeError):
+            run_dag("test_profile_fail", retry=self.run_folder, profile="wall")
+        self.assertEqual(json.loads(self.read("fail.json"))["task"], "FailTask")
+        self.assertIn(b"FailTask", self.read("summary.txt"))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            get_profiler("gpu")
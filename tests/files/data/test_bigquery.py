@@ -0,0 +1,136 @@
+import sys
+import threading
+import time
+import pyarrow as pa
+import pandas as pd
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.files.data import PandasDataManager, PyArrowDataManager
+from gluepy.files.data.bigquery import prefetch_batches, read_sql_iter
+
+
+def make_batch(value: int) -> pa.RecordBatch:
+    return pa.record_batch({"col": pa.array([value] * 1000, type=pa.int64())})
+
+
+class PrefetchBatchesTestCase(TestCase):
+    def test_prefetch_batches(self):
+        batches = [make_batch(i) for i in range(5)]
+        result = list(prefetch_batches(iter(batches), max_bytes=10**9))
+        self.assertEqual(result, batches)
+
+    def test_prefetch_batches_max_bytes(self):
+        nbytes = make_batch(0).nbytes
+        fetched = []
+
+        def produce():
+            for i in range(10):
+                fetched.append(i)
+                yield make_batch(i)
+
+        batches = prefetch_batches(produce(), max_bytes=nbytes * 2)
+        first = next(batches)
+        time.sleep(0.1)
+        # The consumer holds the first batch and the second fills the budget,
+        # so the producer waits with the third batch.
+        self.assertEqual(fetched, [0, 1, 2])
+
+        values = [first.column(0)[0].as_py()]
+        values += [batch.column(0)[0].as_py() for batch in batches]
+        self.assertEqual(values, list(range(10)))
+
+    def test_prefetch_batches_larger_than_budget(self):
+        batches = [make_batch(i) for i in range(3)]
+        result = list(prefetch_batches(iter(batches), max_bytes=1))
+        self.assertEqual(result, batches)
+
+    def test_prefetch_batches_error(self):
+        def produce():
+            yield make_batch(0)
+            raise RuntimeError("download failed")
+
+        batches = prefetch_batches(produce(), max_bytes=10**9)
+        next(batches)
+        with self.assertRaises(RuntimeError):
+            next(batches)
+
+    def test_prefetch_batches_close(self):
+        stopped = threading.Event()
+
+        def produce():
+            try:
+                for i in range(100):
+                    yield make_batch(i)
+            finally:
+                stopped.set()
+
+        batches = prefetch_batches(produce(), max_bytes=1)
+        next(batches)
+        batches.close()
+        self.assertTrue(stopped.wait(1))
+
+
+class ReadSqlIterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.batches = [make_batch(i) for i in range(3)]
+        self.mock_bigquery = mock.Mock()
+        client = self.mock_bigquery.Client.return_value
+        rows = client.query.return_value.result.return_value
+        rows.to_arrow_iterable.side_effect = lambda **kwargs: iter(self.batches)
+        google = mock.Mock()
+        google.cloud.bigquery = self.mock_bigquery
+        patcher = mock.patch.dict(
+            sys.modules,
+            {
+                "google": google,
+                "google.cloud": google.cloud,
+                "google.cloud.bigquery": self.mock_bigquery,
+                "google.cloud.bigquery_storage": google.cloud.bigquery_storage,
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return super().setUp()
+
+    def test_read_sql_iter(self):
+        with mock.patch.object(
+            default_settings, "GCP_PROJECT_ID", "test-project", create=True
+        ):
+            result = list(read_sql_iter("SELECT * FROM table"))
+
+        self.assertEqual(result, self.batches)
+        self.mock_bigquery.Client.assert_called_once_with(project="test-project")
+        self.mock_bigquery.Client.return_value.query.assert_called_once_with(
+            "SELECT * FROM table"
+        )
+
+    def test_read_sql_iter_bounds_client_queue(self):
+        rows = self.mock_bigquery.Client.return_value.query.return_value.result()
+        with mock.patch.object(
+            default_settings, "GCP_PROJECT_ID", "test-project", create=True
+        ):
+            list(read_sql_iter("SELECT 1"))
+        self.assertEqual(rows.to_arrow_iterable.call_args.kwargs["max_queue_size"], 1)
+        self.assertNotIn("max_stream_count", rows.to_arrow_iterable.call_args.kwargs)
+
+        with mock.patch.object(
+            default_settings, "GCP_PROJECT_ID", "test-project", create=True
+        ), mock.patch.object(default_settings, "DATA_SQL_MAX_STREAMS", 4, create=True):
+            list(read_sql_iter("SELECT 1"))
+        self.assertEqual(rows.to_arrow_iterable.call_args.kwargs["max_stream_count"], 4)
+
+    def test_data_manager_read_sql_iter(self):
+        with mock.patch.object(
+            default_settings, "GCP_PROJECT_ID", "test-project", create=True
+        ):
+            tables = list(PyArrowDataManager().read_sql_iter("SELECT 1"))
+            dfs = list(PandasDataManager().read_sql_iter("SELECT 1"))
+
+        self.assertEqual(tables, self.batches)
+        self.assertEqual(len(dfs), 3)
+        pd.testing.assert_frame_equal(dfs[1], self.batches[1].to_pandas())
+
+    def test_read_sql_iter_import_error(self):
+        with mock.patch.dict(sys.modules, {"google.cloud": None}):
+            with self.assertRaises(ImportError):
+                next(read_sql_iter("SELECT 1"))
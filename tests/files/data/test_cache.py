@@ -0,0 +1,283 @@
+import io
+import pandas as pd
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.files.data import PandasDataManager
+from gluepy.files.data.cache import DataFrameCache, SqlResultCache, normalize_sql
+from gluepy.files.storages.memory import MemoryStorage
+
+
+class NormalizeSqlTestCase(TestCase):
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("\n  SELECT  *\n\tFROM  t \n WHERE a = 1 ;\n"),
+            "SELECT *\nFROM t\nWHERE a = 1",
+        )
+
+    def test_normalize_sql_keeps_end_of_comments(self):
+        self.assertNotEqual(
+            normalize_sql("SELECT a -- note\nFROM t WHERE x=1"),
+            normalize_sql("SELECT a -- note FROM t WHERE x=1"),
+        )
+        self.assertNotEqual(
+            SqlResultCache.key("SELECT a # note\nFROM t WHERE x=1"),
+            SqlResultCache.key("SELECT a # note FROM t WHERE x=1"),
+        )
+
+    def test_normalize_sql_keeps_literals(self):
+        self.assertEqual(
+            normalize_sql("SELECT  'a  b', \"c  d\", `e  f`"),
+            "SELECT 'a  b', \"c  d\", `e  f`",
+        )
+
+
+class SqlResultCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        self.storage = MemoryStorage()
+        self.cache = SqlResultCache("sql", ttl=60, storage=self.storage)
+        self.df = pd.DataFrame({"col": [1, 2, 3]})
+        return super().setUp()
+
+    def test_key(self):
+        self.assertEqual(
+            SqlResultCache.key("SELECT 1", location="EU"),
+            SqlResultCache.key("  SELECT   1;", location="EU"),
+        )
+        self.assertNotEqual(
+            SqlResultCache.key("SELECT 1", location="EU"),
+            SqlResultCache.key("SELECT 1", location="US"),
+        )
+        self.assertNotEqual(SqlResultCache.key("SELECT 1"), SqlResultCache.key("1"))
+
+    def test_get_set(self):
+        key = self.cache.key("SELECT 1")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, self.df)
+
+        pd.testing.assert_frame_equal(self.cache.get(key), self.df)
+        self.assertTrue(self.storage.isfile(f"sql/{key}.parquet"))
+        self.assertTrue(self.storage.isfile("sql/index.json"))
+
+    def test_lock_shared_by_prefix(self):
+        other = SqlResultCache("sql", storage=self.storage)
+        self.assertIs(other._lock, self.cache._lock)
+        self.assertIsNot(
+            SqlResultCache("other", storage=self.storage)._lock, self.cache._lock
+        )
+
+    def test_ttl_zero(self):
+        cache = SqlResultCache("sql", ttl=0, storage=self.storage)
+        self.assertEqual(cache.ttl, 0)
+        key = cache.key("SELECT 1")
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=1000):
+            cache.set(key, self.df)
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=1001):
+            self.assertIsNone(cache.get(key))
+
+    def test_get_expired(self):
+        key = self.cache.key("SELECT 1")
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=1000):
+            self.cache.set(key, self.df)
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=1059):
+            self.assertIsNotNone(self.cache.get(key))
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=1061):
+            self.assertIsNone(self.cache.get(key))
+
+    def test_evict(self):
+        self.cache.set("a", self.df)
+        self.cache.max_bytes = self.storage.size("sql/a.parquet") * 2
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=2e9):
+            self.cache.set("b", self.df)
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=2e9 + 1):
+            self.cache.set("c", self.df)
+
+        # The oldest result is evicted, as is any result that has expired.
+        with mock.patch("gluepy.files.data.cache.time.time", return_value=2e9 + 1):
+            self.assertIsNone(self.cache.get("a"))
+            self.assertIsNotNone(self.cache.get("b"))
+            self.assertIsNotNone(self.cache.get("c"))
+        self.assertFalse(self.storage.exists("sql/a.parquet"))
+
+    def test_set_too_large(self):
+        self.cache.max_bytes = 1
+        self.cache.set("a", self.df)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertFalse(self.storage.exists("sql/a.parquet"))
+
+
+class PandasReadSqlCacheTestCase(TestCase):
+    def test_read_sql_cache(self):
+        storage = MemoryStorage()
+        df_mock = pd.DataFrame({"col": [1, 2, 3]})
+        data_manager = PandasDataManager()
+        with mock.patch(
+            "gluepy.files.data.pandas.default_storage", storage
+        ), mock.patch.object(
+            default_settings, "DATA_SQL_CACHE_PREFIX", "sql", create=True
+        ), mock.patch.object(
+            data_manager, "_read_gbq", return_value=df_mock
+        ) as mock_read_gbq:
+            df = data_manager.read_sql("SELECT * FROM table")
+            df_cached = data_manager.read_sql("  SELECT  *   FROM table;")
+            data_manager.read_sql("SELECT * FROM other")
+
+        self.assertEqual(mock_read_gbq.call_count, 2)
+        pd.testing.assert_frame_equal(df, df_mock)
+        pd.testing.assert_frame_equal(df_cached, df_mock)
+
+
+class DataFrameCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        self.df = pd.DataFrame({"col": range(100)})
+        self.nbytes = int(self.df.memory_usage(deep=True).sum())
+        return super().setUp()
+
+    def test_get_set(self):
+        cache = DataFrameCache(max_bytes=10**9)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", self.df)
+        pd.testing.assert_frame_equal(cache.get("a"), self.df)
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 1, "bytes": self.nbytes})
+
+    def test_copies(self):
+        cache = DataFrameCache(max_bytes=10**9)
+        cache.set("a", self.df)
+        self.df.loc[0, "col"] = -1
+        df = cache.get("a")
+        df.loc[1, "col"] = -1
+
+        self.assertEqual(cache.get("a")["col"].tolist(), list(range(100)))
+
+    def test_evict_least_recently_used(self):
+        cache = DataFrameCache(max_bytes=self.nbytes * 2)
+        cache.set("a", self.df)
+        cache.set("b", self.df)
+        cache.get("a")
+        cache.set("c", self.df)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.nbytes, self.nbytes * 2)
+
+    def test_set_too_large(self):
+        cache = DataFrameCache(max_bytes=self.nbytes - 1)
+        cache.set("a", self.df)
+        self.assertIsNone(cache.get("a"))
+
+    def test_invalidate(self):
+        cache = DataFrameCache(max_bytes=10**9)
+        cache.set("a", self.df)
+        cache.invalidate("a")
+        cache.invalidate("b")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.nbytes, 0)
+
+    def test_version(self):
+        cache = DataFrameCache(max_bytes=10**9)
+        cache.set("a", self.df, "v1")
+        self.assertIsNotNone(cache.get("a", "v1"))
+        self.assertIsNone(cache.get("a", "v2"))
+        self.assertIsNone(cache.get("a", "v1"))
+        self.assertEqual(cache.nbytes, 0)
+
+    def test_invalidate_prefix(self):
+        cache = DataFrameCache(max_bytes=10**9)
+        for key in (
+            ("run", "data"),
+            ("run", "data/a=1/part-0.parquet"),
+            ("run", "database.parquet"),
+            ("other", "data"),
+        ):
+            cache.set(key, self.df)
+
+        cache.invalidate_prefix(("run", "data"))
+        self.assertIsNone(cache.get(("run", "data")))
+        self.assertIsNone(cache.get(("run", "data/a=1/part-0.parquet")))
+        self.assertIsNotNone(cache.get(("run", "database.parquet")))
+        self.assertIsNotNone(cache.get(("other", "data")))
+        self.assertEqual(cache.nbytes, self.nbytes * 2)
+
+
+class PandasDataFrameCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        self.storage = MemoryStorage()
+        self.df = pd.DataFrame({"col": [1, 2, 3]})
+        patcher = mock.patch("gluepy.files.data.pandas.default_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with mock.patch.object(
+            default_settings, "DATA_CACHE_MAX_BYTES", 10**9, create=True
+        ):
+            self.data_manager = PandasDataManager()
+        return super().setUp()
+
+    def test_disabled(self):
+        self.assertIsNone(PandasDataManager().cache)
+
+    def test_write_parquet(self):
+        self.data_manager.write("file.parquet", self.df)
+        # The etag of memory storage hash the content, other backends read it
+        # from the metadata of the file.
+        etag = self.storage.etag(self.storage.runpath("file.parquet"))
+        with mock.patch.object(self.storage, "open") as mock_open, mock.patch.object(
+            self.storage, "read_range"
+        ) as mock_read_range, mock.patch.object(
+            self.storage, "etag", return_value=etag
+        ):
+            df = self.data_manager.read("file.parquet")
+
+        mock_open.assert_not_called()
+        mock_read_range.assert_not_called()
+        pd.testing.assert_frame_equal(df, self.df)
+
+    def test_read(self):
+        self.storage.touch("file.csv", io.StringIO(self.df.to_csv(index=False)))
+        self.data_manager.read("file.csv", root=True)
+        with mock.patch.object(self.storage, "open_stream") as mock_open_stream:
+            df = self.data_manager.read("file.csv", root=True)
+
+        mock_open_stream.assert_not_called()
+        pd.testing.assert_frame_equal(df, self.df)
+        self.assertEqual(self.data_manager.cache.stats["hits"], 1)
+
+    def test_read_with_arguments(self):
+        self.data_manager.write("file.parquet", self.df)
+        df = self.data_manager.read("file.parquet", columns=[])
+        self.assertEqual(len(df.columns), 0)
+        self.assertEqual(self.data_manager.cache.stats["hits"], 0)
+
+    def test_overwrite(self):
+        self.data_manager.write("file.parquet", self.df)
+        self.data_manager.write("file.parquet", self.df.head(1))
+        pd.testing.assert_frame_equal(
+            self.data_manager.read("file.parquet"), self.df.head(1)
+        )
+
+        # Files that may not read back into the same dataframe are invalidated.
+        self.data_manager.write("file.parquet", self.df, index=False)
+        self.assertEqual(self.data_manager.cache.nbytes, 0)
+        pd.testing.assert_frame_equal(self.data_manager.read("file.parquet"), self.df)
+
+    def test_write_dataset_overwrite(self):
+        self.data_manager.write_dataset("data", self.df.assign(part="a"), ["part"])
+        partition = "data/part=a/part-0.parquet"
+        self.data_manager.read(partition)
+        with mock.patch.object(self.storage, "etag", side_effect=NotImplementedError):
+            # Without etags, only the invalidation of the dataset is relied on.
+            self.data_manager.read(partition)
+            self.data_manager.write_dataset(
+                "data", self.df.head(1).assign(part="a"), ["part"]
+            )
+            df = self.data_manager.read(partition)
+
+        pd.testing.assert_frame_equal(df, self.df.head(1))
+
+    def test_outside_write(self):
+        self.storage.touch("file.csv", io.StringIO(self.df.to_csv(index=False)))
+        self.data_manager.read("file.csv", root=True)
+        self.storage.touch("file.csv", io.StringIO("col\n4\n"))
+
+        df = self.data_manager.read("file.csv", root=True)
+        self.assertEqual(df["col"].tolist(), [4])
+        self.assertEqual(self.data_manager.cache.stats["hits"], 0)
@@ -0,0 +1,146 @@
+import tempfile
+import pandas as pd
+import pyarrow as pa
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.files.data import PandasDataManager, PyArrowDataManager
+from gluepy.files.data.duckdb import read_sql, read_sql_iter
+from gluepy.files.storages.local import LocalStorage
+from gluepy.files.storages.memory import MemoryStorage
+
+
+class DuckDBReadSqlTestCase(TestCase):
+    def setUp(self) -> None:
+        self.storage = MemoryStorage()
+        self.df = pd.DataFrame(
+            {"region": ["eu", "eu", "us"], "amount": [1, 2, 3]},
+        )
+        patcher = mock.patch("gluepy.files.data.pandas.default_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("gluepy.files.data.duckdb.default_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        PandasDataManager().write("sales.parquet", self.df, root=True, index=False)
+        return super().setUp()
+
+    def test_read_sql(self):
+        table = read_sql(
+            "SELECT region, SUM(amount) AS total FROM sales "
+            "GROUP BY region ORDER BY region",
+            tables={"sales": "sales.parquet"},
+            root=True,
+        )
+        self.assertIsInstance(table, pa.Table)
+        self.assertEqual(table.to_pydict(), {"region": ["eu", "us"], "total": [3, 3]})
+
+    def test_read_sql_parameters(self):
+        table = read_sql(
+            "SELECT amount FROM sales WHERE region = ?",
+            tables={"sales": "sales.parquet"},
+            parameters=["us"],
+            root=True,
+        )
+        self.assertEqual(table.column("amount").to_pylist(), [3])
+
+    def test_read_sql_runpath(self):
+        with mock.patch.object(
+            self.storage, "runpath", return_value="sales.parquet"
+        ) as mock_runpath:
+            read_sql("SELECT * FROM sales", tables={"sales": "file.parquet"})
+        mock_runpath.assert_called_once_with("file.parquet")
+
+    def test_read_sql_dataset(self):
+        PandasDataManager().write_dataset(
+            "dataset", self.df, partition_cols=["region"], root=True, index=False
+        )
+        table = read_sql(
+            "SELECT SUM(amount) AS total FROM sales WHERE region = 'eu'",
+            tables={"sales": "dataset"},
+            root=True,
+        )
+        self.assertEqual(table.column("total").to_pylist(), [3])
+
+    def test_data_manager_engine(self):
+        sql = "SELECT COUNT(*) AS n FROM sales"
+        tables = {"sales": "sales.parquet"}
+        with mock.patch.object(
+            default_settings, "DATA_SQL_ENGINE", "duckdb", create=True
+        ):
+            df = PandasDataManager().read_sql(sql, tables=tables, root=True)
+            table = PyArrowDataManager().read_sql(sql, tables=tables, root=True)
+
+        pd.testing.assert_frame_equal(df, pd.DataFrame({"n": [3]}))
+        self.assertEqual(table.to_pydict(), {"n": [3]})
+
+    def test_read_sql_iter(self):
+        batches = list(
+            read_sql_iter(
+                "SELECT amount FROM sales ORDER BY amount",
+                tables={"sales": "sales.parquet"},
+                root=True,
+                batch_size=2,
+            )
+        )
+        self.assertEqual([batch.num_rows for batch in batches], [2, 1])
+        self.assertEqual(
+            pa.Table.from_batches(batches).column("amount").to_pylist(), [1, 2, 3]
+        )
+
+    def test_data_manager_read_sql_iter(self):
+        sql = "SELECT amount FROM sales ORDER BY amount"
+        tables = {"sales": "sales.parquet"}
+        with mock.patch.object(
+            default_settings, "DATA_SQL_ENGINE", "duckdb", create=True
+        ):
+            dfs = list(PandasDataManager().read_sql_iter(sql, tables=tables, root=True))
+
+        pd.testing.assert_frame_equal(
+            pd.concat(dfs), pd.DataFrame({"amount": [1, 2, 3]})
+        )
+
+
+class DuckDBLocalReadSqlTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage = LocalStorage()
+        for patcher in (
+            mock.patch.object(default_settings, "STORAGE_ROOT", self.tmpdir.name),
+            mock.patch("gluepy.files.data.pandas.default_storage", self.storage),
+            mock.patch("gluepy.files.data.duckdb.default_storage", self.storage),
+            mock.patch("gluepy.files.data.pyarrow.default_storage", self.storage),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.df = pd.DataFrame({"region": ["eu", "eu", "us"], "amount": [1, 2, 3]})
+        data_manager = PandasDataManager()
+        data_manager.write("sales.parquet", self.df, root=True, index=False)
+        data_manager.write("sales.csv", self.df, root=True, index=False)
+        data_manager.write_dataset(
+            "dataset", self.df, partition_cols=["region"], root=True, index=False
+        )
+        return super().setUp()
+
+    def test_read_sql_native_scan(self):
+        with mock.patch("gluepy.files.data.duckdb.arrow_dataset") as mock_dataset:
+            for path in ("sales.parquet", "sales.csv", "dataset"):
+                with self.subTest(path=path):
+                    table = read_sql(
+                        "SELECT SUM(amount) AS total FROM sales WHERE region = 'eu'",
+                        tables={"sales": path},
+                        root=True,
+                    )
+                    self.assertEqual(table.column("total").to_pylist(), [3])
+        mock_dataset.assert_not_called()
+
+    def test_read_sql_ipc_uses_dataset(self):
+        PyArrowDataManager().write(
+            "sales.arrow", pa.Table.from_pandas(self.df), root=True
+        )
+        table = read_sql(
+            "SELECT COUNT(*) AS n FROM sales",
+            tables={"sales": "sales.arrow"},
+            root=True,
+        )
+        self.assertEqual(table.to_pydict(), {"n": [3]})
@@ -3,6 +3,7 @@ from io import BytesIO
 import pandas as pd
 from unittest import TestCase, mock
 from gluepy.files.data import PandasDataManager
+from gluepy.files.storages.memory import MemoryStorage
 
 
 class PandasDataManagerTestCase(TestCase):
@@ -19,11 +20,13 @@ class PandasDataManagerTestCase(TestCase):
 
         # Test
         with mock.patch("gluepy.files.data.pandas.default_storage") as mock_storage:
-            mock_storage.open.return_value = stream.read()
+            mock_storage.open_stream.return_value.__enter__.return_value = stream
             mock_storage.runpath.return_value = "runs/2024/01/01/1234/file.csv"
             df = self.data_manager.read("file.csv")
 
-        mock_storage.open.assert_called_once_with("runs/2024/01/01/1234/file.csv")
+        mock_storage.open_stream.assert_called_once_with(
+            "runs/2024/01/01/1234/file.csv"
+        )
         pd.testing.assert_frame_equal(df, df_mock)
 
     def test_read_csv_root(self):
@@ -35,43 +38,74 @@ class PandasDataManagerTestCase(TestCase):
 
         # Test
         with mock.patch("gluepy.files.data.pandas.default_storage") as mock_storage:
-            mock_storage.open.return_value = stream.read()
+            mock_storage.open_stream.return_value.__enter__.return_value = stream
             df = self.data_manager.read("file.csv", root=True)
 
-        mock_storage.open.assert_called_once_with("file.csv")
+        mock_storage.open_stream.assert_called_once_with("file.csv")
         pd.testing.assert_frame_equal(df, df_mock)
 
     def test_read_parquet(self):
-        # Prepare mock
+        # Prepare storage
+        storage = MemoryStorage()
         stream = BytesIO()
         df_mock = pd.DataFrame({"col": [1, 2, 3]})
         df_mock.to_parquet(stream, index=False)
         stream.seek(0, os.SEEK_SET)
+        storage.touch("runs/2024/01/01/1234/file.parquet", stream)
 
         # Test
-        with mock.patch("gluepy.files.data.pandas.default_storage") as mock_storage:
-            mock_storage.open.return_value = stream.read()
-            mock_storage.runpath.return_value = "runs/2024/01/01/1234/file.parquet"
+        with mock.patch(
+            "gluepy.files.data.pandas.default_storage", storage
+        ), mock.patch.object(
+            storage, "runpath", return_value="runs/2024/01/01/1234/file.parquet"
+        ) as mock_runpath:
             df = self.data_manager.read("file.parquet")
 
-        mock_storage.open.assert_called_once_with("runs/2024/01/01/1234/file.parquet")
+        mock_runpath.assert_called_once_with("file.parquet")
         pd.testing.assert_frame_equal(df, df_mock)
 
     def test_read_parquet_root(self):
-        # Prepare mock
+        # Prepare storage
+        storage = MemoryStorage()
         stream = BytesIO()
         df_mock = pd.DataFrame({"col": [1, 2, 3]})
         df_mock.to_parquet(stream, index=False)
         stream.seek(0, os.SEEK_SET)
+        storage.touch("file.parquet", stream)
 
         # Test
-        with mock.patch("gluepy.files.data.pandas.default_storage") as mock_storage:
-            mock_storage.open.return_value = stream.read()
+        with mock.patch("gluepy.files.data.pandas.default_storage", storage):
             df = self.data_manager.read("file.parquet", root=True)
 
-        mock_storage.open.assert_called_once_with("file.parquet")
         pd.testing.assert_frame_equal(df, df_mock)
 
+    def test_read_parquet_pushdown(self):
+        # Prepare storage
+        storage = MemoryStorage()
+        stream = BytesIO()
+        df_mock = pd.DataFrame({f"col{i}": range(50_000) for i in range(20)})
+        df_mock.to_parquet(stream, index=False, row_group_size=5_000)
+        stream.seek(0, os.SEEK_SET)
+        storage.touch("file.parquet", stream)
+
+        # Test
+        with mock.patch(
+            "gluepy.files.data.pandas.default_storage", storage
+        ), mock.patch.object(
+            storage, "read_range", wraps=storage.read_range
+        ) as mock_read_range:
+            df = self.data_manager.read(
+                "file.parquet",
+                root=True,
+                columns=["col1"],
+                filters=[("col1", "<", 1_000)],
+            )
+
+        pd.testing.assert_frame_equal(df, df_mock[["col1"]].iloc[:1_000])
+        # Only the footer and the selected column chunks are read.
+        read_bytes = sum(call.args[2] for call in mock_read_range.call_args_list)
+        self.assertLess(read_bytes, len(stream.getvalue()) / 20)
+
     def test_read_json(self):
         # Prepare mock
         stream = BytesIO()
@@ -81,11 +115,13 @@ class PandasDataManagerTestCase(TestCase):
 
         # Test
         with mock.patch("gluepy.files.data.pandas.default_storage") as mock_storage:
-            mock_storage.open.return_value = stream.read()
+            mock_storage.open_stream.return_value.__enter__.return_value = stream
             mock_storage.runpath.return_value = "runs/2024/01/01/1234/file.json"
             df = self.data_manager.read("file.json")
 
-        mock_storage.open.assert_called_once_with("runs/2024/01/01/1234/file.json")
+        mock_storage.open_stream.assert_called_once_with(
+            "runs/2024/01/01/1234/file.json"
+        )
         pd.testing.assert_frame_equal(df, df_mock)
 
     def test_read_json_root(self):
@@ -97,10 +133,10 @@ class PandasDataManagerTestCase(TestCase):
 
         # Test
         with mock.patch("gluepy.files.data.pandas.default_storage") as mock_storage:
-            mock_storage.open.return_value = stream.read()
+            mock_storage.open_stream.return_value.__enter__.return_value = stream
             df = self.data_manager.read("file.json", root=True)
 
-        mock_storage.open.assert_called_once_with("file.json")
+        mock_storage.open_stream.assert_called_once_with("file.json")
         pd.testing.assert_frame_equal(df, df_mock)
 
     def test_write_csv(self):
@@ -199,3 +235,122 @@ class PandasDataManagerTestCase(TestCase):
         with self.assertRaises(ValueError):
             with mock.patch("gluepy.files.data.pandas.default_storage"):
                 self.data_manager.write("file.xyz", df)
+
+    def test_read_iter_csv(self):
+        storage = MemoryStorage()
+        df_mock = pd.DataFrame({"col": range(10)})
+        storage.touch("file.csv", BytesIO(df_mock.to_csv(index=False).encode()))
+
+        with mock.patch("gluepy.files.data.pandas.default_storage", storage):
+            chunks = self.data_manager.read_iter("file.csv", chunksize=4, root=True)
+            self.assertNotIsInstance(chunks, list)
+            chunks = list(chunks)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        pd.testing.assert_frame_equal(pd.concat(chunks), df_mock)
+
+    def test_read_iter_root_positional(self):
+        storage = MemoryStorage()
+        df_mock = pd.DataFrame({"col": range(10)})
+        storage.touch("file.csv", BytesIO(df_mock.to_csv(index=False).encode()))
+
+        with mock.patch("gluepy.files.data.pandas.default_storage", storage):
+            chunks = list(self.data_manager.read_iter("file.csv", True, 5))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5])
+
+    def test_read_iter_jsonl(self):
+        storage = MemoryStorage()
+        df_mock = pd.DataFrame({"col": range(10)})
+        storage.touch(
+            "file.jsonl",
+            BytesIO(df_mock.to_json(orient="records", lines=True).encode()),
+        )
+
+        with mock.patch("gluepy.files.data.pandas.default_storage", storage):
+            chunks = list(
+                self.data_manager.read_iter("file.jsonl", chunksize=4, root=True)
+            )
+
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        pd.testing.assert_frame_equal(pd.concat(chunks), df_mock)
+
+    def test_read_iter_parquet(self):
+        storage = MemoryStorage()
+        stream = BytesIO()
+        df_mock = pd.DataFrame({"col": range(10), "other": range(10)})
+        df_mock.to_parquet(stream, index=False)
+        stream.seek(0, os.SEEK_SET)
+        storage.touch("runs/2024/01/01/1234/file.parquet", stream)
+
+        with mock.patch(
+            "gluepy.files.data.pandas.default_storage", storage
+        ), mock.patch.object(
+            storage, "runpath", return_value="runs/2024/01/01/1234/file.parquet"
+        ):
+            batches = list(
+                self.data_manager.read_iter(
+                    "file.parquet", chunksize=4, columns=["col"]
+                )
+            )
+
+        self.assertEqual([batch.num_rows for batch in batches], [4, 4, 2])
+        self.assertEqual(batches[0].schema.names, ["col"])
+
+    def test_read_iter_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.data_manager.read_iter("file.xlsx")
+
+    def test_write_dataset(self):
+        storage = MemoryStorage()
+        df = pd.DataFrame(
+            {
+                "region": ["eu", "eu", "us", None],
+                "day": [1, 2, 1, 1],
+                "value": [1.0, 2.0, 3.0, 4.0],
+            }
+        )
+
+        with mock.patch("gluepy.files.data.pandas.default_storage", storage):
+            self.data_manager.write_dataset(
+                "dataset", df, partition_cols=["region", "day"], root=True
+            )
+
+        self.assertEqual(
+            sorted(storage.walk("dataset")),
+            [
+                "dataset/region=__HIVE_DEFAULT_PARTITION__/day=1/part-0.parquet",
+                "dataset/region=eu/day=1/part-0.parquet",
+                "dataset/region=eu/day=2/part-0.parquet",
+                "dataset/region=us/day=1/part-0.parquet",
+            ],
+        )
+        partition = pd.read_parquet(
+            BytesIO(storage.open("dataset/region=eu/day=2/part-0.parquet"))
+        )
+        self.assertEqual(list(partition.columns), ["value"])
+
+    def test_read_dataset(self):
+        storage = MemoryStorage()
+        df = pd.DataFrame(
+            {"region": ["eu", "eu", "us"], "day": [1, 2, 1], "value": [1, 2, 3]}
+        )
+
+        with mock.patch("gluepy.files.data.pandas.default_storage", storage):
+            self.data_manager.write_dataset(
+                "dataset", df, partition_cols=["region"], root=True, index=False
+            )
+            with mock.patch.object(
+                storage, "read_range", wraps=storage.read_range
+            ) as mock_read_range:
+                result = self.data_manager.read_dataset(
+                    "dataset", root=True, filters=[("region", "=", "eu")]
+                )
+
+        self.assertEqual(result["value"].tolist(), [1, 2])
+        self.assertEqual(result["region"].tolist(), ["eu", "eu"])
+        # Files of pruned partitions are never read.
+        self.assertEqual(
+            {call.args[0] for call in mock_read_range.call_args_list},
+            {"dataset/region=eu/part-0.parquet"},
+        )
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import polars as pl
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.files.data.polars import PolarsDataManager
+from gluepy.files.storages.local import LocalStorage
+from gluepy.files.storages.memory import MemoryStorage
+
+
+class PolarsDataManagerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.data_manager = PolarsDataManager()
+        self.storage = MemoryStorage()
+        self.df = pl.DataFrame({"col": [1, 2, 3], "name": ["a", "b", "c"]})
+        return super().setUp()
+
+    def test_write_read(self):
+        with mock.patch("gluepy.files.data.polars.default_storage", self.storage):
+            for name in ("file.csv", "file.parquet", "file.arrow", "file.jsonl"):
+                with self.subTest(name=name):
+                    self.data_manager.write(name, self.df, root=True)
+                    df = self.data_manager.read(name, root=True)
+                    self.assertTrue(df.equals(self.df))
+
+    def test_write_runpath(self):
+        with mock.patch(
+            "gluepy.files.data.polars.default_storage", self.storage
+        ), mock.patch.object(
+            self.storage, "runpath", return_value="runs/2024/01/01/1234/file.parquet"
+        ):
+            self.data_manager.write("file.parquet", self.df.lazy())
+        self.assertTrue(self.storage.exists("runs/2024/01/01/1234/file.parquet"))
+
+    def test_scan_remote(self):
+        with mock.patch("gluepy.files.data.polars.default_storage", self.storage):
+            self.data_manager.write("file.parquet", self.df, root=True)
+            lf = self.data_manager.scan("file.parquet", root=True)
+            self.assertIsInstance(lf, pl.LazyFrame)
+            df = lf.filter(pl.col("col") > 1).select("name").collect()
+        self.assertEqual(df["name"].to_list(), ["b", "c"])
+
+    def test_scan_local(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ), mock.patch("gluepy.files.data.polars.default_storage", storage):
+            self.data_manager.write("path/file.parquet", self.df.lazy(), root=True)
+            with mock.patch(
+                "gluepy.files.data.polars.pl.scan_parquet", wraps=pl.scan_parquet
+            ) as mock_scan_parquet:
+                df = self.data_manager.scan("path/file.parquet", root=True).collect()
+
+            mock_scan_parquet.assert_called_once_with(
+                os.path.join(root, "path", "file.parquet")
+            )
+        self.assertTrue(df.equals(self.df))
+
+    def test_scan_dataset(self):
+        with mock.patch("gluepy.files.data.polars.default_storage", self.storage):
+            for name in ("a", "b"):
+                self.data_manager.write(
+                    f"dataset/name={name}/part-0.parquet",
+                    self.df.drop("name"),
+                    root=True,
+                )
+            df = (
+                self.data_manager.scan("dataset", root=True)
+                .filter(pl.col("name") == "b")
+                .collect()
+            )
+        self.assertEqual(df["name"].to_list(), ["b", "b", "b"])
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.data_manager.scan("file.xlsx")
+        with self.assertRaises(ValueError):
+            self.data_manager.write("file.xlsx", self.df)
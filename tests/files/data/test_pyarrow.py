@@ -0,0 +1,95 @@
+import os
+import tempfile
+from io import BytesIO
+import pyarrow as pa
+import pyarrow.feather as feather
+from unittest import TestCase, mock
+from gluepy.conf import default_settings
+from gluepy.files.data import PyArrowDataManager
+from gluepy.files.storages.local import LocalStorage
+from gluepy.files.storages.memory import MemoryStorage
+
+
+class PyArrowDataManagerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.data_manager = PyArrowDataManager()
+        self.storage = MemoryStorage()
+        self.table = pa.table({"col": [1, 2, 3], "name": ["a", "b", "c"]})
+        return super().setUp()
+
+    def test_write_read(self):
+        with mock.patch("gluepy.files.data.pyarrow.default_storage", self.storage):
+            for name in ("file.csv", "file.parquet", "file.feather", "file.arrow"):
+                with self.subTest(name=name):
+                    self.data_manager.write(name, self.table, root=True)
+                    table = self.data_manager.read(name, root=True)
+                    self.assertTrue(table.equals(self.table))
+
+    def test_write_runpath(self):
+        with mock.patch(
+            "gluepy.files.data.pyarrow.default_storage", self.storage
+        ), mock.patch.object(
+            self.storage, "runpath", return_value="runs/2024/01/01/1234/file.arrow"
+        ):
+            self.data_manager.write("file.arrow", self.table)
+        self.assertTrue(self.storage.exists("runs/2024/01/01/1234/file.arrow"))
+
+    def test_write_ipc_uncompressed(self):
+        with mock.patch(
+            "gluepy.files.data.pyarrow.default_storage", self.storage
+        ), mock.patch(
+            "gluepy.files.data.pyarrow.feather.write_feather",
+            wraps=feather.write_feather,
+        ) as mock_write_feather:
+            self.data_manager.write("file.arrow", self.table, root=True)
+        self.assertEqual(
+            mock_write_feather.call_args.kwargs["compression"], "uncompressed"
+        )
+
+    def test_read_ipc_memory_map(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ), mock.patch("gluepy.files.data.pyarrow.default_storage", storage):
+            self.data_manager.write("file.arrow", self.table, root=True)
+            with mock.patch(
+                "gluepy.files.data.pyarrow.feather.read_table",
+                wraps=feather.read_table,
+            ) as mock_read_table:
+                table = self.data_manager.read("file.arrow", root=True)
+
+            mock_read_table.assert_called_once_with(
+                os.path.join(root, "file.arrow"), memory_map=True
+            )
+            self.assertTrue(table.equals(self.table))
+
+    def test_rewrite_after_memory_mapped_read(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ), mock.patch("gluepy.files.data.pyarrow.default_storage", storage):
+            self.data_manager.write("file.arrow", self.table, root=True)
+            table = self.data_manager.read("file.arrow", root=True)
+            self.data_manager.write("file.arrow", pa.table({"col": [4]}), root=True)
+
+            # The mapped table keep reading the replaced version of the file.
+            self.assertTrue(table.equals(self.table))
+            self.assertEqual(
+                self.data_manager.read("file.arrow", root=True).num_rows, 1
+            )
+
+    def test_read_json(self):
+        self.storage.touch("file.jsonl", BytesIO(b'{"col": 1}\n{"col": 2}\n'))
+        with mock.patch("gluepy.files.data.pyarrow.default_storage", self.storage):
+            table = self.data_manager.read("file.jsonl", root=True)
+        self.assertEqual(table.column("col").to_pylist(), [1, 2])
+
+    def test_read_json_document_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.data_manager.read("file.json")
+
+    def test_read_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.data_manager.read("file.xlsx")
+        with self.assertRaises(ValueError):
+            self.data_manager.write("file.xlsx", self.table)
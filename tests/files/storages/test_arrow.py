@@ -0,0 +1,60 @@
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+from unittest import TestCase
+from gluepy.files.storages.arrow import arrow_filesystem
+from gluepy.files.storages.memory import MemoryStorage
+
+
+class StorageFileSystemHandlerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.storage = MemoryStorage()
+        self.fs = arrow_filesystem(self.storage)
+        return super().setUp()
+
+    def test_get_file_info(self):
+        self.storage.touch("path/file.txt", io.BytesIO(b"foo"))
+        file_info, dir_info, missing_info = self.fs.get_file_info(
+            ["path/file.txt", "path", "missing"]
+        )
+        self.assertEqual(file_info.type, pafs.FileType.File)
+        self.assertEqual(file_info.size, 3)
+        self.assertEqual(dir_info.type, pafs.FileType.Directory)
+        self.assertEqual(missing_info.type, pafs.FileType.NotFound)
+
+    def test_get_file_info_selector(self):
+        self.storage.touch("path/a.txt", io.BytesIO(b"foo"))
+        self.storage.touch("path/to/b.txt", io.BytesIO(b"foo"))
+
+        infos = self.fs.get_file_info(pafs.FileSelector("path"))
+        self.assertEqual(
+            sorted((info.path, info.type) for info in infos),
+            [
+                ("path/a.txt", pafs.FileType.File),
+                ("path/to", pafs.FileType.Directory),
+            ],
+        )
+        infos = self.fs.get_file_info(pafs.FileSelector("path", recursive=True))
+        self.assertEqual(
+            sorted(info.path for info in infos), ["path/a.txt", "path/to/b.txt"]
+        )
+
+    def test_open_input_file(self):
+        self.storage.touch("file.txt", io.BytesIO(b"foobar"))
+        with self.fs.open_input_file("file.txt") as f:
+            self.assertEqual(f.size(), 6)
+            f.seek(2)
+            self.assertEqual(f.read(3), b"oba")
+
+    def test_open_output_stream(self):
+        with self.fs.open_output_stream("path/file.txt") as f:
+            f.write(b"foo")
+        self.assertEqual(self.storage.open("path/file.txt"), b"foo")
+
+    def test_parquet_roundtrip(self):
+        table = pa.table({"col": [1, 2, 3]})
+        pq.write_table(table, "path/file.parquet", filesystem=self.fs)
+        self.assertTrue(
+            pq.read_table("path/file.parquet", filesystem=self.fs).equals(table)
+        )
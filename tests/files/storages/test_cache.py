@@ -0,0 +1,139 @@
+import io
+import os
+import tempfile
+from unittest import TestCase, mock
+from gluepy.files.storages.cache import CachingStorage
+from gluepy.files.storages.memory import MemoryStorage
+
+
+class CachingStorageTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = CachingStorage(
+            storage=MemoryStorage(), cache_dir=self.tmpdir.name, max_bytes=10
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def cached_files(self):
+        return sorted(
+            name for name in os.listdir(self.tmpdir.name) if not name.startswith(".")
+        )
+
+    def test_open(self):
+        self.storage.touch("file.txt", io.StringIO("foo"))
+        self.assertEqual(self.storage.open("file.txt"), b"foo")
+        self.assertEqual(self.storage.open("file.txt", mode="r"), "foo")
+        self.assertEqual(self.storage.stats, {"hits": 1, "misses": 1})
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_open_hit_skips_wrapped_storage(self):
+        self.storage.touch("file.txt", io.StringIO("foo"))
+        self.storage.open("file.txt")
+        with mock.patch.object(self.storage.storage, "open_stream") as mock_stream:
+            self.assertEqual(self.storage.open("file.txt"), b"foo")
+        mock_stream.assert_not_called()
+
+    def test_open_changed_file(self):
+        self.storage.touch("file.txt", io.StringIO("foo"))
+        self.assertEqual(self.storage.open("file.txt"), b"foo")
+        self.storage.touch("file.txt", io.StringIO("bar"))
+        self.assertEqual(self.storage.open("file.txt"), b"bar")
+        self.assertEqual(self.storage.stats, {"hits": 0, "misses": 2})
+
+    def test_open_overwritten_while_downloaded(self):
+        self.storage.touch("file.txt", io.StringIO("foo"))
+        wrapped = self.storage.storage
+        open_stream = wrapped.open_stream
+
+        def overwrite(file_path, mode="rb"):
+            # Another process overwrite the file after its etag was read.
+            wrapped.touch(file_path, io.StringIO("bar"))
+            return open_stream(file_path, mode)
+
+        with mock.patch.object(wrapped, "open_stream", side_effect=overwrite):
+            self.assertEqual(self.storage.open("file.txt"), b"bar")
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+        self.assertEqual(self.storage.open("file.txt"), b"bar")
+        self.assertEqual(self.storage.stats, {"hits": 0, "misses": 2})
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_open_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open("missing.txt")
+        self.assertEqual(self.cached_files(), [])
+
+    def test_open_stream(self):
+        self.storage.touch("file.txt", io.StringIO("foo"))
+        with self.storage.open_stream("file.txt", mode="r") as stream:
+            self.assertEqual(stream.read(), "foo")
+        with self.storage.open_stream("file.txt") as stream:
+            self.assertEqual(stream.read(), b"foo")
+        self.assertEqual(self.storage.stats, {"hits": 1, "misses": 1})
+
+    def test_evict(self):
+        for name in ("a.txt", "b.txt", "c.txt"):
+            self.storage.touch(name, io.StringIO("1234"))
+        self.storage.open("a.txt")
+        self.storage.open("b.txt")
+        os.utime(self.storage._cache_path("a.txt"), ns=(1, 1))
+        os.utime(self.storage._cache_path("b.txt"), ns=(2, 2))
+        # Reading a.txt again marks it as more recently used than b.txt.
+        self.storage.open("a.txt")
+        self.storage.open("c.txt")
+
+        self.assertFalse(os.path.exists(self.storage._cache_path("b.txt")))
+        self.assertEqual(len(self.cached_files()), 2)
+        self.storage.open("a.txt")
+        self.assertEqual(self.storage.stats, {"hits": 2, "misses": 3})
+
+    def test_evict_abandoned_downloads(self):
+        stale = os.path.join(self.tmpdir.name, ".tmp-stale")
+        active = os.path.join(self.tmpdir.name, ".tmp-active")
+        for path in (stale, active):
+            with open(path, "wb") as f:
+                f.write(b"12345678")
+        os.utime(stale, (1, 1))
+        self.storage.touch("a.txt", io.StringIO("1234"))
+        self.storage.open("a.txt")
+
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(active))
+        # Downloads in progress count towards the size of the cache.
+        self.assertEqual(self.cached_files(), [])
+
+    def test_open_hit_evicted_concurrently(self):
+        self.storage.touch("file.txt", io.StringIO("foo"))
+        self.storage.open("file.txt")
+        with mock.patch(
+            "gluepy.files.storages.cache.os.utime", side_effect=FileNotFoundError
+        ):
+            self.assertEqual(self.storage.open("file.txt"), b"foo")
+        self.assertEqual(self.storage.stats, {"hits": 1, "misses": 1})
+
+    def test_delegates(self):
+        self.storage.touch("path/to/file.txt", io.StringIO("foo"))
+        self.assertTrue(self.storage.exists("path/to/file.txt"))
+        self.assertTrue(self.storage.isdir("path/to"))
+        self.assertEqual(self.storage.ls("path/to"), (["file.txt"], []))
+        self.storage.rm("path", recursive=True)
+        self.assertFalse(self.storage.exists("path"))
+
+    def test_read_range(self):
+        self.storage.touch("file.txt", io.StringIO("foobar"))
+        with mock.patch.object(
+            self.storage.storage, "read_range", wraps=self.storage.storage.read_range
+        ) as mock_read_range:
+            self.assertEqual(self.storage.read_range("file.txt", 2, 3), b"oba")
+            mock_read_range.assert_called_once_with("file.txt", 2, 3)
+            # Range reads do not populate the cache.
+            self.assertEqual(self.cached_files(), [])
+
+            self.storage.open("file.txt")
+            self.assertEqual(self.storage.read_range("file.txt", 4, 10), b"ar")
+            self.assertEqual(mock_read_range.call_count, 1)
+        self.assertEqual(self.storage.size("file.txt"), 6)
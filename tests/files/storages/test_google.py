@@ -30,62 +30,191 @@ class GoogleStorageTestCase(TestCase):
 
     def test_open(self):
         mock_blob = mock.Mock()
-        mock_bytesio_instance = mock.Mock()
-        mock_bytesio_instance.read.return_value = "foo"
+        mock_blob.download_as_bytes.return_value = b"foo"
         self.storage.bucket.blob.return_value = mock_blob
-        with mock.patch("gluepy.files.storages.google.BytesIO") as mock_bytesio:
-            mock_bytesio.return_value = mock_bytesio_instance
-            f = self.storage.open("file.txt")
+        f = self.storage.open("file.txt")
         self.storage.bucket.blob.assert_called_once_with(
             os.path.join(default_settings.STORAGE_ROOT, "file.txt")
         )
-        mock_blob.download_to_file.assert_called_once_with(mock_bytesio_instance)
+        # Small blobs are downloaded in a single request.
+        mock_blob.download_as_bytes.assert_called_once()
+        mock_blob.reload.assert_not_called()
         # The returned value from f is the contents of the file,
         # not a stream.
-        self.assertEqual(f, "foo")
+        self.assertEqual(f, b"foo")
+
+    def test_open_parallel_ranges(self):
+        content = b"0123456789"
+
+        def download_as_bytes(start, end, **kwargs):
+            stop = end + 1
+            return content[start:stop]
+
+        mock_blob = mock.Mock()
+        mock_blob.generation = 1
+        mock_blob.size = len(content)
+        mock_blob.download_as_bytes.side_effect = download_as_bytes
+        self.storage.bucket.blob.return_value = mock_blob
+        self.storage.download_chunksize = 4
+        f = self.storage.open("file.txt")
+
+        self.assertEqual(f, content)
+        mock_blob.reload.assert_called_once_with(if_generation_match=1)
+        self.assertEqual(mock_blob.download_as_bytes.call_count, 3)
+        for call in mock_blob.download_as_bytes.call_args_list[1:]:
+            self.assertEqual(call.kwargs["if_generation_match"], 1)
+
+    def test_open_missing(self):
+        from google.api_core import exceptions as api_exceptions
+
+        mock_blob = mock.Mock()
+        mock_blob.download_as_bytes.side_effect = api_exceptions.NotFound("missing")
+        self.storage.bucket.blob.return_value = mock_blob
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open("file.txt")
+
+    def test_open_stream(self):
+        mock_blob = mock.Mock()
+        mock_blob.open.return_value = io.BytesIO(b"foo")
+        self.storage.bucket.get_blob.return_value = mock_blob
+        with self.storage.open_stream("file.txt") as stream:
+            self.assertEqual(stream.read(), b"foo")
+        self.storage.bucket.get_blob.assert_called_once_with(
+            os.path.join(default_settings.STORAGE_ROOT, "file.txt")
+        )
+
+    def test_open_stream_missing(self):
+        self.storage.bucket.get_blob.return_value = None
+        with self.assertRaises(FileNotFoundError):
+            with self.storage.open_stream("file.txt"):
+                pass
 
     def test_cp(self):
-        with mock.patch("gluepy.files.storages.google.storage.Client") as _:
-            storage = GoogleStorage()
-            storage.bucket = mock.Mock()
-            storage.client = mock.Mock()
-        storage.isdir = mock.Mock()
-        storage.isdir.return_value = False
-        storage.isfile = mock.Mock()
-        storage.isfile.return_value = True
-        storage.exists = mock.Mock()
-        storage.exists.side_effect = (True, False)
-        storage.open = mock.Mock()
-        storage.open.return_value = "Foo"
-        storage.touch = mock.Mock()
-        with mock.patch("gluepy.files.storages.local.shutil.copy2") as _:
-            storage.cp("file.txt", "file2.txt")
-
-        storage.open.assert_called_once_with("file.txt")
-        storage.touch.assert_called_once()
+        self.storage.isfile = mock.Mock(return_value=True)
+        self.storage.exists = mock.Mock(side_effect=(True, False))
+        mock_src, mock_dest = mock.Mock(), mock.Mock()
+        mock_dest.rewrite.side_effect = (("token", 5, 10), (None, 10, 10))
+        self.storage.bucket.blob.side_effect = (mock_src, mock_dest)
 
-    def test_ls(self):
-        mock_blob_a = mock.Mock()
-        mock_blob_a.name = os.path.join(default_settings.STORAGE_ROOT, "file.txt")
-        mock_blob_a.exists.side_effect = (False,)
-        mock_blob_b = mock.Mock()
-        mock_blob_b.name = os.path.join(default_settings.STORAGE_ROOT, "file2.txt")
-        mock_blob_b.exists.side_effect = (False,)
-        mock_blob_c = mock.Mock()
-        mock_blob_c.name = os.path.join(default_settings.STORAGE_ROOT, "directory")
-        mock_blob_c.exists.side_effect = (True,)
-        self.storage.bucket.blob.side_effect = (mock_blob_a, mock_blob_b, mock_blob_c)
-        self.storage.client.list_blobs.side_effect = (
-            # Blobs returned as part of .ls() call
-            [mock_blob_a, mock_blob_b, mock_blob_c],
-            [],
-            [],
-            # Blob returned when running isdir on final iteration
-            [mock_blob_c],
+        stats = self.storage.cp("file.txt", "file2.txt")
+
+        self.storage.bucket.blob.assert_has_calls(
+            [
+                mock.call(os.path.join(default_settings.STORAGE_ROOT, "file.txt")),
+                mock.call(os.path.join(default_settings.STORAGE_ROOT, "file2.txt")),
+            ]
+        )
+        # Rewrite is called until the returned token is None.
+        self.assertEqual(mock_dest.rewrite.call_count, 2)
+        self.assertEqual(mock_dest.rewrite.call_args.kwargs["token"], "token")
+        self.assertEqual(stats, {"files": 1, "bytes": 10})
+
+    def test_cp_recursive(self):
+        src_prefix = os.path.join(default_settings.STORAGE_ROOT, "src") + "/"
+        dest_prefix = os.path.join(default_settings.STORAGE_ROOT, "dest") + "/"
+        mock_blobs = []
+        for name in ("a.txt", "sub/b.txt"):
+            mock_blob = mock.Mock()
+            mock_blob.name = src_prefix + name
+            mock_blobs.append(mock_blob)
+        self.storage.isfile = mock.Mock(return_value=False)
+        self.storage.isdir = mock.Mock(return_value=True)
+        self.storage.exists = mock.Mock(side_effect=(True, False))
+        self.storage.client.list_blobs.return_value = mock_blobs
+        self.storage.bucket.blob.return_value.rewrite.return_value = (None, 3, 3)
+
+        stats = self.storage.cp("src", "dest", recursive=True)
+
+        self.storage.bucket.blob.assert_has_calls(
+            [mock.call(dest_prefix + "a.txt"), mock.call(dest_prefix + "sub/b.txt")],
+            any_order=True,
+        )
+        self.assertEqual(stats, {"files": 2, "bytes": 6})
+
+    def test_cp_recursive_lazy_listing(self):
+        src_prefix = os.path.join(default_settings.STORAGE_ROOT, "src") + "/"
+        listed, rewrites = [], []
+
+        def list_blobs(*args, **kwargs):
+            for i in range(5):
+                mock_blob = mock.Mock()
+                mock_blob.name = f"{src_prefix}{i}.txt"
+                listed.append(mock_blob.name)
+                yield mock_blob
+
+        def rewrite(*args, **kwargs):
+            rewrites.append(len(listed))
+            return (None, 1, 1)
+
+        self.storage.max_concurrency = 2
+        self.storage.isfile = mock.Mock(return_value=False)
+        self.storage.isdir = mock.Mock(return_value=True)
+        self.storage.exists = mock.Mock(side_effect=(True, False))
+        self.storage.client.list_blobs.side_effect = list_blobs
+        self.storage.bucket.blob.return_value.rewrite.side_effect = rewrite
+
+        stats = self.storage.cp("src", "dest", recursive=True)
+
+        self.assertEqual(stats, {"files": 5, "bytes": 5})
+        # Copies start before the listing is exhausted, with at most
+        # max_concurrency copies pending and one more blob listed.
+        self.assertLessEqual(rewrites[0], 3)
+        self.storage.client.list_blobs.assert_called_once_with(
+            self.storage.bucket, prefix=src_prefix
         )
+
+    def test_cp_directory_not_recursive(self):
+        mock_blob = mock.Mock()
+        mock_blob.name = os.path.join(default_settings.STORAGE_ROOT, "src/sub/b.txt")
+        self.storage.isfile = mock.Mock(return_value=False)
+        self.storage.isdir = mock.Mock(return_value=True)
+        self.storage.exists = mock.Mock(side_effect=(True, False))
+        self.storage.client.list_blobs.return_value = [mock_blob]
+        with self.assertRaises(FileExistsError):
+            self.storage.cp("src", "dest")
+
+    def test_ls(self):
+        prefix = default_settings.STORAGE_ROOT + "/"
+
+        def page(names, prefixes):
+            blobs = []
+            for name in names:
+                mock_blob = mock.Mock()
+                mock_blob.name = prefix + name
+                blobs.append(mock_blob)
+            mock_page = mock.MagicMock()
+            mock_page.__iter__.return_value = blobs
+            mock_page.prefixes = tuple(prefix + p for p in prefixes)
+            return mock_page
+
+        self.storage.client.list_blobs.return_value.pages = [
+            page(["", "file.txt"], ["directory/"]),
+            page(["file2.txt"], []),
+        ]
         files, dirs = self.storage.ls(".")
         self.assertEqual(files, ["file.txt", "file2.txt"])
         self.assertEqual(dirs, ["directory/"])
+        # A single listing request per page, without any per blob requests.
+        self.storage.client.list_blobs.assert_called_once_with(
+            self.storage.bucket, prefix=prefix, delimiter="/"
+        )
+        self.storage.bucket.blob.assert_not_called()
+
+    def test_walk(self):
+        prefix = os.path.join(default_settings.STORAGE_ROOT, "path") + "/"
+        mock_blobs = []
+        for name in ("", "a.txt", "sub/", "sub/b.txt"):
+            mock_blob = mock.Mock()
+            mock_blob.name = prefix + name
+            mock_blobs.append(mock_blob)
+        self.storage.client.list_blobs.return_value = iter(mock_blobs)
+
+        self.assertEqual(
+            list(self.storage.walk("path")), ["path/a.txt", "path/sub/b.txt"]
+        )
+        self.storage.client.list_blobs.assert_called_once_with(
+            self.storage.bucket, prefix=prefix
+        )
 
     def test_mkdir(self):
         mock_blob = mock.Mock()
@@ -141,30 +270,34 @@ class GoogleStorageTestCase(TestCase):
         mock_blob.delete.assert_called_once()
 
     def test_rm_recursive(self):
-        mock_blob = mock.Mock()
-        # isdir checks: first call for "path/" -> True (it's a dir)
-        mock_blob.exists.side_effect = [False, True, True]
-        self.storage.bucket.blob.return_value = mock_blob
-
-        mock_child_blob = mock.Mock()
-        mock_child_blob.name = os.path.join(
-            default_settings.STORAGE_ROOT, "path", "child.txt"
-        )
-        mock_child_blob.exists.return_value = False
+        prefix = os.path.join(default_settings.STORAGE_ROOT, "path") + "/"
+        mock_blobs = []
+        for i in range(150):
+            mock_blob = mock.Mock()
+            mock_blob.name = f"{prefix}child{i}.txt"
+            mock_blobs.append(mock_blob)
+        self.storage.isdir = mock.Mock(return_value=True)
+        self.storage.client.list_blobs.side_effect = (mock_blobs[:2], mock_blobs)
+        self.storage.client.batch.return_value = mock.MagicMock()
 
-        # list_blobs calls: ls for "path/" returns child, then isdir checks
-        self.storage.client.list_blobs.side_effect = [
-            [mock_child_blob],  # isdir check for "path/"
-            [mock_child_blob],  # ls call
-            [],  # isdir check for child blob
-        ]
+        self.storage.rm("path/", recursive=True)
 
-        # Mock isdir and ls to simplify
-        self.storage.isdir = mock.Mock(side_effect=[True, False])
-        self.storage.ls = mock.Mock(return_value=(["child.txt"], []))
+        self.storage.client.list_blobs.assert_called_with(
+            self.storage.bucket, prefix=prefix
+        )
+        # Blobs are deleted in batches of at most 100 calls.
+        self.assertEqual(self.storage.client.batch.call_count, 2)
+        for mock_blob in mock_blobs:
+            mock_blob.delete.assert_called_once()
 
-        self.storage.rm("path/", recursive=True)
-        mock_blob.delete.assert_called_once()
+    def test_rm_directory_not_empty(self):
+        mock_blob = mock.Mock()
+        mock_blob.name = os.path.join(default_settings.STORAGE_ROOT, "path", "a.txt")
+        self.storage.isdir = mock.Mock(return_value=True)
+        self.storage.client.list_blobs.return_value = [mock_blob]
+        with self.assertRaises(FileExistsError):
+            self.storage.rm("path/")
+        mock_blob.delete.assert_not_called()
 
     def test_touch_stringio(self):
         content = io.StringIO("foo")
@@ -176,3 +309,33 @@ class GoogleStorageTestCase(TestCase):
             self.storage.touch("file.txt", content)
             # StringIO should be converted to BytesIO
             mock_blob.upload_from_file.assert_called_once()
+
+    def test_etag(self):
+        self.storage.bucket.get_blob.return_value = mock.Mock(generation=123)
+        self.assertEqual(self.storage.etag("file.txt"), "123")
+        self.storage.bucket.get_blob.assert_called_once_with(
+            os.path.join(default_settings.STORAGE_ROOT, "file.txt")
+        )
+
+    def test_etag_missing(self):
+        self.storage.bucket.get_blob.return_value = None
+        with self.assertRaises(FileNotFoundError):
+            self.storage.etag("file.txt")
+
+    def test_read_range(self):
+        mock_blob = mock.Mock()
+        mock_blob.download_as_bytes.return_value = b"oba"
+        self.storage.bucket.blob.return_value = mock_blob
+        self.assertEqual(self.storage.read_range("file.txt", 2, 3), b"oba")
+        self.storage.bucket.blob.assert_called_once_with(
+            os.path.join(default_settings.STORAGE_ROOT, "file.txt")
+        )
+        self.assertEqual(mock_blob.download_as_bytes.call_args.kwargs["start"], 2)
+        self.assertEqual(mock_blob.download_as_bytes.call_args.kwargs["end"], 4)
+
+    def test_size(self):
+        self.storage.bucket.get_blob.return_value = mock.Mock(size=6)
+        self.assertEqual(self.storage.size("file.txt"), 6)
+        self.storage.bucket.get_blob.return_value = None
+        with self.assertRaises(FileNotFoundError):
+            self.storage.size("file.txt")
@@ -1,5 +1,6 @@
 import io
 import os
+import tempfile
 from unittest import TestCase, mock
 from gluepy.files.storages.local import LocalStorage
 from gluepy.conf import default_settings
@@ -8,12 +9,34 @@ from gluepy.conf import default_settings
 class LocalStorageTestCase(TestCase):
     def test_touch(self):
         storage = LocalStorage()
-        with mock.patch("builtins.open") as mock_file:
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
             storage.touch("file.txt", io.StringIO("foo"))
+            storage.touch("file.txt", io.StringIO("bar"))
+            self.assertEqual(storage.open("file.txt"), b"bar")
+            self.assertEqual(os.listdir(root), ["file.txt"])
 
-        mock_file.assert_called_once_with(
-            os.path.join(default_settings.STORAGE_ROOT, "file.txt"), mode="wb"
-        )
+    def test_touch_replaces_inode(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
+            storage.touch("file.txt", io.StringIO("foo"))
+            inode = os.stat(os.path.join(root, "file.txt")).st_ino
+            with open(os.path.join(root, "file.txt"), "rb") as previous:
+                storage.touch("file.txt", io.StringIO("bar"))
+                self.assertEqual(previous.read(), b"foo")
+            self.assertNotEqual(os.stat(os.path.join(root, "file.txt")).st_ino, inode)
+
+    def test_touch_failure_removes_temporary_file(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
+            with self.assertRaises(TypeError):
+                storage.touch("file.txt", mock.Mock(read=mock.Mock(return_value=1)))
+            self.assertEqual(os.listdir(root), [])
 
     def test_cp(self):
         storage = LocalStorage()
@@ -21,14 +44,42 @@ class LocalStorageTestCase(TestCase):
         storage.isdir.return_value = False
         storage.exists = mock.Mock()
         storage.exists.side_effect = (False, True)
-        with mock.patch("gluepy.files.storages.local.shutil.copy2") as mock_copy2:
-            storage.cp("file.txt", "file2.txt")
+        with mock.patch(
+            "gluepy.files.storages.local.shutil.copy2"
+        ) as mock_copy2, mock.patch(
+            "gluepy.files.storages.local.os.path.getsize", return_value=3
+        ):
+            stats = storage.cp("file.txt", "file2.txt")
 
         mock_copy2.assert_called_once_with(
             os.path.join(default_settings.STORAGE_ROOT, "file.txt"),
             os.path.join(default_settings.STORAGE_ROOT, "file2.txt"),
             follow_symlinks=True,
         )
+        self.assertEqual(stats, {"files": 1, "bytes": 3})
+
+    def test_cp_recursive(self):
+        storage = LocalStorage()
+        storage.isdir = mock.Mock()
+        storage.isdir.return_value = True
+        storage.exists = mock.Mock()
+        storage.exists.side_effect = (False, True)
+        with mock.patch("gluepy.files.storages.local.shutil.copytree") as mock_copytree:
+            storage.cp("dir", "dir2", recursive=True)
+
+        mock_copytree.assert_called_once_with(
+            os.path.join(default_settings.STORAGE_ROOT, "dir"),
+            os.path.join(default_settings.STORAGE_ROOT, "dir2"),
+            copy_function=mock.ANY,
+            dirs_exist_ok=False,
+        )
+
+    def test_cp_directory_not_recursive(self):
+        storage = LocalStorage()
+        storage.isdir = mock.Mock()
+        storage.isdir.return_value = True
+        with self.assertRaises(ValueError):
+            storage.cp("dir", "dir2")
 
     def test_cp_overwrite_error(self):
         storage = LocalStorage()
@@ -48,7 +99,11 @@ class LocalStorageTestCase(TestCase):
         # Mock that file already exists
         storage.exists = mock.Mock()
         storage.exists.side_effect = (True, True)
-        with mock.patch("gluepy.files.storages.local.shutil.copy2") as mock_copy2:
+        with mock.patch(
+            "gluepy.files.storages.local.shutil.copy2"
+        ) as mock_copy2, mock.patch(
+            "gluepy.files.storages.local.os.path.getsize", return_value=3
+        ):
             # overwrite=True is necessary if file already exist
             storage.cp("file.txt", "file2.txt", overwrite=True)
 
@@ -70,24 +125,55 @@ class LocalStorageTestCase(TestCase):
         # not a stream.
         self.assertEqual(f, "foo")
 
+    def test_open_stream(self):
+        storage = LocalStorage()
+        with mock.patch("builtins.open", mock.mock_open(read_data="foo")) as mock_file:
+            with storage.open_stream("file.txt") as stream:
+                f = stream.read()
+
+        mock_file.assert_called_once_with(
+            os.path.join(default_settings.STORAGE_ROOT, "file.txt"), mode="rb"
+        )
+        self.assertEqual(f, "foo")
+
     def test_ls(self):
         storage = LocalStorage()
-        with mock.patch("gluepy.files.storages.local.os.listdir") as mock_ls:
-            mock_ls.return_value = ["file.txt", "file2.txt", "directory"]
-            storage.isdir = mock.Mock()
-            storage.isdir.side_effect = lambda x: x in {
-                os.path.join(default_settings.STORAGE_ROOT, "directory")
-            }
-            storage.isfile = mock.Mock()
-            storage.isfile.side_effect = lambda x: x in {
-                os.path.join(default_settings.STORAGE_ROOT, "file.txt"),
-                os.path.join(default_settings.STORAGE_ROOT, "file2.txt"),
-            }
-            files, dirs = storage.ls(".")
-
-        self.assertEqual(files, ["file.txt", "file2.txt"])
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
+            os.makedirs(os.path.join(root, "directory"))
+            for name in ("file.txt", "file2.txt"):
+                open(os.path.join(root, name), "w").close()
+            with mock.patch(
+                "gluepy.files.storages.local.os.stat"
+            ) as mock_stat, mock.patch(
+                "gluepy.files.storages.local.os.path.exists"
+            ) as mock_exists:
+                files, dirs = storage.ls(".")
+
+            # The file type is read from the directory listing itself.
+            mock_stat.assert_not_called()
+            mock_exists.assert_not_called()
+
+        self.assertEqual(sorted(files), ["file.txt", "file2.txt"])
         self.assertEqual(dirs, ["directory"])
 
+    def test_walk(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
+            os.makedirs(os.path.join(root, "path", "to", "dir"))
+            for name in ("path/a.txt", "path/to/b.txt", "path/to/dir/c.txt"):
+                open(os.path.join(root, name), "w").close()
+
+            files = storage.walk("path")
+            self.assertNotIsInstance(files, list)
+            self.assertEqual(
+                sorted(files),
+                ["path/a.txt", "path/to/b.txt", "path/to/dir/c.txt"],
+            )
+
     def test_mkdir(self):
         storage = LocalStorage()
         with mock.patch("gluepy.files.storages.local.os.makedirs") as mock_makedirs:
@@ -132,3 +218,36 @@ class LocalStorageTestCase(TestCase):
         mock_exists.assert_called_once_with(
             os.path.join(default_settings.STORAGE_ROOT, "path", "to", "dir"),
         )
+
+    def test_read_range(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
+            with open(os.path.join(root, "file.txt"), "wb") as f:
+                f.write(b"foobar")
+
+            self.assertEqual(storage.read_range("file.txt", 2, 3), b"oba")
+            self.assertEqual(storage.read_range("file.txt", 4, 10), b"ar")
+            self.assertEqual(storage.size("file.txt"), 6)
+            with self.assertRaises(FileNotFoundError):
+                storage.read_range("missing.txt", 0, 1)
+
+    def test_rm(self):
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            default_settings, "STORAGE_ROOT", root
+        ):
+            os.makedirs(os.path.join(root, "path", "to"))
+            open(os.path.join(root, "path", "to", "file.txt"), "w").close()
+
+            with self.assertRaises(ValueError):
+                storage.rm("path")
+            storage.rm("path/to/file.txt")
+            self.assertFalse(storage.exists("path/to/file.txt"))
+            with self.assertRaises(FileNotFoundError):
+                storage.rm("path/to/file.txt")
+
+            open(os.path.join(root, "path", "to", "file.txt"), "w").close()
+            storage.rm("path", recursive=True)
+            self.assertFalse(storage.exists("path"))
@@ -7,37 +7,52 @@ from gluepy.conf import default_settings
 
 class MemoryStorageTestCase(TestCase):
     def test_touch(self):
-        contents = io.StringIO("foo")
         storage = MemoryStorage()
-        storage.touch("file.txt", contents)
+        storage.touch("file.txt", io.StringIO("foo"))
 
         full_path = os.path.join(default_settings.STORAGE_ROOT, "file.txt")
-        paths = os.path.dirname(full_path).split(storage.separator)
-        dir = storage.FILE_SYSTEM
-        for path in paths:
-            dir = dir[path]
-        self.assertEqual(dir["file.txt"], contents)
+        self.assertEqual(storage.FILES[full_path], b"foo")
+        self.assertIn("file.txt", storage.DIRECTORIES[default_settings.STORAGE_ROOT])
+        self.assertEqual(storage.nbytes, 3)
+
+    def test_touch_overwrite(self):
+        storage = MemoryStorage()
+        storage.touch("file.txt", io.StringIO("foo"))
+        storage.touch("file.txt", io.BytesIO(b"foobar"))
+        self.assertEqual(storage.open("file.txt"), b"foobar")
+        self.assertEqual(storage.nbytes, 6)
+
+    def test_touch_max_bytes(self):
+        storage = MemoryStorage()
+        storage.max_bytes = 5
+        storage.touch("file.txt", io.StringIO("foo"))
+        with self.assertRaises(MemoryError):
+            storage.touch("file2.txt", io.StringIO("foo"))
+        self.assertFalse(storage.exists("file2.txt"))
+        self.assertEqual(storage.nbytes, 3)
 
     def test_cp(self):
         storage = MemoryStorage()
-        storage.isdir = mock.Mock()
-        storage.isdir.return_value = False
-        storage.exists = mock.Mock()
-        storage.exists.return_value = False
-        storage.open = mock.Mock()
-        storage.open.return_value = "Foo"
+        storage.touch("file.txt", io.StringIO("Foo"))
 
-        storage.cp("file.txt", "file2.txt")
+        stats = storage.cp("file.txt", "path/file2.txt")
 
-        full_path = os.path.join(default_settings.STORAGE_ROOT, "file2.txt")
-        paths = os.path.dirname(full_path).split(storage.separator)
-        dir = storage.FILE_SYSTEM
-        for path in paths:
-            dir = dir[path]
-        self.assertEqual(
-            dir["file2.txt"].read(),
-            "Foo",
-        )
+        self.assertEqual(storage.open("path/file2.txt"), b"Foo")
+        # Immutable content is shared rather than copied.
+        self.assertIs(storage.open("path/file2.txt"), storage.open("file.txt"))
+        self.assertEqual(stats, {"files": 1, "bytes": 3})
+        self.assertEqual(storage.nbytes, 6)
+
+    def test_cp_recursive(self):
+        storage = MemoryStorage()
+        storage.touch("path/file.txt", io.StringIO("foo"))
+        storage.touch("path/directory/file2.txt", io.StringIO("bar"))
+
+        stats = storage.cp("path", "copy", recursive=True)
+
+        self.assertEqual(storage.open("copy/file.txt"), b"foo")
+        self.assertEqual(storage.open("copy/directory/file2.txt"), b"bar")
+        self.assertEqual(stats, {"files": 2, "bytes": 6})
 
     def test_cp_overwrite_error(self):
         storage = MemoryStorage()
@@ -52,24 +67,12 @@ class MemoryStorageTestCase(TestCase):
 
     def test_cp_overwrite_success(self):
         storage = MemoryStorage()
-        storage.isdir = mock.Mock()
-        storage.isdir.return_value = False
-        storage.exists = mock.Mock()
-        storage.exists.return_value = True
-        storage.open = mock.Mock()
-        storage.open.return_value = "Foo"
+        storage.touch("file.txt", io.StringIO("Foo"))
+        storage.touch("file2.txt", io.StringIO("Bar"))
 
         storage.cp("file.txt", "file2.txt", overwrite=True)
 
-        full_path = os.path.join(default_settings.STORAGE_ROOT, "file2.txt")
-        paths = os.path.dirname(full_path).split(storage.separator)
-        dir = storage.FILE_SYSTEM
-        for path in paths:
-            dir = dir[path]
-        self.assertEqual(
-            dir["file2.txt"].read(),
-            "Foo",
-        )
+        self.assertEqual(storage.open("file2.txt"), b"Foo")
 
     def test_open(self):
         storage = MemoryStorage()
@@ -77,7 +80,26 @@ class MemoryStorageTestCase(TestCase):
         f = storage.open("path/file.txt")
         # The returned value from f is the contents of the file,
         # not a stream.
-        self.assertEqual(f, "foo")
+        self.assertEqual(f, b"foo")
+        # Repeated reads return the same content.
+        self.assertEqual(storage.open("path/file.txt", mode="r"), "foo")
+
+    def test_open_missing(self):
+        storage = MemoryStorage()
+        with self.assertRaises(FileNotFoundError):
+            storage.open("path/file.txt")
+
+    def test_open_stream(self):
+        storage = MemoryStorage()
+        storage.touch("path/file.txt", io.BytesIO(b"foo"))
+        with storage.open_stream("path/file.txt") as stream:
+            self.assertEqual(stream.read(), b"foo")
+
+    def test_open_stream_text(self):
+        storage = MemoryStorage()
+        storage.touch("path/file.txt", io.StringIO("foo"))
+        with storage.open_stream("path/file.txt", mode="r") as stream:
+            self.assertEqual(stream.read(), "foo")
 
     def test_rm(self):
         storage = MemoryStorage()
@@ -98,7 +120,9 @@ class MemoryStorageTestCase(TestCase):
         storage.touch("path/file.txt", io.StringIO("foo"))
         self.assertTrue(storage.exists("path/file.txt"))
         storage.rm("path/", recursive=True)
-        self.assertFalse(storage.exists("file.txt"))
+        self.assertFalse(storage.exists("path/file.txt"))
+        self.assertFalse(storage.exists("path"))
+        self.assertEqual(storage.nbytes, 0)
 
     def test_ls(self):
         storage = MemoryStorage()
@@ -112,6 +136,17 @@ class MemoryStorageTestCase(TestCase):
         self.assertEqual(files, ["file.txt", "file2.txt"])
         self.assertEqual(dirs, ["directory"])
 
+    def test_walk(self):
+        storage = MemoryStorage()
+        storage.touch("path/file.txt", io.StringIO("foo"))
+        storage.touch("path/directory/file2.txt", io.StringIO("foo"))
+        storage.touch("other/file3.txt", io.StringIO("foo"))
+
+        self.assertEqual(
+            sorted(storage.walk("path")),
+            ["path/directory/file2.txt", "path/file.txt"],
+        )
+
     def test_mkdir(self):
         storage = MemoryStorage()
         storage.mkdir("path/to/dir")
@@ -135,3 +170,23 @@ class MemoryStorageTestCase(TestCase):
         self.assertTrue(storage.exists("path/to/dir"))
         self.assertTrue(storage.exists("path/to/dir/file.txt"))
         self.assertFalse(storage.exists("path/to/missing-dir"))
+
+    def test_etag(self):
+        storage = MemoryStorage()
+        storage.touch("file.txt", io.StringIO("foo"))
+        etag = storage.etag("file.txt")
+        self.assertEqual(etag, storage.etag("file.txt"))
+        storage.touch("file.txt", io.StringIO("bar"))
+        self.assertNotEqual(etag, storage.etag("file.txt"))
+        with self.assertRaises(FileNotFoundError):
+            storage.etag("missing.txt")
+
+    def test_read_range(self):
+        storage = MemoryStorage()
+        storage.touch("file.txt", io.StringIO("foobar"))
+        self.assertEqual(storage.read_range("file.txt", 2, 3), b"oba")
+        self.assertEqual(storage.read_range("file.txt", 4, 10), b"ar")
+        self.assertEqual(storage.read_range("file.txt", 10, 2), b"")
+        self.assertEqual(storage.size("file.txt"), 6)
+        with self.assertRaises(FileNotFoundError):
+            storage.read_range("missing.txt", 0, 1)
@@ -0,0 +1,96 @@
+from unittest import TestCase, mock
+from gluepy.files.storages.metadata import MetadataCache, cached_metadata
+
+
+class MetadataCacheTestCase(TestCase):
+    def test_get_set(self):
+        cache = MetadataCache(ttl=60)
+        self.assertIsNone(cache.get("exists", "path"))
+        cache.set("exists", "path", False)
+        self.assertFalse(cache.get("exists", "path"))
+        self.assertIsNone(cache.get("isdir", "path"))
+
+    def test_expired(self):
+        cache = MetadataCache(ttl=60)
+        with mock.patch("gluepy.files.storages.metadata.time.monotonic") as mock_time:
+            mock_time.return_value = 0
+            cache.set("exists", "path", True)
+            mock_time.return_value = 59
+            self.assertTrue(cache.get("exists", "path"))
+            mock_time.return_value = 61
+            self.assertIsNone(cache.get("exists", "path"))
+
+    def test_invalidate(self):
+        cache = MetadataCache(ttl=60)
+        for path in ("a", "a/", "a/b", "a/b/c.txt", "a/bc", "d"):
+            cache.set("exists", path, False)
+
+        cache.invalidate("a/b")
+        for path in ("a", "a/", "a/b", "a/b/c.txt"):
+            self.assertIsNone(cache.get("exists", path))
+        self.assertFalse(cache.get("exists", "a/bc"))
+        self.assertFalse(cache.get("exists", "d"))
+
+    def test_invalidate_absolute(self):
+        cache = MetadataCache(ttl=60)
+        for path in ("/", "/a", "/a/b.txt", "/c.txt"):
+            cache.set("exists", path, True)
+
+        cache.invalidate("/a")
+        for path in ("/", "/a", "/a/b.txt"):
+            self.assertIsNone(cache.get("exists", path))
+        self.assertTrue(cache.get("exists", "/c.txt"))
+
+        cache.add_file("/a/b.txt")
+        cache.invalidate("/")
+        self.assertEqual(len(cache._entries), 0)
+        self.assertEqual(cache._aliases, {})
+        self.assertEqual(cache._children, {})
+
+    def test_max_entries(self):
+        cache = MetadataCache(ttl=60, max_entries=2)
+        cache.set("exists", "a/b.txt", True)
+        cache.set("exists", "a/c.txt", True)
+        cache.get("exists", "a/b.txt")
+        cache.set("exists", "a/d.txt", True)
+
+        self.assertIsNone(cache.get("exists", "a/c.txt"))
+        self.assertTrue(cache.get("exists", "a/b.txt"))
+        self.assertTrue(cache.get("exists", "a/d.txt"))
+        self.assertEqual(cache._children, {"a": {"a/b.txt", "a/d.txt"}})
+
+    def test_add_file(self):
+        cache = MetadataCache(ttl=60)
+        cache.set("isdir", "a", False)
+        cache.add_file("a/b.txt")
+        self.assertIsNone(cache.get("isdir", "a"))
+        self.assertTrue(cache.get("exists", "a/b.txt"))
+        self.assertTrue(cache.get("isfile", "a/b.txt"))
+
+    def test_remove(self):
+        cache = MetadataCache(ttl=60)
+        cache.add_file("a/b.txt")
+        cache.remove("a")
+        self.assertIsNone(cache.get("exists", "a/b.txt"))
+        self.assertFalse(cache.get("exists", "a"))
+        self.assertFalse(cache.get("isdir", "a"))
+
+    def test_cached_metadata(self):
+        class Storage:
+            metadata_cache = None
+            calls = 0
+
+            @cached_metadata
+            def exists(self, path):
+                self.calls += 1
+                return False
+
+        storage = Storage()
+        storage.exists("path")
+        storage.exists("path")
+        self.assertEqual(storage.calls, 2)
+
+        storage.metadata_cache = MetadataCache(ttl=60)
+        self.assertFalse(storage.exists("path"))
+        self.assertFalse(storage.exists("path"))
+        self.assertEqual(storage.calls, 3)
@@ -0,0 +1,350 @@
+import io
+from unittest import TestCase, mock
+from botocore.exceptions import ClientError
+from gluepy.files.storages.s3 import S3Storage
+from gluepy.files.storages.metadata import MetadataCache
+from gluepy.conf import default_settings
+
+
+class S3StorageTestCase(TestCase):
+    def setUp(self) -> None:
+        with mock.patch("gluepy.files.storages.s3.default_settings") as settings:
+            settings.AWS_STORAGE_BUCKET_NAME = "bucket"
+            settings.AWS_S3_MULTIPART_THRESHOLD = 5
+            settings.AWS_S3_MULTIPART_CHUNKSIZE = 10
+            settings.AWS_S3_MAX_CONCURRENCY = 4
+            settings.STORAGE_METADATA_CACHE_TTL = None
+            self.storage = S3Storage()
+        self.storage._bucket = mock.Mock()
+        self.storage._connection = mock.Mock()
+        return super().setUp()
+
+    def test_transfer_config(self):
+        self.assertEqual(self.storage.transfer_config.multipart_threshold, 5)
+        self.assertEqual(self.storage.transfer_config.multipart_chunksize, 10)
+        self.assertEqual(self.storage.transfer_config.max_concurrency, 4)
+
+    def test_touch(self):
+        content = io.BytesIO(b"foo")
+        mock_obj = mock.Mock()
+        self.storage.bucket.Object.return_value = mock_obj
+        self.storage.touch("file.txt", content)
+        self.storage.bucket.Object.assert_called_once_with("file.txt")
+        mock_obj.upload_fileobj.assert_called_once_with(
+            content, Config=self.storage.transfer_config
+        )
+
+    def test_touch_stringio(self):
+        mock_obj = mock.Mock()
+        self.storage.bucket.Object.return_value = mock_obj
+        self.storage.touch("file.txt", io.StringIO("foo" * 1_000_000))
+        stream = mock_obj.upload_fileobj.call_args[0][0]
+        # Text streams are encoded while read rather than copied up front.
+        self.assertNotIsInstance(stream, io.BytesIO)
+        self.assertEqual(stream.read(), b"foo" * 1_000_000)
+
+    def _mock_get_object(self, content, part_size):
+        def get_object(Bucket, Key, Range, **kwargs):
+            start, end = map(int, Range.replace("bytes=", "").split("-"))
+            stop = min(end + 1, len(content))
+            return {
+                "Body": mock.Mock(read=lambda: content[start:stop]),
+                "ContentRange": f"bytes {start}-{stop - 1}/{len(content)}",
+                "ETag": "etag",
+            }
+
+        self.storage.transfer_config.multipart_chunksize = part_size
+        self.storage.connection.meta.client.get_object.side_effect = get_object
+        return self.storage.connection.meta.client.get_object
+
+    def test_open(self):
+        get_object = self._mock_get_object(b"foo", part_size=10)
+        self.assertEqual(self.storage.open("file.txt"), b"foo")
+        self.assertEqual(self.storage.open("file.txt", mode="r"), "foo")
+        self.assertEqual(get_object.call_count, 2)
+
+    def test_open_parallel_ranges(self):
+        get_object = self._mock_get_object(b"0123456789", part_size=4)
+        self.assertEqual(self.storage.open("file.txt"), b"0123456789")
+        self.assertEqual(get_object.call_count, 3)
+        ranges = sorted(call.kwargs["Range"] for call in get_object.call_args_list)
+        self.assertEqual(ranges, ["bytes=0-3", "bytes=4-7", "bytes=8-9"])
+        for call in get_object.call_args_list[1:]:
+            self.assertEqual(call.kwargs["IfMatch"], "etag")
+
+    def test_open_missing(self):
+        self.storage.connection.meta.client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+        )
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open("file.txt")
+
+    def test_open_empty(self):
+        self.storage.connection.meta.client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "InvalidRange"}}, "GetObject"
+        )
+        self.assertEqual(self.storage.open("file.txt"), b"")
+
+    def test_rm(self):
+        self.storage.rm("file.txt")
+        self.storage.bucket.Object.assert_called_once_with("file.txt")
+        self.storage.bucket.Object.return_value.delete.assert_called_once()
+
+    def test_rm_recursive(self):
+        client = self.storage.connection.meta.client
+        pages = [
+            {"Contents": [{"Key": f"path/{i}.txt"} for i in range(1000)]},
+            {"Contents": [{"Key": f"path/{i}.txt"} for i in range(1000, 1500)]},
+        ]
+        client.get_paginator.return_value.paginate.return_value = pages
+        client.delete_objects.return_value = {}
+
+        self.storage.rm("path", recursive=True)
+
+        client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket="foo", Prefix="path/", PaginationConfig={"PageSize": 1000}
+        )
+        self.assertEqual(client.delete_objects.call_count, 2)
+        deleted = sorted(
+            len(call.kwargs["Delete"]["Objects"])
+            for call in client.delete_objects.call_args_list
+        )
+        self.assertEqual(deleted, [500, 1000])
+
+    def test_rm_recursive_errors(self):
+        client = self.storage.connection.meta.client
+        client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "path/file.txt"}]}
+        ]
+        client.delete_objects.return_value = {
+            "Errors": [{"Key": "path/file.txt", "Message": "Access Denied"}]
+        }
+        with self.assertRaises(OSError):
+            self.storage.rm("path", recursive=True)
+
+    def test_cp(self):
+        client = self.storage.connection.meta.client
+        client.head_object.side_effect = (
+            ClientError({"Error": {"Code": "404"}}, "HeadObject"),
+            {"ContentLength": 3},
+        )
+        client.list_objects_v2.return_value = {}
+        stats = self.storage.cp("file.txt", "file2.txt")
+        client.copy_object.assert_called_once_with(
+            CopySource={"Bucket": "foo", "Key": "file.txt"},
+            Bucket="foo",
+            Key="file2.txt",
+        )
+        self.assertEqual(stats, {"files": 1, "bytes": 3})
+
+    def test_cp_metadata_cache(self):
+        client = self.storage.connection.meta.client
+        self.storage.metadata_cache = MetadataCache(ttl=60)
+        client.head_object.side_effect = (
+            ClientError({"Error": {"Code": "404"}}, "HeadObject"),
+            {"ContentLength": 3},
+        )
+        client.list_objects_v2.return_value = {}
+        self.storage.cp("file.txt", "file2.txt")
+        self.assertTrue(self.storage.exists("file2.txt"))
+        self.assertTrue(self.storage.isfile("file2.txt"))
+        self.assertEqual(client.head_object.call_count, 2)
+
+    def test_cp_recursive_metadata_cache(self):
+        client = self.storage.connection.meta.client
+        self.storage.metadata_cache = MetadataCache(ttl=60)
+        client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        client.list_objects_v2.return_value = {}
+        self.assertFalse(self.storage.exists("dest/a.txt"))
+
+        client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "src/a.txt", "Size": 3}]}
+        ]
+        self.storage.cp("src", "dest", recursive=True)
+        client.head_object.side_effect = None
+        client.head_object.return_value = {"ContentLength": 3}
+        self.assertTrue(self.storage.exists("dest/a.txt"))
+
+    def test_cp_exists(self):
+        self.storage.connection.meta.client.head_object.return_value = {}
+        with self.assertRaises(FileExistsError):
+            self.storage.cp("file.txt", "file2.txt")
+
+    def test_cp_recursive(self):
+        client = self.storage.connection.meta.client
+        client.list_objects_v2.return_value = {}
+        client.get_paginator.return_value.paginate.return_value = [
+            {
+                "Contents": [
+                    {"Key": "src/a.txt", "Size": 3},
+                    {"Key": "src/sub/b.txt", "Size": 10},
+                ]
+            }
+        ]
+        stats = self.storage.cp("src", "dest", recursive=True)
+
+        # Small objects use a single copy request, large ones a multipart copy.
+        client.copy_object.assert_called_once_with(
+            CopySource={"Bucket": "foo", "Key": "src/a.txt"},
+            Bucket="foo",
+            Key="dest/a.txt",
+        )
+        client.copy.assert_called_once_with(
+            {"Bucket": "foo", "Key": "src/sub/b.txt"},
+            "foo",
+            "dest/sub/b.txt",
+            Config=self.storage.transfer_config,
+        )
+        self.assertEqual(stats, {"files": 2, "bytes": 13})
+
+    def test_cp_recursive_exists(self):
+        client = self.storage.connection.meta.client
+        client.list_objects_v2.return_value = {"Contents": [{"Key": "dest/a.txt"}]}
+        with self.assertRaises(FileExistsError):
+            self.storage.cp("src", "dest", recursive=True)
+
+    def test_walk(self):
+        client = self.storage.connection.meta.client
+        client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "path/a.txt"}, {"Key": "path/sub/"}]},
+            {"Contents": [{"Key": "path/sub/b.txt"}]},
+        ]
+        self.assertEqual(
+            list(self.storage.walk("path")), ["path/a.txt", "path/sub/b.txt"]
+        )
+
+    def test_ls(self):
+        path = self.storage.abspath("path")
+        client = self.storage.connection.meta.client
+        client.get_paginator.return_value.paginate.return_value = [
+            {
+                "CommonPrefixes": [{"Prefix": f"{path}/sub/"}],
+                "Contents": [{"Key": f"{path}/"}, {"Key": f"{path}/a.txt"}],
+            },
+        ]
+        files, dirs = self.storage.ls("path")
+        self.assertEqual(files, ["path/a.txt"])
+        self.assertEqual(dirs, ["path/sub"])
+
+    def test_open_stream(self):
+        content = b"0123456789"
+        mock_obj = mock.Mock()
+        mock_obj.content_length = len(content)
+
+        def get(Range):
+            start, end = map(int, Range.replace("bytes=", "").split("-"))
+            stop = end + 1
+            body = mock.Mock()
+            body.read.return_value = content[start:stop]
+            return {"Body": body}
+
+        mock_obj.get.side_effect = get
+        self.storage.bucket.Object.return_value = mock_obj
+        with self.storage.open_stream("file.txt") as stream:
+            stream.seek(-3, 2)
+            self.assertEqual(stream.read(), b"789")
+            stream.seek(2)
+            self.assertEqual(stream.read(3), b"234")
+
+        self.storage.bucket.Object.assert_called_once_with("file.txt")
+
+    def test_open_stream_text(self):
+        mock_obj = mock.Mock()
+        mock_obj.content_length = 3
+        mock_obj.get.return_value = {"Body": mock.Mock(read=lambda: b"foo")}
+        self.storage.bucket.Object.return_value = mock_obj
+        with self.storage.open_stream("file.txt", mode="r") as stream:
+            self.assertEqual(stream.read(), "foo")
+
+    def test_open_stream_missing(self):
+        mock_obj = mock.Mock()
+        type(mock_obj).content_length = mock.PropertyMock(
+            side_effect=ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        )
+        self.storage.bucket.Object.return_value = mock_obj
+        with self.assertRaises(FileNotFoundError):
+            with self.storage.open_stream("file.txt"):
+                pass
+
+    def test_etag(self):
+        self.storage.connection.meta.client.head_object.return_value = {"ETag": '"abc"'}
+        self.assertEqual(self.storage.etag("file.txt"), "abc")
+        self.storage.connection.meta.client.head_object.assert_called_once_with(
+            Bucket=default_settings.AWS_STORAGE_BUCKET_NAME, Key="file.txt"
+        )
+
+    def test_etag_missing(self):
+        self.storage.connection.meta.client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        with self.assertRaises(FileNotFoundError):
+            self.storage.etag("file.txt")
+
+    def test_isdir(self):
+        client = self.storage.connection.meta.client
+        client.list_objects_v2.return_value = {"Contents": [{"Key": "path/a.txt"}]}
+        self.assertTrue(self.storage.isdir("path"))
+        client.list_objects_v2.assert_called_once_with(
+            Bucket=default_settings.AWS_STORAGE_BUCKET_NAME, Prefix="path/", MaxKeys=1
+        )
+        client.list_objects_v2.return_value = {}
+        self.assertFalse(self.storage.isdir("missing"))
+
+    def test_isfile(self):
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {}
+        self.assertTrue(self.storage.isfile("file.txt"))
+        self.assertFalse(self.storage.isfile("path/"))
+        client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        self.assertFalse(self.storage.isfile("missing.txt"))
+
+    def test_metadata_cache(self):
+        client = self.storage.connection.meta.client
+        self.storage.metadata_cache = MetadataCache(ttl=60)
+        client.head_object.side_effect = ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        client.list_objects_v2.return_value = {}
+        self.assertFalse(self.storage.exists("path/file.txt"))
+        self.assertFalse(self.storage.exists("path/file.txt"))
+        self.assertEqual(client.head_object.call_count, 1)
+        self.assertEqual(client.list_objects_v2.call_count, 1)
+
+        self.storage.touch("path/file.txt", io.BytesIO(b"foo"))
+        self.assertTrue(self.storage.exists("path/file.txt"))
+        self.assertEqual(client.head_object.call_count, 1)
+
+        self.storage.rm("path/file.txt")
+        self.assertFalse(self.storage.isfile("path/file.txt"))
+        self.assertEqual(client.head_object.call_count, 1)
+
+    def test_read_range(self):
+        client = self.storage.connection.meta.client
+        client.get_object.return_value = {"Body": io.BytesIO(b"oba")}
+        self.assertEqual(self.storage.read_range("file.txt", 2, 3), b"oba")
+        client.get_object.assert_called_once_with(
+            Bucket=default_settings.AWS_STORAGE_BUCKET_NAME,
+            Key="file.txt",
+            Range="bytes=2-4",
+        )
+
+    def test_read_range_errors(self):
+        client = self.storage.connection.meta.client
+        client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "InvalidRange"}}, "GetObject"
+        )
+        self.assertEqual(self.storage.read_range("file.txt", 10, 3), b"")
+        client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+        )
+        with self.assertRaises(FileNotFoundError):
+            self.storage.read_range("file.txt", 0, 3)
+
+    def test_size(self):
+        client = self.storage.connection.meta.client
+        client.head_object.return_value = {"ContentLength": 6}
+        self.assertEqual(self.storage.size("file.txt"), 6)
@@ -41,3 +41,8 @@ LOGGING = {
 
 GOOGLE_GCS_BUCKET = "foo"
 CELERY_BROKER_URL = "redis://localhost:6379/0"
+AWS_STORAGE_BUCKET_NAME = "foo"
+AWS_S3_REGION_NAME = None
+AWS_S3_ENDPOINT_URL = None
+AWS_ACCESS_KEY_ID = None
+AWS_SECRET_ACCESS_KEY = None
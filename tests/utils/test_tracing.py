@@ -0,0 +1,140 @@
+import os
+import json
+from io import BytesIO, StringIO
+from contextlib import contextmanager
+from unittest import TestCase, mock
+from gluepy.files.data.pandas import PandasDataManager
+from gluepy.files.storages import default_storage
+from gluepy.utils import tracing
+
+
+class TraceRecorderTestCase(TestCase):
+    def setUp(self) -> None:
+        self.addCleanup(tracing.stop_trace)
+        return super().setUp()
+
+    def test_span(self):
+        recorder = tracing.TraceRecorder()
+        with recorder.span("outer", "task", foo="bar") as args:
+            with recorder.span("inner", "storage"):
+                pass
+            args["bytes"] = 3
+
+        trace = json.loads(recorder.to_json())
+        events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        metadata = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+        self.assertEqual([e["name"] for e in events], ["inner", "outer"])
+        self.assertEqual(events[1]["args"], {"foo": "bar", "bytes": 3})
+        self.assertLessEqual(events[1]["ts"], events[0]["ts"])
+        self.assertGreaterEqual(events[1]["dur"], events[0]["dur"])
+        self.assertEqual(len(metadata), 1)
+        self.assertEqual(metadata[0]["name"], "thread_name")
+
+    def test_span_inactive(self):
+        with tracing.span("task", "task", foo="bar") as args:
+            self.assertEqual(args, {"foo": "bar"})
+        self.assertIsNone(tracing.get_recorder())
+
+    def test_pop_events(self):
+        recorder = tracing.TraceRecorder()
+        with recorder.span("parent", "task"):
+            pass
+        with mock.patch("os.getpid", return_value=recorder.pid + 1):
+            with recorder.span("worker", "task"):
+                pass
+            events = recorder.pop_events()
+
+        self.assertEqual(
+            [e["name"] for e in events if e["ph"] == "X"],
+            ["worker"],
+        )
+        remaining = json.loads(recorder.to_json())["traceEvents"]
+        self.assertEqual([e["name"] for e in remaining if e["ph"] == "X"], ["parent"])
+
+    def test_storage_spans(self):
+        recorder = tracing.start_trace()
+        default_storage.touch("tracing/file.txt", BytesIO(b"hello"))
+        default_storage.open("tracing/file.txt")
+        default_storage.exists("tracing/file.txt")
+        tracing.stop_trace()
+        default_storage.touch("tracing/other.txt", StringIO("untraced"))
+
+        events = [
+            e
+            for e in json.loads(recorder.to_json())["traceEvents"]
+            if e["ph"] == "X" and e["cat"] == "storage"
+        ]
+        touch = next(e for e in events if e["name"] == "storage.touch")
+        read = next(e for e in events if e["name"] == "storage.open")
+        self.assertEqual(touch["args"], {"file_path": "tracing/file.txt", "bytes": 5})
+        self.assertEqual(read["args"]["bytes"], 5)
+        self.assertIn("storage.exists", [e["name"] for e in events])
+        self.assertFalse(
+            any(e["args"].get("file_path") == "tracing/other.txt" for e in events)
+        )
+
+    def test_storage_stream_spans(self):
+        default_storage.touch("tracing/data.csv", StringIO("a,b\n1,2\n3,4\n"))
+        recorder = tracing.start_trace()
+        df = PandasDataManager().read("tracing/data.csv", root=True)
+        files = list(default_storage.walk("tracing"))
+        tracing.stop_trace()
+
+        self.assertEqual(len(df), 2)
+        self.assertIn("tracing/data.csv", [os.path.normpath(f) for f in files])
+        events = [
+            e
+            for e in json.loads(recorder.to_json())["traceEvents"]
+            if e["ph"] == "X" and e["cat"] == "storage"
+        ]
+        stream = next(e for e in events if e["name"] == "storage.open_stream")
+        self.assertEqual(stream["args"], {"file_path": "tracing/data.csv", "bytes": 12})
+        walk = next(e for e in events if e["name"] == "storage.walk")
+        self.assertEqual(walk["args"], {"path": "tracing"})
+
+    def test_trace_context_and_generator_methods(self):
+        class Reader:
+            @contextmanager
+            def open_stream(self, path):
+                stream = BytesIO(b"abcdef")
+                yield stream
+                stream.close()
+
+            def walk(self, path):
+                yield "a"
+                yield "b"
+
+        tracing.trace_methods(
+            Reader, "test", {"open_stream": tracing.streamed_bytes, "walk": None}
+        )
+        recorder = tracing.start_trace()
+        with Reader().open_stream("file") as stream:
+            stream.read(4)
+        self.assertEqual(list(Reader().walk("dir")), ["a", "b"])
+
+        events = json.loads(recorder.to_json())["traceEvents"]
+        events = {e["name"]: e for e in events if e["ph"] == "X"}
+        self.assertEqual(
+            events["test.open_stream"]["args"], {"path": "file", "bytes": 4}
+        )
+        self.assertEqual(events["test.walk"]["args"], {"path": "dir"})
+
+    def test_trace_methods(self):
+        class Base:
+            def __init_subclass__(cls, **kwargs) -> None:
+                super().__init_subclass__(**kwargs)
+                tracing.trace_methods(cls, "test", {"read": tracing.read_bytes})
+
+        class Reader(Base):
+            def read(self, path):
+                return b"abc"
+
+        class SubReader(Reader):
+            pass
+
+        self.assertIs(SubReader.read, Reader.read)
+        recorder = tracing.start_trace()
+        self.assertEqual(SubReader().read(path="file"), b"abc")
+        events = json.loads(recorder.to_json())["traceEvents"]
+        self.assertEqual(events[-1]["name"], "test.read")
+        self.assertEqual(events[-1]["args"], {"path": "file", "bytes": 3})